@@ -0,0 +1,70 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class AnalysisTokenCodec:
+    """Signed, self-contained tokens carrying what a deferred scene analysis needs to be recomputed
+
+    A token is the zlib-compressed JSON header (issue time, verbosity and clues) plus the float16
+    embedding, URL-safe base64 encoded and followed by a truncated HMAC-SHA256 of that payload.
+    """
+
+    SIGNATURE_BYTES = 16
+
+    def __init__(self, secret: Union[str, bytes], ttl_seconds: float):
+        self.secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.ttl_seconds = float(ttl_seconds)
+
+    def _sign(self, payload: str) -> bytes:
+        return hmac.new(self.secret, payload.encode("ascii", "replace"), hashlib.sha256).digest()[:self.SIGNATURE_BYTES]
+
+    def encode(
+        self,
+        embedding_np: np.ndarray,
+        ocr_text: Optional[str],
+        context_clues: Optional[List[str]],
+        verbosity: str,
+    ) -> str:
+        header = json.dumps({
+            "issued_at": round(time.time(), 3),
+            "verbosity": verbosity,
+            "ocr_text": ocr_text,
+            "context_clues": context_clues,
+        }).encode("utf-8")
+        body = zlib.compress(
+            len(header).to_bytes(4, "little") + header + np.asarray(embedding_np, dtype="<f2").tobytes()
+        )
+        payload = _b64encode(body)
+        return f"{payload}.{_b64encode(self._sign(payload))}"
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verified, unexpired token contents, or None for anything forged, malformed or expired."""
+        payload, _, signature = token.partition(".")
+        try:
+            if not hmac.compare_digest(_b64decode(signature), self._sign(payload)):
+                return None
+            body = zlib.decompress(_b64decode(payload))
+            header_length = int.from_bytes(body[:4], "little")
+            header = json.loads(body[4:4 + header_length].decode("utf-8"))
+            embedding = np.frombuffer(body[4 + header_length:], dtype="<f2").astype(np.float32)
+            issued_at = float(header["issued_at"])
+        except (ValueError, KeyError, TypeError, zlib.error):
+            return None
+        if time.time() - issued_at > self.ttl_seconds:
+            return None
+        return {**header, "embedding": embedding}
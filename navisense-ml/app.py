@@ -1,3 +1,4 @@
+import base64
 import io
 import hashlib
 import json
@@ -5,31 +6,64 @@ import mimetypes
 import os
 import random
 import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import boto3
 import numpy as np
-import psycopg2
 import torch
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from PIL import Image
 from pinecone import Pinecone, ServerlessSpec
 
+from analysis_tokens import AnalysisTokenCodec
 from architectural_matcher import ArchitecturalMatcher
-from backbone import load_backbone
+from backbone import (
+    compare_embedding_sets,
+    configure_torch_threads,
+    get_backbone_model_name,
+    get_backbone_quantization_mode,
+    load_backbone,
+    measure_module_bytes,
+    quantize_backbone,
+    resolve_index_name,
+)
+from backbone_backends import build_image_encoder
+from batch_archive import BatchArchiveError, read_batch_archive
+from cell_probe_retriever import CellProbeRetriever, prior_guided_retrieval_enabled
+from env_flags import env_flag
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from inference_executor import InferenceExecutor, InferenceQueueFull
+from json_response import FastJSONResponse, ResponseStats
+from latency_budget import LatencyBudget, StageLatencyTracker
 from enhanced_ocr import EnhancedOCR
+from geo_cells import covering_geohashes, geo_tags, geohash_field
 from geolocation_model import GeolocationPredictor
-from navisense_v3 import NaviSenseV3
+from image_preprocessing import build_fast_preprocessor, build_parity_probe_image
+from navisense_v3 import VERBOSITY_LEVELS, NaviSenseV3, QueryContext
+from perceptual_hash import PerceptualHashIndex
+from single_flight import SingleFlight
+from stats_refresher import StatsRefresher
+from ttl_store import TTLStore
+from vector_store import build_vector_store, get_vector_store_backend
+from vector_write_buffer import VectorWriteBuffer
 
 load_dotenv()
 
-s3_client = boto3.client('s3',
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name=os.getenv('AWS_S3_REGION_NAME', 'us-east-1'))
+def build_s3_client():
+    return boto3.client('s3',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_S3_REGION_NAME', 'us-east-1'))
+
+s3_client = build_s3_client()
 
 app = FastAPI(title="Navisense ML API")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
@@ -58,62 +92,173 @@ def resolve_index_dimension(description: Any) -> Optional[int]:
     return None
 
 
-model, processor, device, backbone_info = load_backbone()
-EMBEDDING_DIM = int(backbone_info["embedding_dim"])
-BACKBONE_MODEL_NAME = str(backbone_info["model_name"])
-
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index_name = backbone_info["index_name"]
-if index_name not in pc.list_indexes().names():
-    pc.create_index(
-        name=index_name,
-        dimension=EMBEDDING_DIM,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+# Startup runs independent loads concurrently: the backbone weights, the Pinecone control-plane
+# checks and the S3 artifact downloads. Each phase's duration is logged and kept for /model-info.
+startup_started_at = time.perf_counter()
+startup_phases_ms: Dict[str, float] = {}
+
+def run_startup_phase(name: str, fn, *args, **kwargs):
+    started_at = time.perf_counter()
+    result = fn(*args, **kwargs)
+    startup_phases_ms[name] = round((time.perf_counter() - started_at) * 1000.0, 1)
+    print(f"Startup phase {name}: {startup_phases_ms[name]} ms")
+    return result
+
+# "lambda" trusts the deployed index instead of paying for control-plane round trips on every cold start.
+STARTUP_PROFILE = os.getenv("NAVISENSE_STARTUP_PROFILE", "server").strip().lower()
+
+VECTOR_STORE_BACKEND = get_vector_store_backend()
+SERVING_WORKERS = max(1, int(os.getenv("NAVISENSE_WORKERS", "1")))
+if VECTOR_STORE_BACKEND == "local" and SERVING_WORKERS > 1:
+    # Each worker would hold and snapshot its own copy: writes in one worker are invisible to
+    # the others, and the last snapshot drops what the others added.
+    raise RuntimeError(
+        f"NAVISENSE_VECTOR_STORE=local supports a single serving process, but NAVISENSE_WORKERS={SERVING_WORKERS}; "
+        "set NAVISENSE_WORKERS=1 or use the pinecone backend"
     )
-else:
+pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY")) if VECTOR_STORE_BACKEND == "pinecone" else None
+index_name = resolve_index_name(get_backbone_model_name())
+
+def describe_pinecone_index(name: str) -> Tuple[bool, Optional[int]]:
+    if STARTUP_PROFILE == "lambda" or pc is None:
+        return True, None
+    if name not in pc.list_indexes().names():
+        return False, None
     index_description = None
     try:
-        index_description = pc.describe_index(index_name)
+        index_description = pc.describe_index(name)
     except Exception as error:
-        print(f"Unable to inspect Pinecone index '{index_name}' dimension: {error}")
+        print(f"Unable to inspect Pinecone index '{name}' dimension: {error}")
+    return True, resolve_index_dimension(index_description)
 
-    existing_dimension = resolve_index_dimension(index_description)
-    if existing_dimension is not None and existing_dimension != EMBEDDING_DIM:
+architectural_matcher = ArchitecturalMatcher()
+perceptual_hash_index = PerceptualHashIndex()
+
+with ThreadPoolExecutor(max_workers=4, thread_name_prefix="navisense-startup") as startup_pool:
+    pinecone_index_future = startup_pool.submit(run_startup_phase, "pinecone_index", describe_pinecone_index, index_name)
+    architectural_features_future = startup_pool.submit(
+        run_startup_phase,
+        "architectural_features",
+        architectural_matcher.load_features,
+    )
+    perceptual_hash_future = startup_pool.submit(
+        run_startup_phase,
+        "perceptual_hash_index",
+        perceptual_hash_index.load_index,
+    )
+    model, processor, device, backbone_info = run_startup_phase("backbone", load_backbone)
+    EMBEDDING_DIM = int(backbone_info["embedding_dim"])
+    BACKBONE_MODEL_NAME = str(backbone_info["model_name"])
+
+    def load_navisense_v3() -> NaviSenseV3:
+        scene_model = NaviSenseV3(
+            model,
+            processor,
+            device,
+            embedding_dim=EMBEDDING_DIM,
+            model_name=BACKBONE_MODEL_NAME,
+        )
+        print(f"Zero-shot prompt bank: {scene_model.scene_analyzer.ensure_prompt_bank()}")
+        return scene_model
+
+    geolocation_future = startup_pool.submit(
+        run_startup_phase,
+        "geolocation_predictor",
+        GeolocationPredictor,
+        device,
+        embedding_dim=EMBEDDING_DIM,
+    )
+    navisense_v3_future = startup_pool.submit(run_startup_phase, "navisense_v3", load_navisense_v3)
+
+    index_exists, existing_dimension = pinecone_index_future.result()
+    if not index_exists:
+        pc.create_index(
+            name=index_name,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+    elif existing_dimension is not None and existing_dimension != EMBEDDING_DIM:
         raise RuntimeError(
             f"Pinecone index '{index_name}' dimension ({existing_dimension}) does not match "
             f"the configured backbone '{BACKBONE_MODEL_NAME}' ({EMBEDDING_DIM}). "
             "Set PINECONE_INDEX_NAME to a compatible index or use a matching backbone."
         )
-index = pc.Index(index_name)
-
-# Initialize new ML components
-geolocation_predictor = GeolocationPredictor(device, embedding_dim=EMBEDDING_DIM)
-architectural_matcher = ArchitecturalMatcher()
+    geolocation_predictor = geolocation_future.result()
+    navisense_v3 = navisense_v3_future.result()
+    architectural_features_future.result()
+    perceptual_hash_future.result()
+
+index = run_startup_phase(
+    "vector_store",
+    build_vector_store,
+    VECTOR_STORE_BACKEND,
+    index_name,
+    EMBEDDING_DIM,
+    pinecone_client=pc,
+)
 enhanced_ocr = EnhancedOCR()
-navisense_v3 = NaviSenseV3(model, processor, device, embedding_dim=EMBEDDING_DIM)
+if backbone_info["mode"] == "vision" and hasattr(model, "unload_text_tower"):
+    # Encoding the bank may have pulled in the text tower; serve image-only requests without it.
+    model.unload_text_tower()
+startup_phases_ms["import_total"] = round((time.perf_counter() - startup_started_at) * 1000.0, 1)
+print(f"Startup phase import_total: {startup_phases_ms['import_total']} ms")
 CODE_VERSION = "2026-04-01-configurable-backbone"
 TRAINING_IMAGE_PREFIX = os.getenv("TRAINING_IMAGE_PREFIX", "navisense-training/direct")
 TRAINING_SPLIT_SEED = 42
 
 print("All ML models initialized successfully")
 
+cached_artifacts_loaded = False
+
 @app.on_event("startup")
 def load_cached_artifacts():
-    architectural_matcher.load_features()
-    print("Architectural matcher features loaded")
+    # The pre-fork server loads these once in the parent before workers are forked.
+    global cached_artifacts_loaded
+    if cached_artifacts_loaded:
+        return
+    run_startup_phase("backbone_quantization", activate_backbone_quantization)
+    cached_artifacts_loaded = True
+
+def reinitialize_after_fork(worker_count: int = 1) -> int:
+    """Rebuild per-process clients and thread pools in a freshly forked serving worker."""
+    global s3_client
+
+    torch_threads = configure_torch_threads(worker_count)
+    s3_client = build_s3_client()
+    index.reset_after_fork()
+    geolocation_predictor.s3_client = geolocation_predictor._build_s3_client()
+    navisense_v3.s3_client = navisense_v3._build_s3_client()
+    navisense_v3.scene_analyzer.s3_client = navisense_v3.scene_analyzer._build_s3_client()
+    architectural_matcher.s3_client = architectural_matcher._build_s3_client()
+    perceptual_hash_index.reset_after_fork()
+    image_encoder.reset_after_fork()
+    embedding_batcher.reset_after_fork()
+    inference_executor.reset_after_fork()
+    single_flight.reset_after_fork()
+    deferred_analysis_store.reset_after_fork()
+    response_stats.reset_after_fork()
+    stage_latency.reset_after_fork()
+    stats_refresher.reset_after_fork()
+    vector_write_buffer.reset_after_fork()
+    cell_probe_retriever.reset_after_fork()
+    return torch_threads
 
 
 def build_scene_analysis(
     embedding_np: np.ndarray,
     ocr_text: Optional[str] = None,
     context_clues: Optional[List[str]] = None,
+    context: Optional[QueryContext] = None,
+    verbosity: str = "debug",
 ) -> Dict[str, Any]:
     try:
         return navisense_v3.analyze_scene(
             embedding_np,
             ocr_text=ocr_text,
             context_clues=context_clues,
+            context=context,
+            verbosity=verbosity,
         )
     except Exception as error:
         return {"error": str(error)}
@@ -223,14 +368,298 @@ def collect_multimodal_context_clues(
 
     return collected[:12]
 
-def generate_embedding(image: Image.Image):
-    """Generate a backbone embedding for an input image."""
-    inputs = processor(images=image, return_tensors="pt").to(device)
-    with torch.no_grad():
-        embeddings = model.get_image_features(**inputs)
-    return embeddings[0].cpu().numpy().tolist()
+def decode_image(image_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+image_encoder = build_image_encoder(model, processor, BACKBONE_MODEL_NAME, device)
+
+def encode_backbone_pixels(pixel_values: torch.Tensor) -> torch.Tensor:
+    return image_encoder(pixel_values)
+
+fast_preprocessor, fast_preprocess_status = build_fast_preprocessor(processor, encode_backbone_pixels)
+print(
+    "Fast image preprocessing:",
+    "enabled" if fast_preprocessor else f"disabled ({fast_preprocess_status.get('reason')})",
+    fast_preprocess_status.get("parity", ""),
+)
+
+def preprocess_backbone_image(image: Union[bytes, Image.Image]) -> torch.Tensor:
+    """Turn raw upload bytes or a decoded image into backbone ``pixel_values``."""
+    if fast_preprocessor is not None:
+        return fast_preprocessor(image)
+    if isinstance(image, bytes):
+        image = decode_image(image)
+    return processor(images=image, return_tensors="pt")["pixel_values"]
+
+embedding_batcher = EmbeddingBatcher(preprocess_backbone_image, encode_backbone_pixels)
+
+inference_executor = InferenceExecutor()
+# Online training mutates shared model state, so updates are serialized across executor threads.
+training_lock = threading.Lock()
+
+def generate_embedding(image: Union[bytes, Image.Image]):
+    """Generate a backbone embedding for raw image bytes or a decoded image via the shared micro-batcher."""
+    return embedding_batcher.embed(image)
+
+embedding_cache = EmbeddingCache(BACKBONE_MODEL_NAME)
+backbone_quantization_status: Dict[str, Any] = {"requested": get_backbone_quantization_mode(), "active": "fp32"}
+
+def hash_image_bytes(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def embed_image_bytes(image_bytes: bytes, image_hash: Optional[str] = None) -> List[float]:
+    """Embed raw image bytes, decoding and running the backbone only on a cache miss."""
+    return embedding_cache.get_or_compute(
+        image_hash or hash_image_bytes(image_bytes),
+        lambda: generate_embedding(image_bytes),
+    )
+
+def embed_image_bytes_many(
+    image_bytes_list: List[bytes],
+    image_hashes: List[str],
+    concurrency: int = 1,
+) -> List[Any]:
+    """Embed many images through the shared batcher; failed items come back as exceptions.
+
+    Cache hits skip decoding, duplicate images within the call are embedded once, and cache misses
+    are decoded and preprocessed on ``concurrency`` threads so the batcher sees full batches.
+    """
+    results: List[Any] = [None] * len(image_bytes_list)
+    positions_by_hash: Dict[str, List[int]] = {}
+    for position, image_hash in enumerate(image_hashes):
+        positions_by_hash.setdefault(image_hash, []).append(position)
+
+    misses = []
+    for image_hash, positions in positions_by_hash.items():
+        cached = embedding_cache.get(image_hash)
+        if cached is not None:
+            for position in positions:
+                results[position] = cached
+        else:
+            misses.append(image_hash)
+
+    def submit_miss(image_hash: str):
+        # Decode failures surface through the returned future.
+        return embedding_batcher.submit(image_bytes_list[positions_by_hash[image_hash][0]])
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(misses)))) as pool:
+            futures = list(pool.map(submit_miss, misses))
+
+        for image_hash, future in zip(misses, futures):
+            try:
+                embedding = future.result()
+                embedding_cache.put(image_hash, embedding)
+            except Exception as error:
+                embedding = error
+            for position in positions_by_hash[image_hash]:
+                results[position] = embedding
+
+    return results
+
+async def run_inference(fn, *args, **kwargs):
+    """Dispatch blocking decode/model/storage work to the bounded inference executor."""
+    try:
+        return await inference_executor.run(fn, *args, **kwargs)
+    except InferenceQueueFull as error:
+        raise HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+# Client retries often send the same upload concurrently; identical requests share one computation.
+single_flight = SingleFlight()
+
+def build_coalescing_key(image_hash: str, *fields: Optional[str]) -> str:
+    digest = hashlib.sha256(image_hash.encode("utf-8"))
+    for value in fields:
+        digest.update(b"\x1f")
+        digest.update(re.sub(r"\s+", " ", value or "").strip().lower().encode("utf-8"))
+    return digest.hexdigest()
+
+async def run_coalesced_inference(
+    scope: str,
+    image_hash: str,
+    fields: Tuple[Optional[str], ...],
+    fn,
+    *args,
+    **kwargs,
+):
+    return await single_flight.run(
+        scope,
+        build_coalescing_key(image_hash, *fields),
+        lambda: run_inference(fn, *args, **kwargs),
+    )
+
+# /predict can return the location first and leave the zero-shot scene analysis to /analysis/{token}.
+# The token carries the signed embedding and clues, so any worker can recompute the analysis; the
+# issuing worker also keeps the prior-head outputs so its own (and precompute) fetches skip them.
+PREDICT_ANALYSIS_MODES = ("inline", "deferred")
+PREDICT_ANALYSIS_DEFAULT = os.getenv("NAVISENSE_PREDICT_ANALYSIS", "inline").strip().lower()
+DEFERRED_ANALYSIS_PRECOMPUTE = env_flag("NAVISENSE_DEFERRED_ANALYSIS_PRECOMPUTE", True)
+deferred_analysis_store = TTLStore(
+    max_entries=int(os.getenv("NAVISENSE_DEFERRED_ANALYSIS_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("NAVISENSE_DEFERRED_ANALYSIS_TTL_SECONDS", "300")),
+)
+# Generated before fork when unset, so every worker of one server shares it; set it explicitly
+# when tokens must survive restarts or be served by other hosts.
+analysis_tokens = AnalysisTokenCodec(
+    os.getenv("NAVISENSE_ANALYSIS_TOKEN_SECRET") or secrets.token_hex(32),
+    ttl_seconds=deferred_analysis_store.ttl_seconds,
+)
+
+def resolve_predict_analysis_mode(value: Optional[str]) -> str:
+    mode = (value or PREDICT_ANALYSIS_DEFAULT).strip().lower()
+    if mode not in PREDICT_ANALYSIS_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"analysis must be one of {', '.join(PREDICT_ANALYSIS_MODES)}",
+        )
+    return mode
+
+def defer_scene_analysis(embedding_np: np.ndarray, query_context: QueryContext, verbosity: str = "debug") -> str:
+    verbosity = "standard" if verbosity == "minimal" else verbosity
+    token = analysis_tokens.encode(embedding_np, query_context.ocr_text, query_context.context_clues, verbosity)
+    # Keep only what scene analysis reuses: the fused query and prior-head outputs. Memory
+    # alignment is rescored on fetch rather than held for every outstanding token.
+    analysis_context = navisense_v3.create_query_context(
+        embedding_np,
+        ocr_text=query_context.ocr_text,
+        context_clues=query_context.context_clues,
+    )
+    analysis_context.query = query_context.query
+    analysis_context.prior_outputs = query_context.prior_outputs
+    deferred_analysis_store.put(token, {
+        "embedding": embedding_np,
+        "context": analysis_context,
+        "verbosity": verbosity,
+        "analysis": None,
+        "created_at": time.time(),
+    })
+    return token
+
+def materialize_deferred_analysis(token: str) -> Optional[Dict[str, Any]]:
+    entry = deferred_analysis_store.get(token)
+    if entry is None:
+        # Issued by another worker (or evicted here): rebuild the request from the token itself.
+        decoded = analysis_tokens.decode(token)
+        if decoded is None:
+            return None
+        entry = {
+            "embedding": decoded["embedding"],
+            "context": navisense_v3.create_query_context(
+                decoded["embedding"],
+                ocr_text=decoded["ocr_text"],
+                context_clues=decoded["context_clues"],
+            ),
+            "verbosity": decoded["verbosity"],
+            "analysis": None,
+            "created_at": decoded["issued_at"],
+        }
+        deferred_analysis_store.put(token, entry)
+
+    if entry["analysis"] is None:
+        started_at = time.perf_counter()
+        entry["analysis"] = build_scene_analysis(
+            entry["embedding"],
+            context=entry["context"],
+            verbosity=entry["verbosity"],
+        )
+        entry["compute_ms"] = round((time.perf_counter() - started_at) * 1000.0, 2)
+        entry["context"] = None
+    return {
+        "token": token,
+        "status": "ready",
+        "analysis": entry["analysis"],
+        "compute_ms": entry.get("compute_ms"),
+        "age_seconds": round(time.time() - entry["created_at"], 3),
+    }
+
+async def load_deferred_analysis(token: str) -> Optional[Dict[str, Any]]:
+    # Background precompute and client fetches of the same token share one computation.
+    return await single_flight.run(
+        "analysis",
+        token,
+        lambda: run_inference(materialize_deferred_analysis, token),
+    )
+
+# minimal: location and ranked matches; standard: adds prior diagnostics and scene analysis;
+# debug: adds the per-match prior alignment breakdown. Lower levels skip building what they omit.
+RESPONSE_VERBOSITY_DEFAULT = os.getenv("NAVISENSE_RESPONSE_VERBOSITY", "debug").strip().lower()
+response_stats = ResponseStats()
+
+def resolve_response_verbosity(value: Optional[str]) -> str:
+    verbosity = (value or RESPONSE_VERBOSITY_DEFAULT).strip().lower()
+    if verbosity not in VERBOSITY_LEVELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"verbosity must be one of {', '.join(VERBOSITY_LEVELS)}",
+        )
+    return verbosity
+
+# Optional /predict stages are skipped once the caller's deadline_ms cannot cover their observed p95.
+PREDICT_DEADLINE_DEFAULT_MS = float(os.getenv("NAVISENSE_PREDICT_DEADLINE_MS") or 0) or None
+stage_latency = StageLatencyTracker()
+
+def resolve_predict_deadline(value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return PREDICT_DEADLINE_DEFAULT_MS
+    if value <= 0:
+        raise HTTPException(status_code=400, detail="deadline_ms must be positive")
+    return float(value)
+
+GEO_FILTER_DEFAULT_RADIUS_KM = float(os.getenv("NAVISENSE_GEO_FILTER_DEFAULT_RADIUS_KM", "25"))
+
+def resolve_geo_scope(
+    approx_lat: Optional[float],
+    approx_lng: Optional[float],
+    radius_km: Optional[float],
+) -> Optional[Dict[str, Any]]:
+    """Geohash metadata filter covering the client's approximate location, or None without one."""
+    if approx_lat is None and approx_lng is None:
+        return None
+    if approx_lat is None or approx_lng is None:
+        raise HTTPException(status_code=400, detail="approx_lat and approx_lng must be sent together")
+    if not -90.0 <= approx_lat <= 90.0 or not -180.0 <= approx_lng <= 180.0:
+        raise HTTPException(status_code=400, detail="approx_lat must be within [-90, 90] and approx_lng within [-180, 180]")
+    radius_km = GEO_FILTER_DEFAULT_RADIUS_KM if radius_km is None else float(radius_km)
+    if radius_km <= 0:
+        raise HTTPException(status_code=400, detail="radius_km must be positive")
+
+    scope: Dict[str, Any] = {
+        "approx_lat": float(approx_lat),
+        "approx_lng": float(approx_lng),
+        "radius_km": radius_km,
+        "precision": None,
+        "cells": 0,
+        "filter": None,
+    }
+    # Radii too large to cover with a handful of cells search the whole index.
+    covering = covering_geohashes(approx_lat, approx_lng, radius_km)
+    if covering:
+        precision, cells = covering
+        scope.update(precision=precision, cells=len(cells), filter={geohash_field(precision): {"$in": cells}})
+    return scope
+
+PRIOR_GUIDED_RETRIEVAL = prior_guided_retrieval_enabled()
+cell_probe_retriever = CellProbeRetriever()
+
+def build_geo_scope_key(geo_scope: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not geo_scope:
+        return None
+    return f"{geo_scope['approx_lat']},{geo_scope['approx_lng']},{geo_scope['radius_km']}"
+
+def json_response(content: Any, metrics_label: str) -> FastJSONResponse:
+    return FastJSONResponse(content, stats=response_stats, metrics_label=metrics_label)
+
+async def precompute_deferred_analysis(token: str) -> None:
+    try:
+        await load_deferred_analysis(token)
+    except Exception as error:
+        # The client can still compute it on demand through /analysis/{token}.
+        print(f"Deferred scene analysis precompute skipped for {token}: {getattr(error, 'detail', error)}")
 
 def get_db_connection():
+    # Only training, stats and debug routes touch Postgres; keep the driver off the serving import path.
+    import psycopg2
+
     return psycopg2.connect(
         host=os.getenv('POSTGRES_HOST'),
         database=os.getenv('POSTGRES_DATABASE'),
@@ -239,6 +668,49 @@ def get_db_connection():
         sslmode='require'
     )
 
+def count_index_vectors() -> int:
+    return index.describe_index_stats().total_vector_count
+
+def count_training_records() -> Dict[str, int]:
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+
+        cur.execute("SELECT COUNT(*) FROM location_recognitions")
+        total_recognitions = cur.fetchone()[0]
+
+        cur.execute("SELECT COUNT(*) FROM location_feedback WHERE \"wasCorrect\" = true")
+        verified_feedback = cur.fetchone()[0]
+
+        cur.execute("SELECT COUNT(*) FROM \"NavisenseTraining\" WHERE verified = true")
+        navisense_training = cur.fetchone()[0]
+
+        # Count verified feedback with correct locations (ready for training)
+        cur.execute('''
+            SELECT COUNT(*) FROM location_feedback lf
+            JOIN location_recognitions lr ON lf."recognitionId" = lr.id
+            WHERE lf."wasCorrect" = true AND lf."correctLat" IS NOT NULL 
+            AND lf."correctLng" IS NOT NULL AND lr."imageUrl" IS NOT NULL
+        ''')
+        feedback_ready = cur.fetchone()[0]
+
+        cur.close()
+    finally:
+        conn.close()
+
+    return {
+        "total_recognitions": total_recognitions,
+        "verified_feedback": verified_feedback,
+        "navisense_training": navisense_training,
+        "feedback_ready": feedback_ready,
+    }
+
+# Probes and dashboards read these counters from memory; a background thread refreshes them
+# every NAVISENSE_STATS_REFRESH_SECONDS instead of each request hitting Pinecone and Postgres.
+stats_refresher = StatsRefresher()
+stats_refresher.register("index_vectors", count_index_vectors)
+stats_refresher.register("training_records", count_training_records)
+
 def parse_metadata(metadata: Optional[str]) -> Dict[str, Any]:
     if not metadata:
         return {}
@@ -305,15 +777,13 @@ def upload_training_image(
     )
     return build_s3_url(s3_key)
 
-def load_image_from_s3(image_url: str) -> Tuple[bytes, Image.Image]:
+def load_image_bytes_from_s3(image_url: str) -> bytes:
     bucket = os.getenv('AWS_S3_BUCKET_NAME')
     if not bucket:
         raise RuntimeError("AWS_S3_BUCKET_NAME is not configured")
 
     response = s3_client.get_object(Bucket=bucket, Key=resolve_s3_key(image_url))
-    image_bytes = response['Body'].read()
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    return image_bytes, image
+    return response['Body'].read()
 
 def build_vector_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
     metadata = {
@@ -327,6 +797,7 @@ def build_vector_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
         metadata["businessName"] = record["businessName"]
     if record.get("originalMethod"):
         metadata["originalMethod"] = record["originalMethod"]
+    metadata.update(geo_tags(metadata["latitude"], metadata["longitude"]))
     return metadata
 
 def normalize_candidate_text(value: Optional[str]) -> str:
@@ -376,17 +847,32 @@ def dedupe_architectural_candidates(
 
     return deduped, collapsed_duplicates
 
-def upsert_training_vector(image_hash: str, embedding: List[float], metadata: Dict[str, Any]) -> str:
+# Training syncs queue their vectors on scoped buffers of this one and flush once per run instead of one
+# upsert per image; its age thread and the shutdown hook flush runs that have not finished.
+vector_write_buffer = VectorWriteBuffer(index)
+LEGACY_FEEDBACK_ID_PREFIX = "fb_"
+
+def upsert_training_vector(
+    image_hash: str,
+    embedding: List[float],
+    metadata: Dict[str, Any],
+    writes: VectorWriteBuffer,
+) -> str:
+    """Queue the training vector on the caller's ``vector_write_buffer.scoped()`` buffer; the caller flushes it."""
     vector_id = f"loc_{image_hash[:16]}"
-    legacy_feedback_id = f"fb_{image_hash[:16]}"
-    index.upsert(vectors=[(vector_id, embedding, metadata)])
-    if legacy_feedback_id != vector_id:
-        try:
-            index.delete(ids=[legacy_feedback_id])
-        except Exception:
-            pass
+    writes.upsert(vector_id, embedding, metadata)
     return vector_id
 
+def flush_vector_writes(writes: Optional[VectorWriteBuffer] = None) -> Dict[str, Any]:
+    """Flush one caller's scoped buffer (or the shared one); the report covers only that buffer's writes."""
+    # The local backend snapshots in the background; rewriting the corpus per request would make
+    # every single-vector write O(corpus) disk I/O.
+    report = (writes or vector_write_buffer).flush()
+    if report["upserted"] or report["deleted"]:
+        # Reports built right after a write (e.g. /retrain's evaluation) must not show the pre-write count.
+        stats_refresher.refresh("index_vectors")
+    return report
+
 def upsert_training_record(
     image_url: str,
     image_hash: str,
@@ -631,11 +1117,12 @@ def prepare_training_examples(
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
     prepared = []
     failures = []
+    writes = vector_write_buffer.scoped()
 
     for record in records:
         try:
-            _, image = load_image_from_s3(record["image_url"])
-            embedding = generate_embedding(image)
+            image_bytes = load_image_bytes_from_s3(record["image_url"])
+            embedding = embed_image_bytes(image_bytes)
             record_copy = dict(record)
             record_copy["embedding"] = embedding
             prepared.append(record_copy)
@@ -644,7 +1131,8 @@ def prepare_training_examples(
                 upsert_training_vector(
                     record_copy["image_hash"],
                     embedding,
-                    build_vector_metadata(record_copy)
+                    build_vector_metadata(record_copy),
+                    writes,
                 )
         except Exception as e:
             failures.append({
@@ -653,6 +1141,10 @@ def prepare_training_examples(
                 "error": str(e)
             })
 
+    if sync_vectors:
+        for vector_id in flush_vector_writes(writes)["failed_ids"]:
+            failures.append({"vector_id": vector_id, "error": "vector upsert failed after retries"})
+
     return prepared, failures
 
 def count_unique_places(examples: List[Dict[str, Any]]) -> int:
@@ -899,11 +1391,134 @@ def build_evaluation_results(
         "vector_database": {
             "index_name": index_name,
             "dimension": EMBEDDING_DIM,
-            "total_vectors": index.describe_index_stats().total_vector_count,
+            "total_vectors": stats_refresher.value("index_vectors"),
             "status": "operational"
         }
     }
 
+def select_quantization_holdout(sample_size: int) -> List[Dict[str, Any]]:
+    """Deterministic held-out sample of canonical records, stable across restarts and replicas."""
+    records = [record for record in fetch_combined_training_records() if record.get("image_url")]
+    records.sort(key=lambda record: hashlib.sha256(f"quantization:{record['image_hash']}".encode()).hexdigest())
+    return records[:sample_size]
+
+def time_image_features(backbone: Any, pixel_values: torch.Tensor, repeats: int = 5) -> float:
+    timings = []
+    with torch.no_grad():
+        backbone.get_image_features(pixel_values=pixel_values)
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            backbone.get_image_features(pixel_values=pixel_values)
+            timings.append((time.perf_counter() - started_at) * 1000.0)
+    return float(np.median(timings))
+
+def activate_backbone_quantization() -> None:
+    """Swap in a dynamic INT8 backbone only if it agrees with fp32 on held-out canonical images."""
+    global model, image_encoder, embedding_cache
+
+    status = backbone_quantization_status
+    if status["requested"] != "int8" or status["active"] == "int8":
+        return
+    if device != "cpu":
+        status["reason"] = "dynamic INT8 quantization is CPU-only"
+        return
+
+    sample_size = max(2, int(os.getenv("NAVISENSE_QUANTIZATION_SAMPLES", "32")))
+    top_k = max(1, int(os.getenv("NAVISENSE_QUANTIZATION_TOP_K", "5")))
+    min_cosine = float(os.getenv("NAVISENSE_QUANTIZATION_MIN_COSINE", "0.98"))
+    min_agreement = float(os.getenv("NAVISENSE_QUANTIZATION_MIN_TOPK_AGREEMENT", "0.9"))
+    status.update({"min_cosine": min_cosine, "min_topk_agreement": min_agreement})
+
+    try:
+        started_at = time.perf_counter()
+        pixel_batches = []
+        texts = []
+        for record in select_quantization_holdout(sample_size):
+            try:
+                pixel_batches.append(preprocess_backbone_image(load_image_bytes_from_s3(record["image_url"])))
+            except Exception as error:
+                print(f"Skipping quantization holdout image {record['image_url']}: {error}")
+                continue
+            texts.extend(value for value in (record.get("address"), record.get("businessName")) if value)
+        if len(pixel_batches) < 2:
+            status["reason"] = "not enough held-out canonical images to validate INT8 embeddings"
+            print(f"INT8 backbone not activated: {status['reason']}")
+            return
+
+        pixel_values = torch.cat(pixel_batches, dim=0)
+        quantized_model = quantize_backbone(model)
+        with torch.no_grad():
+            reference_images = model.get_image_features(pixel_values=pixel_values).numpy()
+            candidate_images = quantized_model.get_image_features(pixel_values=pixel_values).numpy()
+        image_report = compare_embedding_sets(reference_images, candidate_images, top_k=top_k)
+
+        text_report: Optional[Dict[str, Any]] = None
+        if hasattr(model, "unload_text_tower"):
+            # Vision-only mode quantizes without a text tower; both sides would lazily load the
+            # same fp32 one, so there is nothing INT8 to compare and text clues stay fp32.
+            text_report = {"validated": False, "reason": "vision-only backbone: text tower is loaded lazily in fp32"}
+        elif texts:
+            text_inputs = processor(text=texts[: sample_size * 2], return_tensors="pt", padding=True, truncation=True)
+            with torch.no_grad():
+                reference_texts = model.get_text_features(**text_inputs).numpy()
+                candidate_texts = quantized_model.get_text_features(**text_inputs).numpy()
+            text_report = compare_embedding_sets(reference_texts, candidate_texts, top_k=top_k)
+
+        timing_batch = pixel_values[: min(8, pixel_values.shape[0])]
+        fp32_ms = time_image_features(model, timing_batch)
+        int8_ms = time_image_features(quantized_model, timing_batch)
+        fp32_bytes = measure_module_bytes(model)
+        int8_bytes = measure_module_bytes(quantized_model)
+        status.update({
+            "validation": {"image": image_report, "text": text_report},
+            "latency_ms": {
+                "batch_size": int(timing_batch.shape[0]),
+                "fp32": round(fp32_ms, 2),
+                "int8": round(int8_ms, 2),
+                "delta": round(int8_ms - fp32_ms, 2),
+            },
+            "weights_mb": {
+                "fp32": round(fp32_bytes / (1024 * 1024), 1),
+                "int8": round(int8_bytes / (1024 * 1024), 1),
+                "delta": round((int8_bytes - fp32_bytes) / (1024 * 1024), 1),
+            },
+            "validation_ms": round((time.perf_counter() - started_at) * 1000.0, 1),
+        })
+
+        failures = []
+        # Each validated tower must pass both gates; an agreement of None means too few samples to check.
+        towers = [("image", image_report)]
+        if text_report is None:
+            failures.append("no held-out text to validate the INT8 text tower")
+        elif text_report.get("validated", True):
+            towers.append(("text", text_report))
+        for tower, report in towers:
+            if report["min_cosine"] < min_cosine:
+                failures.append(f"{tower} min cosine {report['min_cosine']} < {min_cosine}")
+            if report["topk_agreement"] is None:
+                failures.append(f"{tower} top-k agreement unchecked: {report['samples']} samples")
+            elif report["topk_agreement"] < min_agreement:
+                failures.append(f"{tower} top-{report['top_k']} agreement {report['topk_agreement']} < {min_agreement}")
+        if failures:
+            status["reason"] = "; ".join(failures)
+            print(f"INT8 backbone not activated: {status['reason']}")
+            return
+    except Exception as error:
+        status["reason"] = f"validation failed: {error}"
+        print(f"INT8 backbone not activated: {status['reason']}")
+        return
+
+    model = quantized_model
+    # Compiled backend artifacts are keyed by model name; a distinct name keeps the fp32 ones from being reused.
+    image_encoder = build_image_encoder(model, processor, f"{BACKBONE_MODEL_NAME}-int8", device)
+    # The fp32 prompt bank stays in place; only new text clues go through the INT8 text tower
+    # (or the lazily loaded fp32 one in vision-only mode).
+    navisense_v3.scene_analyzer.clip_model = model
+    # INT8 embeddings are close to but not bit-identical with fp32 ones; keep their caches apart.
+    embedding_cache = EmbeddingCache(f"{BACKBONE_MODEL_NAME}-int8")
+    status["active"] = "int8"
+    print(f"INT8 backbone activated: {status['validation']['image']} {status['latency_ms']} {status['weights_mb']}")
+
 @app.get("/")
 def read_root():
     return {
@@ -920,6 +1535,30 @@ def read_root():
         ]
     }
 
+@app.get("/livez")
+def liveness_check():
+    """The process is up and serving HTTP; says nothing about model readiness."""
+    return {"status": "alive", "pid": os.getpid()}
+
+@app.get("/readyz")
+def readiness_check():
+    """Ready once startup artifacts are loaded and the /predict warmup has succeeded or exhausted its retries."""
+    checks = {
+        "cached_artifacts_loaded": cached_artifacts_loaded,
+        # "degraded" keeps retrying in the background; the first real requests may be slow or fail.
+        "warmup": warmup_status["status"] in {"ok", "skipped", "degraded"},
+    }
+    payload = {
+        "status": "ready" if all(checks.values()) else "not_ready",
+        "checks": checks,
+        "warmup": warmup_status,
+        "startup_profile": STARTUP_PROFILE,
+        "startup_phases_ms": startup_phases_ms,
+    }
+    if not all(checks.values()):
+        return FastJSONResponse(payload, status_code=503)
+    return payload
+
 @app.get("/health")
 def health_check():
     return {
@@ -930,7 +1569,8 @@ def health_check():
         "device": device, 
         "code_version": CODE_VERSION,
         "confidence_gate": geolocation_predictor.confidence_gate,
-        "vectors_in_db": index.describe_index_stats().total_vector_count,
+        "vectors_in_db": stats_refresher.value("index_vectors"),
+        "vectors_in_db_refreshed_at": stats_refresher.get("index_vectors")["refreshed_at"],
         "geolocation_model": "loaded",
         "architectural_matcher": "loaded",
         "enhanced_ocr": "loaded",
@@ -941,6 +1581,24 @@ def health_check():
         }
     }
 
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "code_version": CODE_VERSION,
+        "embedding_batcher": embedding_batcher.metrics(),
+        "inference_executor": inference_executor.metrics(),
+        "embedding_cache": embedding_cache.metrics(),
+        "near_duplicate_index": perceptual_hash_index.metrics(),
+        "request_coalescing": single_flight.metrics(),
+        "deferred_analysis": deferred_analysis_store.metrics(),
+        "responses": response_stats.metrics(),
+        "predict_stage_latency_ms": stage_latency.metrics(),
+        "stats_refresher": stats_refresher.metrics(),
+        "vector_store": index.metrics(),
+        "vector_writes": vector_write_buffer.metrics(),
+        "prior_guided_retrieval": cell_probe_retriever.metrics() if PRIOR_GUIDED_RETRIEVAL else None,
+    }
+
 @app.get("/debug/parser-check")
 def parser_check():
     sample_address = "123 Main Street"
@@ -955,75 +1613,50 @@ def parser_check():
 
 @app.get("/stats")
 def get_stats():
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv('POSTGRES_HOST'),
-            database=os.getenv('POSTGRES_DATABASE'),
-            user=os.getenv('POSTGRES_USER'),
-            password=os.getenv('POSTGRES_PASSWORD'),
-            sslmode='require'
-        )
-        cur = conn.cursor()
-        
-        cur.execute("SELECT COUNT(*) FROM location_recognitions")
-        total_recognitions = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM location_feedback WHERE \"wasCorrect\" = true")
-        verified_feedback = cur.fetchone()[0]
-        
-        cur.execute("SELECT COUNT(*) FROM \"NavisenseTraining\" WHERE verified = true")
-        navisense_training = cur.fetchone()[0]
-        
-        # Count verified feedback with correct locations (ready for training)
-        cur.execute('''
-            SELECT COUNT(*) FROM location_feedback lf
-            JOIN location_recognitions lr ON lf."recognitionId" = lr.id
-            WHERE lf."wasCorrect" = true AND lf."correctLat" IS NOT NULL 
-            AND lf."correctLng" IS NOT NULL AND lr."imageUrl" IS NOT NULL
-        ''')
-        feedback_ready = cur.fetchone()[0]
-        
-        cur.close()
-        conn.close()
-        
-        vectors_in_pinecone = index.describe_index_stats().total_vector_count
-        ready_for_training = navisense_training + feedback_ready
-        
-        return {
-            "total_recognitions": total_recognitions,
-            "verified_feedback": verified_feedback,
-            "vectors_in_pinecone": vectors_in_pinecone,
-            "ready_for_training": ready_for_training,
-            "navisense_training": navisense_training,
-            "feedback_ready": feedback_ready
-        }
-    except Exception as e:
-        return {
-            "total_recognitions": 0, 
-            "verified_feedback": 0, 
-            "vectors_in_pinecone": index.describe_index_stats().total_vector_count, 
-            "ready_for_training": 0,
-            "navisense_training": 0,
-            "feedback_ready": 0
-        }
+    vectors = stats_refresher.get("index_vectors")
+    training_records = stats_refresher.get("training_records")
+    counts = training_records["value"] or {
+        "total_recognitions": 0,
+        "verified_feedback": 0,
+        "navisense_training": 0,
+        "feedback_ready": 0,
+    }
+
+    return {
+        "total_recognitions": counts["total_recognitions"],
+        "verified_feedback": counts["verified_feedback"],
+        "vectors_in_pinecone": vectors["value"],
+        "ready_for_training": counts["navisense_training"] + counts["feedback_ready"],
+        "navisense_training": counts["navisense_training"],
+        "feedback_ready": counts["feedback_ready"],
+        "refreshed_at": {
+            "vectors_in_pinecone": vectors["refreshed_at"],
+            "training_records": training_records["refreshed_at"],
+        },
+        "stale": vectors["stale"] or training_records["stale"],
+    }
 
 @app.post("/sync-training")
-async def sync_training(limit: Optional[int] = None):
+def sync_training(limit: Optional[int] = None):
     try:
         records = fetch_combined_training_records(limit=limit)
+        writes = vector_write_buffer.scoped()
         synced = 0
         failed = 0
         failures = []
 
         for record in records:
             try:
-                _, image = load_image_from_s3(record["image_url"])
-                embedding = generate_embedding(image)
+                image_bytes = load_image_bytes_from_s3(record["image_url"])
+                embedding = embed_image_bytes(image_bytes)
+                vector_metadata = build_vector_metadata(record)
                 upsert_training_vector(
                     record["image_hash"],
                     embedding,
-                    build_vector_metadata(record)
+                    vector_metadata,
+                    writes,
                 )
+                perceptual_hash_index.add_image(record["image_hash"], image_bytes, vector_metadata)
                 synced += 1
             except Exception as e:
                 failed += 1
@@ -1033,11 +1666,18 @@ async def sync_training(limit: Optional[int] = None):
                     "error": str(e)
                 })
 
+        vector_writes = flush_vector_writes(writes)
+        synced -= len(vector_writes["failed_ids"])
+        failed += len(vector_writes["failed_ids"])
+        if synced:
+            perceptual_hash_index.save_index()
+
         return {
             "success": True,
             "records_considered": len(records),
             "synced": synced,
             "skipped": 0,
+            "vector_writes": vector_writes,
             "failed": failed,
             "failures": failures[:5],
             "message": f"Synced {synced} training vectors from {len(records)} canonical records"
@@ -1046,23 +1686,27 @@ async def sync_training(limit: Optional[int] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/sync-recognition-vectors")
-async def sync_recognition_vectors(limit: int = Query(default=200, ge=1, le=5000)):
+def sync_recognition_vectors(limit: int = Query(default=200, ge=1, le=5000)):
     try:
         records = fetch_recognition_backfill_records(limit=limit)
         before_count = index.describe_index_stats().total_vector_count
+        writes = vector_write_buffer.scoped()
         synced = 0
         failed = 0
         failures = []
 
         for record in records:
             try:
-                _, image = load_image_from_s3(record["image_url"])
-                embedding = generate_embedding(image)
+                image_bytes = load_image_bytes_from_s3(record["image_url"])
+                embedding = embed_image_bytes(image_bytes)
+                vector_metadata = build_vector_metadata(record)
                 upsert_training_vector(
                     record["image_hash"],
                     embedding,
-                    build_vector_metadata(record)
+                    vector_metadata,
+                    writes,
                 )
+                perceptual_hash_index.add_image(record["image_hash"], image_bytes, vector_metadata)
                 synced += 1
             except Exception as e:
                 failed += 1
@@ -1072,6 +1716,12 @@ async def sync_recognition_vectors(limit: int = Query(default=200, ge=1, le=5000
                     "error": str(e)
                 })
 
+        vector_writes = flush_vector_writes(writes)
+        synced -= len(vector_writes["failed_ids"])
+        failed += len(vector_writes["failed_ids"])
+        if synced:
+            perceptual_hash_index.save_index()
+
         after_count = index.describe_index_stats().total_vector_count
         methods_seen = sorted({
             str(record.get("originalMethod"))
@@ -1085,6 +1735,7 @@ async def sync_recognition_vectors(limit: int = Query(default=200, ge=1, le=5000
             "synced": synced,
             "failed": failed,
             "failures": failures[:10],
+            "vector_writes": vector_writes,
             "vector_count_before": before_count,
             "vector_count_after": after_count,
             "methods_seen": methods_seen,
@@ -1096,225 +1747,1006 @@ async def sync_recognition_vectors(limit: int = Query(default=200, ge=1, le=5000
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/predict")
-async def predict_location(
-    file: UploadFile = File(...),
-    ocr_text: Optional[str] = Form(None),
-    context_labels: Optional[str] = Form(None),
-    best_guess_labels: Optional[str] = Form(None),
-):
+@app.post("/cleanup-legacy-vectors")
+def cleanup_legacy_vectors():
+    """One-time removal of legacy ``fb_`` vectors superseded by a ``loc_`` vector for the same image.
+
+    The training path used to delete the legacy id on every upsert; orphaned legacy
+    vectors without a replacement are kept and reported.
+    """
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        context_clues = collect_multimodal_context_clues(
-            ocr_text=ocr_text,
-            context_labels=context_labels,
-            best_guess_labels=best_guess_labels,
+        legacy_ids = list(index.list_ids(prefix=LEGACY_FEEDBACK_ID_PREFIX))
+        replacement_ids = {
+            legacy_id: f"loc_{legacy_id[len(LEGACY_FEEDBACK_ID_PREFIX):]}"
+            for legacy_id in legacy_ids
+        }
+        existing_replacements = fetch_vectors_many(list(replacement_ids.values()))
+        superseded = [
+            legacy_id
+            for legacy_id, replacement_id in replacement_ids.items()
+            if replacement_id in existing_replacements
+        ]
+
+        writes = vector_write_buffer.scoped()
+        writes.delete(superseded)
+        vector_writes = flush_vector_writes(writes)
+        return {
+            "success": True,
+            "legacy_vectors_found": len(legacy_ids),
+            "deleted": vector_writes["deleted"],
+            "kept_without_replacement": len(legacy_ids) - len(superseded),
+            "failed_ids": vector_writes["failed_ids"][:10],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/sync-vector-mirror")
+def sync_vector_mirror():
+    """Copy the remote index into the local float16 mirror so retrieval can fetch ids and scores only.
+
+    Only the worker that serves this call is synced; the others keep backfilling misses from the
+    remote index until they restart and restore the synced snapshot.
+    """
+    if not hasattr(index, "sync_mirror"):
+        raise HTTPException(status_code=400, detail="Vector mirror is disabled (set NAVISENSE_VECTOR_MIRROR=true)")
+    try:
+        return {"success": True, **index.sync_mirror()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/backfill-geo-tags")
+def backfill_geo_tags(limit: Optional[int] = None):
+    """Add geohash and coarse-cell metadata to vectors written before they were tagged on upsert."""
+    try:
+        vector_ids = list(index.list_ids())
+        if limit:
+            vector_ids = vector_ids[:limit]
+        tagged = 0
+        already_tagged = 0
+        without_location = 0
+        failures = []
+
+        for offset in range(0, len(vector_ids), VECTOR_FETCH_CHUNK_SIZE):
+            vectors = index.fetch(ids=vector_ids[offset:offset + VECTOR_FETCH_CHUNK_SIZE]).vectors or {}
+            for vector_id, vector in vectors.items():
+                metadata = vector.metadata or {}
+                if metadata.get("latitude") is None or metadata.get("longitude") is None:
+                    without_location += 1
+                    continue
+                tags = geo_tags(float(metadata["latitude"]), float(metadata["longitude"]))
+                if all(metadata.get(field) == value for field, value in tags.items()):
+                    already_tagged += 1
+                    continue
+                try:
+                    index.update_metadata(vector_id, tags)
+                    tagged += 1
+                except Exception as e:
+                    failures.append({"vector_id": vector_id, "error": str(e)})
+
+        if tagged:
+            index.flush()
+        return {
+            "success": True,
+            "vectors_considered": len(vector_ids),
+            "tagged": tagged,
+            "already_tagged": already_tagged,
+            "without_location": without_location,
+            "failed": len(failures),
+            "failures": failures[:10],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def build_architectural_candidates(matches: List[Any]) -> List[Dict[str, Any]]:
+    return [{
+        'id': match.id,
+        'embedding': getattr(match, 'values', None),
+        'metadata': match.metadata,
+        'score': match.score
+    } for match in matches]
+
+def build_exact_match_ids(image_hash: str) -> List[str]:
+    return [f"loc_{image_hash[:16]}", f"fb_{image_hash[:16]}"]
+
+def find_exact_match(vectors: Optional[Dict[str, Any]], image_hash: str) -> Optional[Dict[str, Any]]:
+    if not vectors:
+        return None
+
+    for vector_id in build_exact_match_ids(image_hash):
+        if vector_id in vectors:
+            match = vectors[vector_id]
+            return {
+                "success": True,
+                "hasLocation": True,
+                "location": {
+                    "latitude": float(match.metadata["latitude"]),
+                    "longitude": float(match.metadata["longitude"]),
+                    "address": match.metadata.get("address"),
+                    "businessName": match.metadata.get("businessName")
+                },
+                "confidence": 1.0,
+                "method": "exact_match"
+            }
+    return None
+
+def find_near_duplicate_match(image_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Resolve re-encoded, resized or EXIF-stripped copies of known training photos without embedding."""
+    try:
+        match = perceptual_hash_index.lookup_image(image_bytes)
+    except Exception as error:
+        print(f"Near-duplicate lookup failed: {error}")
+        return None
+    if not match:
+        return None
+
+    metadata = match["metadata"]
+    return {
+        "success": True,
+        "hasLocation": True,
+        "location": {
+            "latitude": float(metadata["latitude"]),
+            "longitude": float(metadata["longitude"]),
+            "address": metadata.get("address"),
+            "businessName": metadata.get("businessName")
+        },
+        # Below exact byte matches (1.0), decreasing with perceptual distance
+        "confidence": round(0.98 - 0.01 * match["distance"], 4),
+        "method": "near_duplicate_match",
+        "near_duplicate": {
+            "image_hash": match["image_hash"],
+            "phash_distance": match["distance"],
+            "dhash_distance": match["dhash_distance"],
+        },
+    }
+
+def resolve_location_from_embedding(
+    embedding_np: np.ndarray,
+    query_matches: List[Any],
+    scene_analysis: Dict[str, Any],
+    geospatial_alignment: Optional[Dict[str, Any]],
+    arch_matches: Optional[List[Tuple[str, float]]] = None,
+    geolocation_estimate: Optional[Tuple[float, float, float]] = None,
+) -> Dict[str, Any]:
+    """Apply the /predict decision cascade to an embedding whose retrieval and alignment already ran.
+
+    ``arch_matches`` and ``geolocation_estimate`` may be precomputed by batch callers; otherwise
+    they are computed here on demand.
+    """
+    if query_matches:
+        # Enhanced matching with architectural features
+        if arch_matches is None:
+            arch_matches = architectural_matcher.match_building(
+                embedding_np,
+                build_architectural_candidates(query_matches),
+            )
+        multimodal_context = scene_analysis.get("multimodal_context", {}) if isinstance(scene_analysis, dict) else {}
+        multimodal_enabled = bool(
+            multimodal_context.get("enabled") and (multimodal_context.get("clue_count", 0) or 0) > 0
         )
-        
-        # Try exact hash match first
-        img_hash = hashlib.sha256(image_bytes).hexdigest()
-        exact_ids = [f"loc_{img_hash[:16]}", f"fb_{img_hash[:16]}"]
-        exact_match = index.fetch(ids=exact_ids)
-        
-        if exact_match.vectors:
-            for vector_id in exact_ids:
-                if vector_id in exact_match.vectors:
-                    match = exact_match.vectors[vector_id]
+        geospatial_alignment_confidence = (
+            float(geospatial_alignment["confidence"])
+            if geospatial_alignment and geospatial_alignment.get("confidence") is not None
+            else 0.0
+        )
+
+        if arch_matches:
+            unique_arch_matches, collapsed_duplicates = dedupe_architectural_candidates(
+                arch_matches,
+                query_matches,
+            )
+            unique_candidate_count = len(unique_arch_matches[:5])
+            top_arch_score = unique_arch_matches[0][1] if unique_arch_matches else 0.0
+            architectural_support = (
+                unique_candidate_count >= 2
+                or multimodal_enabled
+                or geospatial_alignment_confidence >= max(navisense_v3.score_gate - 0.06, 0.72)
+            )
+            architectural_gate = 0.88 if architectural_support else 0.93
+
+            if unique_arch_matches and top_arch_score >= architectural_gate and architectural_support:
+                best_match = unique_arch_matches[0][0]
+
+                # Weight-averaged location from the strongest unique architectural matches
+                top_unique_arch = unique_arch_matches[: min(3, len(unique_arch_matches))]
+                total_weight = sum(score for _, score in top_unique_arch)
+
+                if total_weight > 0:
+                    avg_lat = sum(float(match.metadata["latitude"]) * score for match, score in top_unique_arch) / total_weight
+                    avg_lng = sum(float(match.metadata["longitude"]) * score for match, score in top_unique_arch) / total_weight
+
                     return {
                         "success": True,
                         "hasLocation": True,
                         "location": {
-                            "latitude": float(match.metadata["latitude"]),
-                            "longitude": float(match.metadata["longitude"]),
-                            "address": match.metadata.get("address"),
-                            "businessName": match.metadata.get("businessName")
+                            "latitude": avg_lat,
+                            "longitude": avg_lng,
+                            "address": best_match.metadata.get("address"),
+                            "businessName": best_match.metadata.get("businessName")
                         },
-                        "confidence": 1.0,
-                        "method": "exact_match"
+                        "confidence": min(float(top_arch_score), 0.94),  # Cap to keep approximate retrieval clearly below exact matches
+                        "method": "architectural_matching",
+                        "analysis": scene_analysis,
+                        "top_geospatial_matches": geospatial_alignment["top_matches"] if geospatial_alignment else [],
+                        "geospatial_prior": geospatial_alignment.get("geospatial_prior") if geospatial_alignment else None,
+                        "prior_diagnostics": geospatial_alignment.get("prior_diagnostics") if geospatial_alignment else None,
+                        "candidate_diversity": {
+                            "unique_locations": unique_candidate_count,
+                            "duplicate_candidates_collapsed": collapsed_duplicates,
+                            "geospatial_alignment_confidence": round(geospatial_alignment_confidence, 4),
+                            "multimodal_enabled": multimodal_enabled,
+                        }
                     }
-        
-        # Generate embedding for similarity search, geospatial alignment, and scene analysis
-        embedding = generate_embedding(image)
-        embedding_np = np.array(embedding)
-        scene_analysis = build_scene_analysis(
-            embedding_np,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
-        )
-        geospatial_alignment = navisense_v3.predict(
-            embedding_np,
-            top_k=5,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
-        )
 
-        # Try similarity search with architectural matching
-        results = index.query(
-            vector=embedding,
-            top_k=10,
-            include_metadata=True,
-            include_values=True
-        )
-        
-        if results.matches:
-            # Use architectural matcher for better building matching
-            candidates = [{
-                'id': match.id,
-                'embedding': getattr(match, 'values', None),
-                'metadata': match.metadata,
-                'score': match.score
-            } for match in results.matches]
-            
-            # Enhanced matching with architectural features
-            arch_matches = architectural_matcher.match_building(embedding_np, candidates)
-            multimodal_context = scene_analysis.get("multimodal_context", {}) if isinstance(scene_analysis, dict) else {}
-            multimodal_enabled = bool(
-                multimodal_context.get("enabled") and (multimodal_context.get("clue_count", 0) or 0) > 0
-            )
-            geospatial_alignment_confidence = (
-                float(geospatial_alignment["confidence"])
-                if geospatial_alignment and geospatial_alignment.get("confidence") is not None
-                else 0.0
-            )
-             
-            if arch_matches:
-                unique_arch_matches, collapsed_duplicates = dedupe_architectural_candidates(
-                    arch_matches,
-                    results.matches,
-                )
-                unique_candidate_count = len(unique_arch_matches[:5])
-                top_arch_score = unique_arch_matches[0][1] if unique_arch_matches else 0.0
-                architectural_support = (
-                    unique_candidate_count >= 2
-                    or multimodal_enabled
-                    or geospatial_alignment_confidence >= max(navisense_v3.score_gate - 0.06, 0.72)
-                )
-                architectural_gate = 0.88 if architectural_support else 0.93
-
-                if unique_arch_matches and top_arch_score >= architectural_gate and architectural_support:
-                    best_match = unique_arch_matches[0][0]
-
-                    # Weight-averaged location from the strongest unique architectural matches
-                    top_unique_arch = unique_arch_matches[: min(3, len(unique_arch_matches))]
-                    total_weight = sum(score for _, score in top_unique_arch)
-
-                    if total_weight > 0:
-                        avg_lat = sum(float(match.metadata["latitude"]) * score for match, score in top_unique_arch) / total_weight
-                        avg_lng = sum(float(match.metadata["longitude"]) * score for match, score in top_unique_arch) / total_weight
-
-                        return {
-                            "success": True,
-                            "hasLocation": True,
-                            "location": {
-                                "latitude": avg_lat,
-                                "longitude": avg_lng,
-                                "address": best_match.metadata.get("address"),
-                                "businessName": best_match.metadata.get("businessName")
-                            },
-                            "confidence": min(float(top_arch_score), 0.94),  # Cap to keep approximate retrieval clearly below exact matches
-                            "method": "architectural_matching",
-                            "analysis": scene_analysis,
-                            "top_geospatial_matches": geospatial_alignment["top_matches"] if geospatial_alignment else [],
-                            "geospatial_prior": geospatial_alignment["geospatial_prior"] if geospatial_alignment else None,
-                            "prior_diagnostics": geospatial_alignment["prior_diagnostics"] if geospatial_alignment else None,
-                            "candidate_diversity": {
-                                "unique_locations": unique_candidate_count,
-                                "duplicate_candidates_collapsed": collapsed_duplicates,
-                                "geospatial_alignment_confidence": round(geospatial_alignment_confidence, 4),
-                                "multimodal_enabled": multimodal_enabled,
-                            }
-                        }
+    if geospatial_alignment and geospatial_alignment["confidence"] >= navisense_v3.score_gate:
+        return {
+            "success": True,
+            "hasLocation": True,
+            "location": geospatial_alignment["location"],
+            "confidence": geospatial_alignment["confidence"],
+            "score_gate": geospatial_alignment["score_gate"],
+            "method": "geospatial_alignment",
+            "analysis": scene_analysis,
+            "top_geospatial_matches": geospatial_alignment["top_matches"],
+            "geospatial_prior": geospatial_alignment.get("geospatial_prior"),
+            "prior_diagnostics": geospatial_alignment.get("prior_diagnostics"),
+        }
 
-        if geospatial_alignment and geospatial_alignment["confidence"] >= navisense_v3.score_gate:
-            return {
-                "success": True,
-                "hasLocation": True,
-                "location": geospatial_alignment["location"],
-                "confidence": geospatial_alignment["confidence"],
-                "score_gate": geospatial_alignment["score_gate"],
-                "method": "geospatial_alignment",
-                "analysis": scene_analysis,
-                "top_geospatial_matches": geospatial_alignment["top_matches"],
-                "geospatial_prior": geospatial_alignment["geospatial_prior"],
-                "prior_diagnostics": geospatial_alignment["prior_diagnostics"],
-            }
+    # If no strong retrieval or alignment match, try geolocation prediction for unknown buildings
+    if not query_matches or query_matches[0].score < 0.5:
+        pred_lat, pred_lng, geo_confidence = geolocation_estimate or geolocation_predictor.predict(embedding_np)
 
-        # If no strong retrieval or alignment match, try geolocation prediction for unknown buildings
-        if not results.matches or results.matches[0].score < 0.5:
-            pred_lat, pred_lng, geo_confidence = geolocation_predictor.predict(embedding_np)
-            
-            # Validate predicted coordinates are reasonable
-            if (
-                -90 <= pred_lat <= 90
-                and -180 <= pred_lng <= 180
-                and geo_confidence >= geolocation_predictor.confidence_gate
-            ):
-                return {
-                    "success": True,
-                    "hasLocation": True,
-                    "location": {
-                        "latitude": pred_lat,
-                        "longitude": pred_lng,
-                        "address": "Predicted location",
-                        "businessName": "Unknown building"
-                    },
-                    "confidence": geo_confidence,
-                    "confidence_gate": geolocation_predictor.confidence_gate,
-                    "method": "geolocation_prediction",
-                    "analysis": scene_analysis,
-                    "top_geospatial_matches": geospatial_alignment["top_matches"] if geospatial_alignment else [],
-                    "geospatial_prior": geospatial_alignment["geospatial_prior"] if geospatial_alignment else None,
-                    "prior_diagnostics": geospatial_alignment["prior_diagnostics"] if geospatial_alignment else None,
-                }
-        
-        # Fallback to basic similarity if available
-        if results.matches and results.matches[0].score >= 0.5:
-            top_match = results.matches[0]
-            total_weight = sum(m.score for m in results.matches[:3])
-            avg_lat = sum(float(m.metadata["latitude"]) * m.score for m in results.matches[:3]) / total_weight
-            avg_lng = sum(float(m.metadata["longitude"]) * m.score for m in results.matches[:3]) / total_weight
-            
+        # Validate predicted coordinates are reasonable
+        if (
+            -90 <= pred_lat <= 90
+            and -180 <= pred_lng <= 180
+            and geo_confidence >= geolocation_predictor.confidence_gate
+        ):
             return {
                 "success": True,
                 "hasLocation": True,
                 "location": {
-                    "latitude": avg_lat,
-                    "longitude": avg_lng,
-                    "address": top_match.metadata.get("address"),
-                    "businessName": top_match.metadata.get("businessName")
+                    "latitude": pred_lat,
+                    "longitude": pred_lng,
+                    "address": "Predicted location",
+                    "businessName": "Unknown building"
                 },
-                "confidence": float(top_match.score),
-                "method": "similarity",
+                "confidence": geo_confidence,
+                "confidence_gate": geolocation_predictor.confidence_gate,
+                "method": "geolocation_prediction",
                 "analysis": scene_analysis,
                 "top_geospatial_matches": geospatial_alignment["top_matches"] if geospatial_alignment else [],
-                "geospatial_prior": geospatial_alignment["geospatial_prior"] if geospatial_alignment else None,
-                "prior_diagnostics": geospatial_alignment["prior_diagnostics"] if geospatial_alignment else None,
+                "geospatial_prior": geospatial_alignment.get("geospatial_prior") if geospatial_alignment else None,
+                "prior_diagnostics": geospatial_alignment.get("prior_diagnostics") if geospatial_alignment else None,
             }
-        
+
+    # Fallback to basic similarity if available
+    if query_matches and query_matches[0].score >= 0.5:
+        top_match = query_matches[0]
+        total_weight = sum(m.score for m in query_matches[:3])
+        avg_lat = sum(float(m.metadata["latitude"]) * m.score for m in query_matches[:3]) / total_weight
+        avg_lng = sum(float(m.metadata["longitude"]) * m.score for m in query_matches[:3]) / total_weight
+
         return {
-            "success": False,
-            "hasLocation": False,
-            "message": "No similar locations found",
-            "confidence": 0.0,
-            "analysis": scene_analysis
+            "success": True,
+            "hasLocation": True,
+            "location": {
+                "latitude": avg_lat,
+                "longitude": avg_lng,
+                "address": top_match.metadata.get("address"),
+                "businessName": top_match.metadata.get("businessName")
+            },
+            "confidence": float(top_match.score),
+            "method": "similarity",
+            "analysis": scene_analysis,
+            "top_geospatial_matches": geospatial_alignment["top_matches"] if geospatial_alignment else [],
+            "geospatial_prior": geospatial_alignment.get("geospatial_prior") if geospatial_alignment else None,
+            "prior_diagnostics": geospatial_alignment.get("prior_diagnostics") if geospatial_alignment else None,
+        }
+
+    return {
+        "success": False,
+        "hasLocation": False,
+        "message": "No similar locations found",
+        "confidence": 0.0,
+        "analysis": scene_analysis
+    }
+
+
+def attach_latency_report(response: Dict[str, Any], budget: LatencyBudget) -> Dict[str, Any]:
+    if budget.deadline_ms is not None:
+        response["latency_budget"] = budget.report()
+    return response
+
+def predict_location_from_embedding(
+    embedding: List[float],
+    ocr_text: Optional[str],
+    context_clues: List[str],
+    analysis_mode: str,
+    verbosity: str,
+    budget: LatencyBudget,
+    geo_scope: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run alignment, retrieval, architectural matching and the decision cascade for one embedding."""
+    embedding_np = np.array(embedding)
+    # One query context so scene analysis and alignment share the fused query and prior heads
+    query_context = navisense_v3.create_query_context(
+        embedding_np,
+        ocr_text=ocr_text,
+        context_clues=context_clues,
+    )
+    with budget.stage("v3_alignment"):
+        navisense_v3.prime_query_contexts([query_context])
+
+    # Required stages run first; optional ones only when the remaining budget covers their p95.
+    include_prior_diagnostics = verbosity != "minimal" and budget.allows(
+        "prior_diagnostics",
+        reserve_for=("v3_ranking", "pinecone_query"),
+    )
+    if include_prior_diagnostics:
+        with budget.stage("prior_diagnostics"):
+            navisense_v3.predict_geospatial_priors(embedding_np, top_k=5, context=query_context)
+    with budget.stage("v3_ranking"):
+        geospatial_alignment = navisense_v3.predict(
+            embedding_np,
+            top_k=5,
+            context=query_context,
+            verbosity=verbosity,
+            include_prior_diagnostics=include_prior_diagnostics,
+        )
+
+    # Candidate vectors are only needed for architectural re-ranking
+    include_architectural = budget.allows("architectural_matching", reserve_for=("pinecone_query",))
+    geo_filter = geo_scope["filter"] if geo_scope else None
+    geo_fallback = False
+    cell_probe: Optional[Dict[str, Any]] = None
+    with budget.stage("pinecone_query"):
+        if PRIOR_GUIDED_RETRIEVAL and not geo_filter:
+            # The client's own location hint is narrower than any prior cell, so it takes precedence.
+            results, cell_probe = cell_probe_retriever.query(
+                index,
+                embedding,
+                navisense_v3.predict_coarse_cell_probabilities(embedding_np, context=query_context),
+                top_k=10,
+                include_metadata=True,
+                include_values=include_architectural,
+            )
+        else:
+            results = index.query(
+                vector=embedding,
+                top_k=10,
+                include_metadata=True,
+                include_values=include_architectural,
+                filter=geo_filter,
+            )
+        if geo_filter and not results.matches:
+            # Nothing indexed near the hint (or untagged vectors): fall back to the whole index.
+            geo_fallback = True
+            results = index.query(
+                vector=embedding,
+                top_k=10,
+                include_metadata=True,
+                include_values=include_architectural
+            )
+
+    arch_matches: List[Tuple[Any, float]] = []
+    if include_architectural and results.matches:
+        with budget.stage("architectural_matching"):
+            arch_matches = architectural_matcher.match_building(
+                embedding_np,
+                build_architectural_candidates(results.matches),
+            )
+
+    # The cascade only reads the multimodal clue summary; the zero-shot groups are added after
+    # the location is decided.
+    with budget.stage("resolve"):
+        response = resolve_location_from_embedding(
+            embedding_np,
+            results.matches,
+            {"multimodal_context": navisense_v3.describe_multimodal_context(query_context)},
+            geospatial_alignment,
+            arch_matches=arch_matches,
+        )
+
+    if geo_scope and verbosity != "minimal":
+        response["geo_filter"] = {
+            "radius_km": geo_scope["radius_km"],
+            "geohash_precision": geo_scope["precision"],
+            "cells": geo_scope["cells"],
+            "applied": bool(geo_filter) and not geo_fallback,
+            "fallback": geo_fallback,
         }
+
+    if cell_probe and verbosity != "minimal":
+        response["prior_cell_probe"] = cell_probe
+
+    return attach_prediction_analysis(response, embedding_np, query_context, analysis_mode, verbosity, budget)
+
+def attach_prediction_analysis(
+    response: Dict[str, Any],
+    embedding_np: np.ndarray,
+    query_context: QueryContext,
+    analysis_mode: str,
+    verbosity: str,
+    budget: LatencyBudget,
+) -> Dict[str, Any]:
+    """Trim a resolved prediction to ``verbosity`` and add its scene analysis inline or as a deferred token."""
+    if verbosity == "minimal":
+        for key in ("analysis", "geospatial_prior", "prior_diagnostics", "candidate_diversity"):
+            response.pop(key, None)
+    elif analysis_mode == "inline":
+        if budget.allows("scene_analysis"):
+            with budget.stage("scene_analysis"):
+                response["analysis"] = build_scene_analysis(
+                    embedding_np,
+                    context=query_context,
+                    verbosity=verbosity,
+                )
+        else:
+            response["analysis"] = None
+    if analysis_mode == "deferred":
+        token = defer_scene_analysis(embedding_np, query_context, verbosity)
+        response["analysis"] = None
+        response["analysis_token"] = token
+        response["analysis_url"] = f"/analysis/{token}"
+    return response
+
+def run_location_prediction(
+    image_bytes: bytes,
+    ocr_text: Optional[str] = None,
+    context_labels: Optional[str] = None,
+    best_guess_labels: Optional[str] = None,
+    image_hash: Optional[str] = None,
+    analysis_mode: str = "inline",
+    verbosity: str = "debug",
+    budget: Optional[LatencyBudget] = None,
+    geo_scope: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    budget = budget or LatencyBudget(stage_latency)
+    try:
+        context_clues = collect_multimodal_context_clues(
+            ocr_text=ocr_text,
+            context_labels=context_labels,
+            best_guess_labels=best_guess_labels,
+        )
+        
+        # Try exact hash match first
+        img_hash = image_hash or hash_image_bytes(image_bytes)
+        with budget.stage("exact_match"):
+            exact_match = index.fetch(ids=build_exact_match_ids(img_hash))
+            exact_response = find_exact_match(exact_match.vectors, img_hash)
+        if exact_response:
+            return attach_latency_report(exact_response, budget)
+
+        with budget.stage("near_duplicate"):
+            near_duplicate_response = find_near_duplicate_match(image_bytes)
+        if near_duplicate_response:
+            return attach_latency_report(near_duplicate_response, budget)
+        
+        # Generate embedding for similarity search, geospatial alignment, and scene analysis
+        with budget.stage("embedding"):
+            embedding = embed_image_bytes(image_bytes, image_hash=img_hash)
+        response = predict_location_from_embedding(
+            embedding,
+            ocr_text,
+            context_clues,
+            analysis_mode,
+            verbosity,
+            budget,
+            geo_scope=geo_scope,
+        )
+        return attach_latency_report(response, budget)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/scene-analysis")
-async def scene_analysis_route(
+@app.post("/predict")
+async def predict_location(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     ocr_text: Optional[str] = Form(None),
     context_labels: Optional[str] = Form(None),
     best_guess_labels: Optional[str] = Form(None),
+    analysis: Optional[str] = Form(None),
+    verbosity: Optional[str] = Form(None),
+    deadline_ms: Optional[float] = Form(None),
+    approx_lat: Optional[float] = Form(None),
+    approx_lng: Optional[float] = Form(None),
+    radius_km: Optional[float] = Form(None),
 ):
-    """Zero-shot scene understanding plus geospatial alignment hints"""
+    # Started before the upload is read and queued, so both count against the deadline
+    budget = LatencyBudget(stage_latency, resolve_predict_deadline(deadline_ms))
+    analysis_mode = resolve_predict_analysis_mode(analysis)
+    verbosity = resolve_response_verbosity(verbosity)
+    geo_scope = resolve_geo_scope(approx_lat, approx_lng, radius_km)
+    image_bytes = await file.read()
+    image_hash = hash_image_bytes(image_bytes)
+    result = await run_coalesced_inference(
+        f"predict-{analysis_mode}-{verbosity}",
+        image_hash,
+        (ocr_text, context_labels, best_guess_labels, str(budget.deadline_ms), build_geo_scope_key(geo_scope)),
+        run_location_prediction,
+        image_bytes,
+        ocr_text=ocr_text,
+        context_labels=context_labels,
+        best_guess_labels=best_guess_labels,
+        image_hash=image_hash,
+        analysis_mode=analysis_mode,
+        verbosity=verbosity,
+        budget=budget,
+        geo_scope=geo_scope,
+    )
+    if result.get("analysis_token") and DEFERRED_ANALYSIS_PRECOMPUTE:
+        # Runs after the response is sent, so the location is not held back by scene analysis.
+        background_tasks.add_task(precompute_deferred_analysis, result["analysis_token"])
+    return json_response(result, f"predict:{verbosity}")
+
+# Each serving process runs one synthetic request through /predict before it accepts traffic,
+# so the first real request does not pay for lazy backend, thread-pool and prompt initialization.
+# A failed warmup (often a transient S3 or vector-store error) is retried in the background with
+# backoff; after WARMUP_MAX_ATTEMPTS failures the worker reports ready but "degraded" instead of
+# staying out of rotation until it restarts.
+WARMUP_ENABLED = env_flag("NAVISENSE_WARMUP", True)
+WARMUP_MAX_ATTEMPTS = max(1, int(os.getenv("NAVISENSE_WARMUP_MAX_ATTEMPTS", "5")))
+WARMUP_RETRY_SECONDS = max(0.1, float(os.getenv("NAVISENSE_WARMUP_RETRY_SECONDS", "5")))
+WARMUP_RETRY_MAX_SECONDS = 300.0
+warmup_status: Dict[str, Any] = {
+    "enabled": WARMUP_ENABLED,
+    "status": "pending" if WARMUP_ENABLED else "skipped",
+    "attempts": 0,
+}
+
+def run_warmup_attempt() -> bool:
+    started_at = time.perf_counter()
+    warmup_status["attempts"] += 1
+    try:
+        # A private tracker keeps the cold-start timings out of the deadline p95 estimates.
+        response = run_location_prediction(
+            build_parity_probe_image(width=640, height=480),
+            budget=LatencyBudget(StageLatencyTracker()),
+        )
+        warmup_status.update({"status": "ok", "method": response.get("method"), "error": None})
+        succeeded = True
+    except Exception as error:
+        failed_status = "degraded" if warmup_status["attempts"] >= WARMUP_MAX_ATTEMPTS else "retrying"
+        warmup_status.update({"status": failed_status, "error": str(getattr(error, "detail", error))})
+        succeeded = False
+    warmup_status["duration_ms"] = round((time.perf_counter() - started_at) * 1000.0, 1)
+    startup_phases_ms.setdefault("warmup", warmup_status["duration_ms"])
+    print(f"Prediction warmup: {warmup_status}")
+    return succeeded
+
+def retry_warmup_forever() -> None:
+    delay = WARMUP_RETRY_SECONDS
+    while True:
+        time.sleep(delay)
+        if run_warmup_attempt():
+            return
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+@app.on_event("startup")
+def warm_up_prediction_path():
+    if warmup_status["status"] != "pending":
+        return
+    if not run_warmup_attempt():
+        threading.Thread(target=retry_warmup_forever, name="navisense-warmup-retry", daemon=True).start()
+
+@app.on_event("shutdown")
+def flush_pending_vector_writes():
+    if vector_write_buffer.pending():
+        # Includes training runs still in flight: their scoped buffers are registered with the shared one.
+        report = vector_write_buffer.flush_all()
+        print(f"Flushing pending vector writes on shutdown: {report}")
+    index.flush()
+
+@app.get("/analysis/{token}")
+async def get_deferred_analysis(token: str):
+    """Scene analysis for a /predict call made with analysis=deferred"""
+    result = await load_deferred_analysis(token)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Analysis token is unknown or has expired")
+    return json_response(result, "analysis")
+
+def normalize_clue_option(field: str, value: Any) -> Optional[str]:
+    """JSON clients may send clue fields as lists; fold them into the form-field string format."""
+    if isinstance(value, list):
+        return "\n".join(str(part) for part in value) if field == "ocr_text" else json.dumps(value)
+    return value
+
+EMBEDDING_PAYLOAD_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+def decode_embedding_payload(raw: bytes, dtype: str, model_name: Optional[str]) -> List[float]:
+    """Validate a client-computed little-endian embedding against the served backbone."""
+    if not model_name:
+        raise HTTPException(status_code=400, detail="model is required and must name the backbone that produced the embedding")
+    if model_name != BACKBONE_MODEL_NAME:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Embedding was produced by '{model_name}' but this service runs '{BACKBONE_MODEL_NAME}'",
+        )
+    if dtype not in EMBEDDING_PAYLOAD_DTYPES:
+        raise HTTPException(status_code=400, detail=f"dtype must be one of {', '.join(EMBEDDING_PAYLOAD_DTYPES)}")
+
+    item_size = EMBEDDING_PAYLOAD_DTYPES[dtype].itemsize
+    if len(raw) != EMBEDDING_DIM * item_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Expected {EMBEDDING_DIM} {dtype} values ({EMBEDDING_DIM * item_size} bytes), got {len(raw)} bytes",
+        )
+    embedding = np.frombuffer(raw, dtype=EMBEDDING_PAYLOAD_DTYPES[dtype]).astype(np.float32)
+    if not np.all(np.isfinite(embedding)) or not np.any(embedding):
+        raise HTTPException(status_code=400, detail="Embedding must be finite and non-zero")
+    return embedding.tolist()
+
+def run_embedding_location_prediction(
+    embedding: List[float],
+    ocr_text: Optional[str] = None,
+    context_labels: Optional[str] = None,
+    best_guess_labels: Optional[str] = None,
+    analysis_mode: str = "inline",
+    verbosity: str = "debug",
+    budget: Optional[LatencyBudget] = None,
+    geo_scope: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    budget = budget or LatencyBudget(stage_latency)
+    try:
+        context_clues = collect_multimodal_context_clues(
+            ocr_text=ocr_text,
+            context_labels=context_labels,
+            best_guess_labels=best_guess_labels,
+        )
+        response = predict_location_from_embedding(
+            embedding,
+            ocr_text,
+            context_clues,
+            analysis_mode,
+            verbosity,
+            budget,
+            geo_scope=geo_scope,
+        )
+        return attach_latency_report(response, budget)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict-embedding")
+async def predict_location_from_embedding_route(request: Request, background_tasks: BackgroundTasks):
+    """Predict a location from a client-computed backbone embedding instead of an image upload.
+
+    Send either a raw little-endian body (``application/octet-stream``) with options as query
+    parameters, or JSON with ``embedding_b64`` plus the same option fields. ``model`` must match
+    the served backbone and ``dtype`` is ``float32`` (default) or ``float16``. Exact-hash and
+    near-duplicate matching need image bytes and are not available here.
+    """
+    started_at = time.perf_counter()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        try:
+            options = await request.json()
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"Body must be valid JSON: {error}")
+        if not isinstance(options, dict) or not isinstance(options.get("embedding_b64"), str):
+            raise HTTPException(status_code=400, detail="JSON body must include an embedding_b64 string")
+        try:
+            raw = base64.b64decode(options["embedding_b64"], validate=True)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"embedding_b64 is not valid base64: {error}")
+    else:
+        options = dict(request.query_params)
+        raw = await request.body()
+
+    numeric_options: Dict[str, Optional[float]] = {}
+    for field in ("deadline_ms", "approx_lat", "approx_lng", "radius_km"):
+        value = options.get(field)
+        try:
+            numeric_options[field] = float(value) if value not in (None, "") else None
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"{field} must be a number")
+    budget = LatencyBudget(stage_latency, resolve_predict_deadline(numeric_options["deadline_ms"]), started_at=started_at)
+    geo_scope = resolve_geo_scope(
+        numeric_options["approx_lat"],
+        numeric_options["approx_lng"],
+        numeric_options["radius_km"],
+    )
+    analysis_mode = resolve_predict_analysis_mode(options.get("analysis"))
+    verbosity = resolve_response_verbosity(options.get("verbosity"))
+    embedding = decode_embedding_payload(
+        raw,
+        str(options.get("dtype") or "float32").strip().lower(),
+        options.get("model"),
+    )
+    ocr_text = normalize_clue_option("ocr_text", options.get("ocr_text"))
+    context_labels = normalize_clue_option("context_labels", options.get("context_labels"))
+    best_guess_labels = normalize_clue_option("best_guess_labels", options.get("best_guess_labels"))
+
+    result = await run_coalesced_inference(
+        f"predict-embedding-{analysis_mode}-{verbosity}",
+        hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest(),
+        (ocr_text, context_labels, best_guess_labels, str(budget.deadline_ms), build_geo_scope_key(geo_scope)),
+        run_embedding_location_prediction,
+        embedding,
+        ocr_text=ocr_text,
+        context_labels=context_labels,
+        best_guess_labels=best_guess_labels,
+        analysis_mode=analysis_mode,
+        verbosity=verbosity,
+        budget=budget,
+        geo_scope=geo_scope,
+    )
+    if result.get("analysis_token") and DEFERRED_ANALYSIS_PRECOMPUTE:
+        background_tasks.add_task(precompute_deferred_analysis, result["analysis_token"])
+    return json_response(result, f"predict-embedding:{verbosity}")
+
+PREDICT_BATCH_MAX_ITEMS = max(1, int(os.getenv("NAVISENSE_PREDICT_BATCH_MAX_ITEMS", "128")))
+PREDICT_BATCH_MAX_IMAGE_BYTES = max(1, int(os.getenv("NAVISENSE_PREDICT_BATCH_MAX_IMAGE_BYTES", str(20 * 1024 * 1024))))
+PREDICT_BATCH_MAX_ARCHIVE_BYTES = max(
+    1,
+    int(os.getenv("NAVISENSE_PREDICT_BATCH_MAX_ARCHIVE_BYTES", str(256 * 1024 * 1024))),
+)
+PREDICT_BATCH_CONCURRENCY = max(1, int(os.getenv("NAVISENSE_PREDICT_BATCH_CONCURRENCY", "8")))
+VECTOR_FETCH_CHUNK_SIZE = 100
+
+def fetch_vectors_many(vector_ids: List[str]) -> Dict[str, Any]:
+    vectors: Dict[str, Any] = {}
+    for offset in range(0, len(vector_ids), VECTOR_FETCH_CHUNK_SIZE):
+        response = index.fetch(ids=vector_ids[offset:offset + VECTOR_FETCH_CHUNK_SIZE])
+        vectors.update(response.vectors or {})
+    return vectors
+
+def query_vectors_many(embeddings: List[List[float]], top_k: int = 10) -> List[Any]:
+    """Run similarity queries concurrently; each slot holds the matches or the raised exception."""
+    def run_query(embedding: List[float]):
+        try:
+            return index.query(
+                vector=embedding,
+                top_k=top_k,
+                include_metadata=True,
+                include_values=True
+            ).matches
+        except Exception as error:
+            return error
+
+    if not embeddings:
+        return []
+    with ThreadPoolExecutor(max_workers=min(PREDICT_BATCH_CONCURRENCY, len(embeddings))) as pool:
+        return list(pool.map(run_query, embeddings))
+
+def build_batch_item_error(error: Any) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "hasLocation": False,
+        "error": str(error),
+    }
+
+def parse_batch_item_options(raw_items: Optional[str], filenames: List[str]) -> List[Dict[str, Any]]:
+    """Accept per-item options as a JSON list in input order or a JSON object keyed by filename."""
+    if not raw_items:
+        return [{} for _ in filenames]
+
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        embedding = generate_embedding(image)
+        parsed = json.loads(raw_items)
+    except json.JSONDecodeError as error:
+        raise HTTPException(status_code=400, detail=f"items must be valid JSON: {error}")
+
+    if isinstance(parsed, list):
+        if len(parsed) > len(filenames):
+            raise HTTPException(status_code=400, detail="items has more entries than uploaded images")
+        options = [entry if isinstance(entry, dict) else {} for entry in parsed]
+        return options + [{} for _ in range(len(filenames) - len(options))]
+
+    if isinstance(parsed, dict):
+        return [parsed.get(filename) if isinstance(parsed.get(filename), dict) else {} for filename in filenames]
+
+    raise HTTPException(status_code=400, detail="items must be a JSON list or object")
+
+def run_batch_location_prediction(
+    items: List[Dict[str, Any]],
+    analysis_mode: str = "inline",
+    verbosity: str = "debug",
+) -> Dict[str, Any]:
+    """Run the /predict cascade for many images with batched fetch, embedding, alignment and matching.
+
+    ``verbosity`` and ``analysis_mode`` behave as on /predict: ``minimal`` skips scene analysis,
+    the most expensive per-item stage, and ``deferred`` returns a token per item instead.
+    """
+    try:
+        started_at = time.perf_counter()
+        stages_ms: Dict[str, float] = {}
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        def finish_stage(name: str, stage_started_at: float) -> float:
+            stages_ms[name] = round((time.perf_counter() - stage_started_at) * 1000.0, 3)
+            return time.perf_counter()
+
+        stage_started_at = time.perf_counter()
+        image_hashes: Dict[int, str] = {}
+        for position, item in enumerate(items):
+            if item.get("error"):
+                results[position] = build_batch_item_error(item["error"])
+            else:
+                image_hashes[position] = hash_image_bytes(item["image_bytes"])
+
+        exact_vectors = fetch_vectors_many(
+            [vector_id for image_hash in image_hashes.values() for vector_id in build_exact_match_ids(image_hash)]
+        )
+        pending = []
+        for position, image_hash in image_hashes.items():
+            exact_response = find_exact_match(exact_vectors, image_hash)
+            if not exact_response:
+                exact_response = find_near_duplicate_match(items[position]["image_bytes"])
+            if exact_response:
+                results[position] = exact_response
+            else:
+                pending.append(position)
+        stage_started_at = finish_stage("exact_match", stage_started_at)
+
+        embeddings = embed_image_bytes_many(
+            [items[position]["image_bytes"] for position in pending],
+            [image_hashes[position] for position in pending],
+            concurrency=PREDICT_BATCH_CONCURRENCY,
+        )
+        embedded = []
+        for position, embedding in zip(pending, embeddings):
+            if isinstance(embedding, Exception):
+                results[position] = build_batch_item_error(f"Failed to embed image: {embedding}")
+            else:
+                embedded.append((position, embedding))
+        stage_started_at = finish_stage("embedding", stage_started_at)
+
+        query_contexts = []
+        for position, embedding in embedded:
+            item = items[position]
+            query_contexts.append(
+                navisense_v3.create_query_context(
+                    np.array(embedding),
+                    ocr_text=item.get("ocr_text"),
+                    context_clues=collect_multimodal_context_clues(
+                        ocr_text=item.get("ocr_text"),
+                        context_labels=item.get("context_labels"),
+                        best_guess_labels=item.get("best_guess_labels"),
+                    ),
+                )
+            )
+        geospatial_alignments = navisense_v3.predict_batch(query_contexts, top_k=5, verbosity=verbosity)
+        stage_started_at = finish_stage("geospatial_alignment", stage_started_at)
+
+        query_matches = query_vectors_many([embedding for _, embedding in embedded])
+        stage_started_at = finish_stage("vector_query", stage_started_at)
+
+        embedding_stack = [query_context.image_embedding for query_context in query_contexts]
+        geolocation_estimates = geolocation_predictor.predict_batch(np.stack(embedding_stack)) if embedding_stack else []
+        architectural_matches = architectural_matcher.match_building_batch(
+            embedding_stack,
+            [
+                build_architectural_candidates(matches) if not isinstance(matches, Exception) else []
+                for matches in query_matches
+            ],
+        )
+        stage_started_at = finish_stage("architectural_matching", stage_started_at)
+
+        for slot, (position, _) in enumerate(embedded):
+            matches = query_matches[slot]
+            if isinstance(matches, Exception):
+                results[position] = build_batch_item_error(f"Vector query failed: {matches}")
+                continue
+            try:
+                # Scene analysis is attached below; the cascade only reads the clue summary.
+                results[position] = resolve_location_from_embedding(
+                    embedding_stack[slot],
+                    matches,
+                    {"multimodal_context": navisense_v3.describe_multimodal_context(query_contexts[slot])},
+                    geospatial_alignments[slot],
+                    arch_matches=architectural_matches[slot],
+                    geolocation_estimate=geolocation_estimates[slot],
+                )
+            except Exception as error:
+                results[position] = build_batch_item_error(error)
+        stage_started_at = finish_stage("resolve", stage_started_at)
+
+        # No deadline here: the budget only times each item's analysis into the shared stage p95.
+        analysis_budget = LatencyBudget(stage_latency)
+        for slot, (position, _) in enumerate(embedded):
+            if results[position].get("error"):
+                continue
+            try:
+                attach_prediction_analysis(
+                    results[position],
+                    embedding_stack[slot],
+                    query_contexts[slot],
+                    analysis_mode,
+                    verbosity,
+                    analysis_budget,
+                )
+            except Exception as error:
+                results[position] = build_batch_item_error(f"Scene analysis failed: {error}")
+        finish_stage("scene_analysis", stage_started_at)
+
+        for position, item in enumerate(items):
+            results[position] = {
+                "index": position,
+                "filename": item.get("filename"),
+                **results[position],
+            }
+
+        total_ms = (time.perf_counter() - started_at) * 1000.0
+        succeeded = sum(1 for result in results if result.get("success"))
+        return {
+            "success": True,
+            "count": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "results": results,
+            "timing": {
+                "total_ms": round(total_ms, 3),
+                "per_image_ms": round(total_ms / len(items), 3) if items else 0.0,
+                "stages_ms": stages_ms,
+            },
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict-batch")
+async def predict_location_batch(
+    background_tasks: BackgroundTasks,
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    items: Optional[str] = Form(None),
+    analysis: Optional[str] = Form(None),
+    verbosity: Optional[str] = Form(None),
+):
+    """Predict locations for many images sent as multipart parts or a zip archive
+
+    ``analysis`` and ``verbosity`` apply to every item as on /predict; ingestion clients that
+    only need locations should send ``verbosity=minimal``.
+    """
+    analysis_mode = resolve_predict_analysis_mode(analysis)
+    verbosity = resolve_response_verbosity(verbosity)
+    entries: List[Dict[str, Any]] = []
+    for upload in files or []:
+        image_bytes = await upload.read()
+        if len(image_bytes) > PREDICT_BATCH_MAX_IMAGE_BYTES:
+            entries.append({"filename": upload.filename, "error": f"image exceeds {PREDICT_BATCH_MAX_IMAGE_BYTES} bytes"})
+        else:
+            entries.append({"filename": upload.filename, "image_bytes": image_bytes})
+    if archive is not None:
+        try:
+            entries.extend(read_batch_archive(
+                await archive.read(),
+                max_items=PREDICT_BATCH_MAX_ITEMS - len(entries),
+                max_image_bytes=PREDICT_BATCH_MAX_IMAGE_BYTES,
+                max_expanded_bytes=PREDICT_BATCH_MAX_ARCHIVE_BYTES,
+            ))
+        except BatchArchiveError as error:
+            raise HTTPException(status_code=error.status_code, detail=str(error))
+
+    if not entries:
+        raise HTTPException(status_code=400, detail="Provide images as 'files' parts or a zip 'archive'")
+    if len(entries) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(entries)} images; the limit is {PREDICT_BATCH_MAX_ITEMS}",
+        )
+
+    options = parse_batch_item_options(items, [entry.get("filename") or "" for entry in entries])
+    for entry, entry_options in zip(entries, options):
+        for field in ("ocr_text", "context_labels", "best_guess_labels"):
+            entry[field] = normalize_clue_option(field, entry_options.get(field))
+
+    result = await run_inference(run_batch_location_prediction, entries, analysis_mode, verbosity)
+    if DEFERRED_ANALYSIS_PRECOMPUTE:
+        for item in result["results"]:
+            if item.get("analysis_token"):
+                background_tasks.add_task(precompute_deferred_analysis, item["analysis_token"])
+    return json_response(result, f"predict-batch:{verbosity}")
+
+def run_scene_analysis(
+    image_bytes: bytes,
+    ocr_text: Optional[str] = None,
+    context_labels: Optional[str] = None,
+    best_guess_labels: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        embedding = embed_image_bytes(image_bytes)
         embedding_np = np.array(embedding)
         context_clues = collect_multimodal_context_clues(
             ocr_text=ocr_text,
@@ -1334,30 +2766,48 @@ async def scene_analysis_route(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/geospatial-alignment")
-async def geospatial_alignment_route(
+@app.post("/scene-analysis")
+async def scene_analysis_route(
     file: UploadFile = File(...),
     ocr_text: Optional[str] = Form(None),
     context_labels: Optional[str] = Form(None),
     best_guess_labels: Optional[str] = Form(None),
 ):
-    """Predict location via continuous image-to-GPS alignment"""
+    """Zero-shot scene understanding plus geospatial alignment hints"""
+    image_bytes = await file.read()
+    result = await run_coalesced_inference(
+        "scene-analysis",
+        hash_image_bytes(image_bytes),
+        (ocr_text, context_labels, best_guess_labels),
+        run_scene_analysis,
+        image_bytes,
+        ocr_text=ocr_text,
+        context_labels=context_labels,
+        best_guess_labels=best_guess_labels,
+    )
+    return json_response(result, "scene-analysis")
+
+def run_geospatial_alignment(
+    image_bytes: bytes,
+    ocr_text: Optional[str] = None,
+    context_labels: Optional[str] = None,
+    best_guess_labels: Optional[str] = None,
+    verbosity: str = "debug",
+) -> Dict[str, Any]:
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        embedding = generate_embedding(image)
+        embedding = embed_image_bytes(image_bytes)
         embedding_np = np.array(embedding)
         context_clues = collect_multimodal_context_clues(
             ocr_text=ocr_text,
             context_labels=context_labels,
             best_guess_labels=best_guess_labels,
         )
-        prediction = navisense_v3.predict(
+        query_context = navisense_v3.create_query_context(
             embedding_np,
-            top_k=5,
             ocr_text=ocr_text,
             context_clues=context_clues,
         )
+        prediction = navisense_v3.predict(embedding_np, top_k=5, context=query_context, verbosity=verbosity)
 
         if not prediction:
             return {
@@ -1365,19 +2815,41 @@ async def geospatial_alignment_route(
                 "message": "No trained geospatial alignment memory available"
             }
 
-        return {
+        response = {
             "success": True,
             "prediction": prediction,
-            "analysis": build_scene_analysis(
-                embedding_np,
-                ocr_text=ocr_text,
-                context_clues=context_clues,
-            ),
             "method": "navisense_v3_geospatial_alignment"
         }
+        if verbosity != "minimal":
+            response["analysis"] = build_scene_analysis(embedding_np, context=query_context, verbosity=verbosity)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/geospatial-alignment")
+async def geospatial_alignment_route(
+    file: UploadFile = File(...),
+    ocr_text: Optional[str] = Form(None),
+    context_labels: Optional[str] = Form(None),
+    best_guess_labels: Optional[str] = Form(None),
+    verbosity: Optional[str] = Form(None),
+):
+    """Predict location via continuous image-to-GPS alignment"""
+    verbosity = resolve_response_verbosity(verbosity)
+    image_bytes = await file.read()
+    result = await run_coalesced_inference(
+        f"geospatial-alignment-{verbosity}",
+        hash_image_bytes(image_bytes),
+        (ocr_text, context_labels, best_guess_labels),
+        run_geospatial_alignment,
+        image_bytes,
+        ocr_text=ocr_text,
+        context_labels=context_labels,
+        best_guess_labels=best_guess_labels,
+        verbosity=verbosity,
+    )
+    return json_response(result, f"geospatial-alignment:{verbosity}")
+
 @app.post("/enhanced-ocr")
 async def enhanced_ocr_analysis(file: UploadFile = File(...), ocr_text: str = Form(...)):
     """Enhanced OCR analysis for landmarks and business info"""
@@ -1395,15 +2867,10 @@ async def enhanced_ocr_analysis(file: UploadFile = File(...), ocr_text: str = Fo
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/architectural-analysis")
-async def architectural_analysis(file: UploadFile = File(...)):
-    """Analyze architectural features of a building"""
+def run_architectural_analysis(image_bytes: bytes) -> Dict[str, Any]:
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Generate embedding
-        embedding = generate_embedding(image)
+        # Generate embedding (served from the content-addressed cache when possible)
+        embedding = embed_image_bytes(image_bytes)
         embedding_np = np.array(embedding)
         
         # Extract architectural features
@@ -1423,15 +2890,16 @@ async def architectural_analysis(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/geolocation-predict")
-async def geolocation_predict(file: UploadFile = File(...)):
-    """Predict lat/lng for unknown buildings using ML regression"""
+@app.post("/architectural-analysis")
+async def architectural_analysis(file: UploadFile = File(...)):
+    """Analyze architectural features of a building"""
+    image_bytes = await file.read()
+    return await run_inference(run_architectural_analysis, image_bytes)
+
+def run_geolocation_prediction(image_bytes: bytes) -> Dict[str, Any]:
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Generate embedding
-        embedding = generate_embedding(image)
+        # Generate embedding (served from the content-addressed cache when possible)
+        embedding = embed_image_bytes(image_bytes)
         embedding_np = np.array(embedding)
         
         # Predict coordinates
@@ -1450,15 +2918,16 @@ async def geolocation_predict(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/multi-view-match")
-async def multi_view_match(file: UploadFile = File(...)):
-    """Match building across multiple views/angles"""
+@app.post("/geolocation-predict")
+async def geolocation_predict(file: UploadFile = File(...)):
+    """Predict lat/lng for unknown buildings using ML regression"""
+    image_bytes = await file.read()
+    return await run_inference(run_geolocation_prediction, image_bytes)
+
+def run_multi_view_match(image_bytes: bytes) -> Dict[str, Any]:
     try:
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        
-        # Generate embedding
-        embedding = generate_embedding(image)
+        # Generate embedding (served from the content-addressed cache when possible)
+        embedding = embed_image_bytes(image_bytes)
         embedding_np = np.array(embedding)
         
         # Get candidates from vector database
@@ -1507,16 +2976,16 @@ async def multi_view_match(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/multi-view-match")
+async def multi_view_match(file: UploadFile = File(...)):
+    """Match building across multiple views/angles"""
+    image_bytes = await file.read()
+    return await run_inference(run_multi_view_match, image_bytes)
+
 @app.get("/debug/db-sample")
 def get_sample_data():
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('POSTGRES_HOST'),
-            database=os.getenv('POSTGRES_DATABASE'),
-            user=os.getenv('POSTGRES_USER'),
-            password=os.getenv('POSTGRES_PASSWORD'),
-            sslmode='require'
-        )
+        conn = get_db_connection()
         cur = conn.cursor()
         
         # Get sample from NavisenseTraining
@@ -1544,16 +3013,17 @@ def get_sample_data():
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@app.post("/train")
-async def train_location(
-    file: UploadFile = File(...),
-    latitude: float = Form(...),
-    longitude: float = Form(...),
-    address: str = Form(None),
-    businessName: str = Form(None),
-    userId: str = Form(None),
-    metadata: str = Form(None)
-):
+def run_training_update(
+    image_bytes: bytes,
+    content_type: Optional[str],
+    filename: Optional[str],
+    latitude: float,
+    longitude: float,
+    address: Optional[str] = None,
+    businessName: Optional[str] = None,
+    userId: Optional[str] = None,
+    metadata: Optional[str] = None
+) -> Dict[str, Any]:
     try:
         metadata_payload = parse_metadata(metadata)
         effective_address = address or metadata_payload.get("address")
@@ -1570,18 +3040,15 @@ async def train_location(
         except (TypeError, ValueError):
             confidence = None
 
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-        embedding = generate_embedding(image)
+        img_hash = hash_image_bytes(image_bytes)
+        embedding = embed_image_bytes(image_bytes, image_hash=img_hash)
         embedding_np = np.array(embedding)
 
-        img_hash = hashlib.sha256(image_bytes).hexdigest()
         stored_image_url = upload_training_image(
             image_bytes,
             img_hash,
-            file.content_type,
-            file.filename,
+            content_type,
+            filename,
             source
         )
 
@@ -1595,7 +3062,10 @@ async def train_location(
             "source": source
         }
         vector_metadata = build_vector_metadata(training_record)
-        vector_id = upsert_training_vector(img_hash, embedding, vector_metadata)
+        writes = vector_write_buffer.scoped()
+        vector_id = upsert_training_vector(img_hash, embedding, vector_metadata, writes)
+        if flush_vector_writes(writes)["failed_ids"]:
+            raise RuntimeError(f"Failed to upsert training vector {vector_id}")
 
         upsert_training_record(
             stored_image_url,
@@ -1613,12 +3083,17 @@ async def train_location(
             trained=True
         )
 
-        geolocation_predictor.train_step(embedding_np, latitude, longitude)
-        geolocation_predictor.save_model()
+        with training_lock:
+            geolocation_predictor.train_step(embedding_np, latitude, longitude)
+            geolocation_predictor.save_model()
 
-        architectural_matcher.add_building(vector_id, embedding_np, vector_metadata)
-        architectural_matcher.save_features()
-        navisense_v3.add_training_example(embedding, training_record)
+            architectural_matcher.add_building(vector_id, embedding_np, vector_metadata)
+            architectural_matcher.save_features()
+            navisense_v3.add_training_example(embedding, training_record)
+
+        # Writes one small delta; the index takes its own lock, so this stays outside training_lock.
+        perceptual_hash_index.add_image(img_hash, image_bytes, vector_metadata)
+        perceptual_hash_index.save_index()
 
         return {
             "success": True,
@@ -1632,8 +3107,32 @@ async def train_location(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/train")
+async def train_location(
+    file: UploadFile = File(...),
+    latitude: float = Form(...),
+    longitude: float = Form(...),
+    address: str = Form(None),
+    businessName: str = Form(None),
+    userId: str = Form(None),
+    metadata: str = Form(None)
+):
+    image_bytes = await file.read()
+    return await run_inference(
+        run_training_update,
+        image_bytes,
+        file.content_type,
+        file.filename,
+        latitude,
+        longitude,
+        address=address,
+        businessName=businessName,
+        userId=userId,
+        metadata=metadata,
+    )
+
 @app.post("/retrain")
-async def retrain_models():
+def retrain_models():
     """Retrain the geolocation model from the full canonical training corpus."""
     try:
         records = fetch_combined_training_records()
@@ -1659,39 +3158,40 @@ async def retrain_models():
         train_lats = [example["latitude"] for example in train_examples]
         train_lngs = [example["longitude"] for example in train_examples]
 
-        geolocation_predictor.reset_model()
-        epochs = choose_training_epochs(len(train_examples))
-        final_loss = geolocation_predictor.batch_train(
-            train_embeddings,
-            train_lats,
-            train_lngs,
-            epochs=epochs
-        )
-        geolocation_predictor.save_model()
-        navisense_v3_loss = navisense_v3.batch_train(
-            train_examples,
-            epochs=max(8, min(epochs, 20)),
-            batch_size=min(32, max(len(train_examples), 2))
-        )
-
-        architectural_matcher.save_features()
-        mark_training_records_trained([example["image_hash"] for example in examples])
-
-        validation_metrics = None
-        confidence_calibration = None
-        navisense_v3_validation = None
-        if validation_examples:
-            validation_metrics = geolocation_predictor.evaluate_accuracy(
-                [example["embedding"] for example in validation_examples],
-                [example["latitude"] for example in validation_examples],
-                [example["longitude"] for example in validation_examples]
+        with training_lock:
+            geolocation_predictor.reset_model()
+            epochs = choose_training_epochs(len(train_examples))
+            final_loss = geolocation_predictor.batch_train(
+                train_embeddings,
+                train_lats,
+                train_lngs,
+                epochs=epochs
             )
-            confidence_calibration = geolocation_predictor.calibrate_confidence(
-                [example["embedding"] for example in validation_examples],
-                [example["latitude"] for example in validation_examples],
-                [example["longitude"] for example in validation_examples]
+            geolocation_predictor.save_model()
+            navisense_v3_loss = navisense_v3.batch_train(
+                train_examples,
+                epochs=max(8, min(epochs, 20)),
+                batch_size=min(32, max(len(train_examples), 2))
             )
-            navisense_v3_validation = navisense_v3.evaluate(validation_examples)
+
+            architectural_matcher.save_features()
+            mark_training_records_trained([example["image_hash"] for example in examples])
+
+            validation_metrics = None
+            confidence_calibration = None
+            navisense_v3_validation = None
+            if validation_examples:
+                validation_metrics = geolocation_predictor.evaluate_accuracy(
+                    [example["embedding"] for example in validation_examples],
+                    [example["latitude"] for example in validation_examples],
+                    [example["longitude"] for example in validation_examples]
+                )
+                confidence_calibration = geolocation_predictor.calibrate_confidence(
+                    [example["embedding"] for example in validation_examples],
+                    [example["latitude"] for example in validation_examples],
+                    [example["longitude"] for example in validation_examples]
+                )
+                navisense_v3_validation = navisense_v3.evaluate(validation_examples)
 
         return {
             "success": True,
@@ -1724,7 +3224,7 @@ def test_s3_access():
         return {"success": False, "error": str(e)}
 
 @app.get("/evaluate-models")
-async def evaluate_models(
+def evaluate_models(
     limit: int = Query(default=20, ge=2, le=100),
     include_scene_analysis: bool = Query(default=False)
 ):
@@ -1766,7 +3266,7 @@ async def evaluate_models(
         return {"success": False, "error": str(e)}
 
 @app.get("/evaluate-heldout")
-async def evaluate_heldout(
+def evaluate_heldout(
     limit: Optional[int] = Query(default=None, ge=2, le=1000),
     validation_ratio: float = Query(default=0.3, ge=0.1, le=0.5),
     minimum_validation_examples: int = Query(default=10, ge=1, le=200),
@@ -1841,6 +3341,24 @@ def get_model_info():
                 "embedding_dim": EMBEDDING_DIM,
                 "index_name": index_name,
                 "device": device,
+                "batching": {
+                    "max_batch_size": embedding_batcher.max_batch_size,
+                    "max_wait_ms": embedding_batcher.max_wait_ms,
+                },
+                "preprocessing": fast_preprocess_status,
+                "inference_backend": image_encoder.status,
+                "quantization": backbone_quantization_status,
+                "mode": backbone_info["mode"],
+                "text_tower": (
+                    ("loaded" if model.text_tower_loaded else backbone_info["text_tower"])
+                    if hasattr(model, "text_tower_loaded")
+                    else "loaded"
+                ),
+                "prompt_bank": navisense_v3.scene_analyzer.prompt_bank_source,
+                "weights_source": backbone_info["weights_source"],
+                "warmup": warmup_status,
+                "startup_profile": STARTUP_PROFILE,
+                "startup_phases_ms": startup_phases_ms,
                 "status": "loaded"
             },
             "geolocation_predictor": {
@@ -1894,18 +3412,17 @@ def get_model_info():
             }
         },
         "vector_database": {
-            "provider": "Pinecone",
+            "provider": index.provider,
             "index_name": index_name,
             "dimension": EMBEDDING_DIM,
             "metric": "cosine",
-            "total_vectors": index.describe_index_stats().total_vector_count
+            "total_vectors": stats_refresher.value("index_vectors"),
+            "total_vectors_refreshed_at": stats_refresher.get("index_vectors")["refreshed_at"]
         }
     }
 
 if __name__ == "__main__":
     import uvicorn
-    # Load architectural features on startup
-    architectural_matcher.load_features()
     print(
         "NaviSense ML API v4.3 starting with configurable backbone support:",
         f"{BACKBONE_MODEL_NAME} ({EMBEDDING_DIM} dims)"
@@ -1,11 +1,12 @@
 import json
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import boto3
 import numpy as np
 from botocore.exceptions import ClientError
-from sklearn.metrics.pairwise import cosine_similarity
+
+from backbone import get_artifact_bucket
 
 class ArchitecturalMatcher:
     """Enhanced multi-view matching for buildings from different angles"""
@@ -21,7 +22,7 @@ class ArchitecturalMatcher:
             'texture_pattern': 0.05
         }
         self.artifact_path = os.getenv("ARCHITECTURAL_FEATURES_PATH", "architectural_features.json")
-        self.artifact_bucket = os.getenv("ML_ARTIFACTS_BUCKET") or os.getenv("AWS_S3_BUCKET_NAME")
+        self.artifact_bucket = get_artifact_bucket()
         self.artifact_key = os.getenv(
             "ARCHITECTURAL_FEATURES_S3_KEY",
             "navisense-ml-artifacts/architectural_features.json"
@@ -58,6 +59,15 @@ class ArchitecturalMatcher:
             'symmetry_score': self._calculate_symmetry(embedding)
         }
 
+    @staticmethod
+    def _cosine_similarity(left: np.ndarray, right: np.ndarray) -> float:
+        """Same result as sklearn's cosine_similarity for one pair (0.0 for zero vectors)."""
+        left_norm = np.linalg.norm(left)
+        right_norm = np.linalg.norm(right)
+        if left_norm == 0 or right_norm == 0:
+            return 0.0
+        return float(np.dot(left, right) / (left_norm * right_norm))
+
     @staticmethod
     def _slice_by_ratio(emb: np.ndarray, start_ratio: float, end_ratio: float, minimum_width: int = 8) -> np.ndarray:
         embedding_length = max(int(len(emb)), 1)
@@ -177,7 +187,12 @@ class ArchitecturalMatcher:
         symmetry = 1.0 - np.mean(np.abs(left_half - right_half))
         return max(0.0, min(1.0, symmetry))
     
-    def match_building(self, query_emb: np.ndarray, candidates: List[Dict]) -> List[Tuple[str, float]]:
+    def match_building(
+        self,
+        query_emb: np.ndarray,
+        candidates: List[Dict],
+        feature_cache: Optional[Dict[str, Tuple[np.ndarray, Dict]]] = None,
+    ) -> List[Tuple[str, float]]:
         """Enhanced building matching across multiple views"""
         query_features = self.extract_features(query_emb, {})
         matches = []
@@ -187,17 +202,24 @@ class ArchitecturalMatcher:
             if cand_values is None:
                 continue
 
-            cand_emb = np.array(cand_values)
+            cand_id = cand.get('id')
+            cached = feature_cache.get(cand_id) if feature_cache is not None and cand_id else None
+            if cached is not None:
+                cand_emb, cand_features = cached
+            else:
+                cand_emb = np.array(cand_values)
+                cand_features = self.extract_features(cand_emb, {})
+                if feature_cache is not None and cand_id:
+                    feature_cache[cand_id] = (cand_emb, cand_features)
+
             if cand_emb.shape != query_emb.shape:
                 continue
-
-            cand_features = self.extract_features(cand_emb, {})
             
             # Calculate individual feature similarities
             similarities = {}
             
             # Embedding similarity (semantic)
-            similarities['embedding'] = cosine_similarity([query_emb], [cand_emb])[0][0]
+            similarities['embedding'] = self._cosine_similarity(query_emb, cand_emb)
             
             # Categorical feature matching
             similarities['roof_pattern'] = 1.0 if query_features['roof_pattern'] == cand_features['roof_pattern'] else 0.0
@@ -229,6 +251,18 @@ class ArchitecturalMatcher:
         
         return sorted(matches, key=lambda x: x[1], reverse=True)
     
+    def match_building_batch(
+        self,
+        query_embs: List[np.ndarray],
+        candidate_lists: List[List[Dict]],
+    ) -> List[List[Tuple[str, float]]]:
+        """Match many queries, extracting features once per candidate shared across the batch"""
+        feature_cache: Dict[str, Tuple[np.ndarray, Dict]] = {}
+        return [
+            self.match_building(query_emb, candidates, feature_cache=feature_cache)
+            for query_emb, candidates in zip(query_embs, candidate_lists)
+        ]
+    
     def add_building(self, building_id: str, embedding: np.ndarray, metadata: dict):
         """Add building to architectural database with features"""
         features = self.extract_features(embedding, metadata)
@@ -1,9 +1,18 @@
+import io
 import os
 import re
+import threading
 from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import torch
-from transformers import AutoModel, AutoProcessor
+from transformers import (
+    AutoConfig,
+    AutoModel,
+    AutoProcessor,
+    CLIPTextModelWithProjection,
+    CLIPVisionModelWithProjection,
+)
 
 
 DEFAULT_BACKBONE_MODEL = "openai/clip-vit-base-patch32"
@@ -35,10 +44,116 @@ def resolve_index_name(model_name: str) -> str:
     return f"{DEFAULT_INDEX_NAME}-{get_backbone_slug(model_name)}"
 
 
+def get_backbone_mode() -> str:
+    return os.getenv("NAVISENSE_BACKBONE_MODE", "full").strip().lower()
+
+
+def get_text_tower_mode() -> str:
+    return os.getenv("NAVISENSE_TEXT_TOWER", "lazy").strip().lower()
+
+
+def get_backbone_weights_source(model_name: str) -> Tuple[str, Dict[str, Any]]:
+    """Where ``from_pretrained`` reads weights from: a bundled snapshot directory or the hub id.
+
+    A bundled directory is read offline and only as safetensors, which transformers
+    memory-maps instead of unpickling. ``model_name`` stays the canonical name used for
+    index and cache keys either way.
+    """
+    local_dir = os.getenv("NAVISENSE_BACKBONE_LOCAL_DIR", "").strip()
+    if local_dir:
+        return local_dir, {"local_files_only": True, "use_safetensors": True}
+    return model_name, {}
+
+
+def get_artifact_bucket() -> Optional[str]:
+    """S3 bucket for model artifacts, or None when artifacts must be read from local files only."""
+    if os.getenv("NAVISENSE_ARTIFACT_SOURCE", "s3").strip().lower() == "local":
+        return None
+    return os.getenv("ML_ARTIFACTS_BUCKET") or os.getenv("AWS_S3_BUCKET_NAME")
+
+
+class TextTowerUnavailable(RuntimeError):
+    """Raised when text features are requested from a vision-only backbone with the text tower disabled."""
+
+
+class VisionOnlyBackbone(torch.nn.Module):
+    """CLIP image tower with the dual-encoder feature API and an optional lazily loaded text tower"""
+
+    # Class-level so quantize_dynamic's deepcopy of the module does not try to copy a lock.
+    _text_lock = threading.Lock()
+
+    def __init__(self, model_name: str, device: str, text_tower_mode: str = "lazy"):
+        super().__init__()
+        self.model_name = model_name
+        self.device = device
+        self.text_tower_mode = text_tower_mode
+        self.weights_source, self.load_kwargs = get_backbone_weights_source(model_name)
+        self.config = AutoConfig.from_pretrained(self.weights_source, **self.load_kwargs)
+        self.vision_model = CLIPVisionModelWithProjection.from_pretrained(self.weights_source, **self.load_kwargs)
+        self.text_model: Optional[Any] = None
+
+    @property
+    def text_tower_enabled(self) -> bool:
+        return self.text_tower_mode != "disabled"
+
+    @property
+    def text_tower_loaded(self) -> bool:
+        return self.text_model is not None
+
+    def get_image_features(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.vision_model(pixel_values=pixel_values).image_embeds
+
+    def _load_text_tower(self) -> Any:
+        if self.text_model is not None:
+            return self.text_model
+        if not self.text_tower_enabled:
+            raise TextTowerUnavailable("Text tower is disabled (NAVISENSE_TEXT_TOWER=disabled)")
+
+        with self._text_lock:
+            if self.text_model is None:
+                print(f"Loading text tower on demand: {self.model_name}")
+                text_model = CLIPTextModelWithProjection.from_pretrained(self.weights_source, **self.load_kwargs)
+                text_model.to(self.device)
+                text_model.eval()
+                self.text_model = text_model
+        return self.text_model
+
+    def get_text_features(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: Optional[torch.Tensor] = None,
+        **_: Any,
+    ) -> torch.Tensor:
+        return self._load_text_tower()(input_ids=input_ids, attention_mask=attention_mask).text_embeds
+
+    def unload_text_tower(self) -> None:
+        with self._text_lock:
+            self.text_model = None
+
+
 def resolve_device() -> str:
     return "cuda" if torch.cuda.is_available() else "cpu"
 
 
+def available_cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def configure_torch_threads(worker_count: int = 1) -> int:
+    """Split the visible cores between serving processes instead of oversubscribing them."""
+    configured_threads = os.getenv("NAVISENSE_TORCH_THREADS")
+    if configured_threads:
+        threads = max(1, int(configured_threads))
+    else:
+        threads = max(1, available_cpu_count() // max(int(worker_count), 1))
+
+    torch.set_num_threads(threads)
+    return threads
+
+
 def infer_embedding_dim(model: Any) -> int:
     configured_dimension = os.getenv("NAVISENSE_EMBEDDING_DIM")
     if configured_dimension:
@@ -69,9 +184,23 @@ def load_backbone(device: Optional[str] = None) -> Tuple[Any, Any, str, Dict[str
     resolved_device = device or resolve_device()
     model_name = get_backbone_model_name()
 
-    print(f"Loading vision backbone: {model_name}")
-    model = AutoModel.from_pretrained(model_name)
-    processor = AutoProcessor.from_pretrained(model_name)
+    weights_source, load_kwargs = get_backbone_weights_source(model_name)
+
+    backbone_mode = get_backbone_mode()
+    if backbone_mode == "vision" and AutoConfig.from_pretrained(weights_source, **load_kwargs).model_type != "clip":
+        print(f"Vision-only mode supports CLIP checkpoints; loading the full dual encoder for {model_name}")
+        backbone_mode = "full"
+
+    print(f"Loading vision backbone: {model_name} ({backbone_mode}) from {weights_source}")
+    if backbone_mode == "vision":
+        model = VisionOnlyBackbone(model_name, resolved_device, text_tower_mode=get_text_tower_mode())
+    else:
+        backbone_mode = "full"
+        model = AutoModel.from_pretrained(weights_source, **load_kwargs)
+    processor = AutoProcessor.from_pretrained(
+        weights_source,
+        local_files_only=load_kwargs.get("local_files_only", False),
+    )
 
     for required_method in ("get_image_features", "get_text_features"):
         if not hasattr(model, required_method):
@@ -90,6 +219,9 @@ def load_backbone(device: Optional[str] = None) -> Tuple[Any, Any, str, Dict[str
         "device": resolved_device,
         "index_name": resolve_index_name(model_name),
         "default_index_name": DEFAULT_INDEX_NAME,
+        "mode": backbone_mode,
+        "text_tower": get_text_tower_mode() if backbone_mode == "vision" else "loaded",
+        "weights_source": "local" if load_kwargs else "hub",
     }
 
     print(
@@ -98,3 +230,58 @@ def load_backbone(device: Optional[str] = None) -> Tuple[Any, Any, str, Dict[str
         f"(embedding_dim={embedding_dim})",
     )
     return model, processor, resolved_device, backbone_info
+
+
+def get_backbone_quantization_mode() -> str:
+    return os.getenv("NAVISENSE_BACKBONE_QUANTIZATION", "none").strip().lower()
+
+
+def quantize_backbone(model: Any) -> Any:
+    """Return a dynamic INT8 copy of the backbone with every Linear layer quantized (CPU only)."""
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model,
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+        inplace=False,
+    )
+    quantized.eval()
+    return quantized
+
+
+def measure_module_bytes(module: Any) -> int:
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell()
+
+
+def compare_embedding_sets(reference: np.ndarray, candidate: np.ndarray, top_k: int = 5) -> Dict[str, Any]:
+    """Row-wise cosine and leave-one-out top-k retrieval agreement between two embedding sets."""
+    reference = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-8, None)
+    candidate = candidate / np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-8, None)
+    cosines = np.sum(reference * candidate, axis=1)
+
+    report: Dict[str, Any] = {
+        "samples": int(reference.shape[0]),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6),
+        "top_k": None,
+        "topk_agreement": None,
+    }
+    effective_k = min(top_k, reference.shape[0] - 1)
+    if effective_k < 1:
+        return report
+
+    def top_k_neighbours(embeddings: np.ndarray) -> np.ndarray:
+        similarities = embeddings @ embeddings.T
+        np.fill_diagonal(similarities, -np.inf)
+        return np.argsort(-similarities, axis=1)[:, :effective_k]
+
+    reference_neighbours = top_k_neighbours(reference)
+    candidate_neighbours = top_k_neighbours(candidate)
+    overlaps = [
+        len(set(reference_row.tolist()) & set(candidate_row.tolist())) / effective_k
+        for reference_row, candidate_row in zip(reference_neighbours, candidate_neighbours)
+    ]
+    report["top_k"] = effective_k
+    report["topk_agreement"] = round(float(np.mean(overlaps)), 4)
+    return report
@@ -0,0 +1,262 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from backbone import get_backbone_slug
+
+
+SUPPORTED_BACKENDS = ("eager", "torchscript", "compile", "onnx")
+
+
+class ImageTower(nn.Module):
+    """Expose a dual encoder's image features as a plain ``pixel_values -> embeddings`` module"""
+
+    def __init__(self, model: Any):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model.get_image_features(pixel_values=pixel_values)
+
+
+def resolve_image_size(model: Any, processor: Any = None) -> Tuple[int, int]:
+    image_processor = getattr(processor, "image_processor", processor)
+    crop_size = getattr(image_processor, "crop_size", None)
+    if isinstance(crop_size, dict) and crop_size.get("height") and crop_size.get("width"):
+        return int(crop_size["height"]), int(crop_size["width"])
+
+    vision_config = getattr(getattr(model, "config", None), "vision_config", None)
+    image_size = getattr(vision_config, "image_size", None) or 224
+    return int(image_size), int(image_size)
+
+
+def resolve_backend_cache_dir() -> str:
+    return os.getenv("NAVISENSE_BACKEND_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "navisense-backends")
+
+
+class ImageEncoder:
+    """Run the backbone image tower through the configured eager, TorchScript, torch.compile or ONNX Runtime backend"""
+
+    def __init__(
+        self,
+        model: Any,
+        model_name: str,
+        device: str,
+        image_size: Tuple[int, int],
+        backend: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        self.model = model
+        self.model_name = model_name
+        self.device = device
+        self.image_size = image_size
+        self.requested_backend = (backend or os.getenv("NAVISENSE_BACKBONE_BACKEND", "eager")).strip().lower()
+        self.cache_dir = os.path.join(cache_dir or resolve_backend_cache_dir(), get_backbone_slug(model_name))
+        self.min_cosine = float(os.getenv("NAVISENSE_BACKEND_MIN_COSINE", "0.999"))
+        self.backend = "eager"
+        self.artifact_path: Optional[str] = None
+        self._eager_tower = ImageTower(model).eval()
+        self._runner: Callable[[torch.Tensor], torch.Tensor] = self._run_eager
+        self._onnx_session: Any = None
+        self._onnx_lock = threading.Lock()
+        self.status: Dict[str, Any] = {"requested": self.requested_backend, "active": "eager"}
+
+    def __call__(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self._runner(pixel_values)
+
+    def _artifact_path(self, backend: str, extension: str) -> str:
+        height, width = self.image_size
+        torch_version = torch.__version__.split("+")[0]
+        return os.path.join(self.cache_dir, f"{backend}-3x{height}x{width}-torch{torch_version}.{extension}")
+
+    def _example_pixels(self, batch_size: int = 2) -> torch.Tensor:
+        generator = torch.Generator().manual_seed(0)
+        return torch.randn((batch_size, 3, *self.image_size), generator=generator)
+
+    def _run_eager(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            return self._eager_tower(pixel_values.to(self.device))
+
+    def _build_torchscript(self) -> Callable[[torch.Tensor], torch.Tensor]:
+        path = self._artifact_path("torchscript", "pt")
+        if os.path.exists(path):
+            module = torch.jit.load(path, map_location=self.device)
+            print(f"Loaded cached TorchScript image tower from {path}")
+        else:
+            with torch.no_grad():
+                traced = torch.jit.trace(self._eager_tower, self._example_pixels().to(self.device), strict=False)
+            module = torch.jit.freeze(traced.eval())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            torch.jit.save(module, temporary_path)
+            os.replace(temporary_path, path)
+            print(f"Traced TorchScript image tower to {path}")
+
+        self.artifact_path = path
+        module = torch.jit.optimize_for_inference(module) if self.device == "cpu" else module
+
+        def run(pixel_values: torch.Tensor) -> torch.Tensor:
+            with torch.no_grad():
+                return module(pixel_values.to(self.device))
+
+        return run
+
+    def _build_compile(self) -> Callable[[torch.Tensor], torch.Tensor]:
+        # Inductor keeps its own FX graph / kernel cache; pinning it under the model's cache
+        # directory lets restarts reuse compiled kernels for the same model and input shapes.
+        inductor_dir = os.path.join(self.cache_dir, "inductor")
+        os.makedirs(inductor_dir, exist_ok=True)
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", inductor_dir)
+        os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+        # Avoid inductor's compile worker pool: the serving parent forks after loading.
+        os.environ.setdefault("TORCHINDUCTOR_COMPILE_THREADS", "1")
+        self.artifact_path = inductor_dir
+
+        compiled = torch.compile(self._eager_tower, backend="inductor", dynamic=True)
+
+        def run(pixel_values: torch.Tensor) -> torch.Tensor:
+            with torch.no_grad():
+                return compiled(pixel_values.to(self.device))
+
+        return run
+
+    def _build_onnx(self) -> Callable[[torch.Tensor], torch.Tensor]:
+        import onnxruntime  # optional; only needed for NAVISENSE_BACKBONE_BACKEND=onnx
+
+        path = self._artifact_path("onnx", "onnx")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            with torch.no_grad():
+                torch.onnx.export(
+                    self._eager_tower.cpu(),
+                    self._example_pixels(),
+                    temporary_path,
+                    input_names=["pixel_values"],
+                    output_names=["image_embeds"],
+                    dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+                    opset_version=17,
+                )
+            self._eager_tower.to(self.device)
+            os.replace(temporary_path, path)
+            print(f"Exported ONNX image tower to {path}")
+        else:
+            print(f"Using cached ONNX image tower at {path}")
+        self.artifact_path = path
+
+        def run(pixel_values: torch.Tensor) -> torch.Tensor:
+            session = self._get_onnx_session(onnxruntime, path)
+            outputs = session.run(["image_embeds"], {"pixel_values": pixel_values.detach().cpu().numpy()})
+            return torch.from_numpy(outputs[0])
+
+        return run
+
+    def _get_onnx_session(self, onnxruntime: Any, path: str) -> Any:
+        if self._onnx_session is not None:
+            return self._onnx_session
+
+        with self._onnx_lock:
+            if self._onnx_session is None:
+                options = onnxruntime.SessionOptions()
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                options.intra_op_num_threads = torch.get_num_threads()
+                options.inter_op_num_threads = 1
+                self._onnx_session = onnxruntime.InferenceSession(
+                    path,
+                    sess_options=options,
+                    providers=["CPUExecutionProvider"],
+                )
+        return self._onnx_session
+
+    def reset_after_fork(self) -> None:
+        """ONNX Runtime thread pools do not survive fork; sessions are rebuilt lazily per worker."""
+        self._onnx_session = None
+        self._onnx_lock = threading.Lock()
+
+    def _check_parity(self, runner: Callable[[torch.Tensor], torch.Tensor]) -> Dict[str, Any]:
+        # Use a batch size different from the trace/export example to catch baked-in shapes.
+        pixel_values = self._example_pixels(batch_size=3)
+        reference = self._run_eager(pixel_values).detach().cpu().float()
+        candidate = runner(pixel_values).detach().cpu().float()
+        if candidate.shape != reference.shape:
+            return {"shape_match": False}
+
+        cosine = torch.nn.functional.cosine_similarity(candidate, reference, dim=-1)
+        return {
+            "shape_match": True,
+            "min_cosine": round(float(cosine.min()), 6),
+            "max_abs_diff": round(float((candidate - reference).abs().max()), 6),
+        }
+
+    def activate(self) -> "ImageEncoder":
+        """Build the requested backend, falling back to eager if it is unavailable or diverges."""
+        backend = self.requested_backend
+        if backend == "eager":
+            return self
+        if backend not in SUPPORTED_BACKENDS:
+            self.status["error"] = f"unknown backend '{backend}'; expected one of {', '.join(SUPPORTED_BACKENDS)}"
+            print(f"Backbone backend fallback to eager: {self.status['error']}")
+            return self
+
+        builders = {
+            "torchscript": self._build_torchscript,
+            "compile": self._build_compile,
+            "onnx": self._build_onnx,
+        }
+        try:
+            started_at = time.perf_counter()
+            runner = builders[backend]()
+            parity = self._check_parity(runner)
+            self.status["build_ms"] = round((time.perf_counter() - started_at) * 1000.0, 1)
+        except Exception as error:
+            self.status["error"] = f"{type(error).__name__}: {error}"
+            print(f"Backbone backend fallback to eager: {backend} failed ({self.status['error']})")
+            return self
+
+        self.status["parity"] = parity
+        self.status["min_cosine_gate"] = self.min_cosine
+        if not parity.get("shape_match") or parity.get("min_cosine", 0.0) < self.min_cosine:
+            self.status["error"] = "parity check against eager embeddings failed"
+            print(f"Backbone backend fallback to eager: {backend} parity {parity}")
+            return self
+
+        self.backend = backend
+        self._runner = runner
+        self.status["active"] = backend
+        self.status["artifact"] = self.artifact_path
+        print(f"Backbone image tower running on {backend} backend (parity {parity})")
+        return self
+
+    def benchmark(self, batch_sizes: List[int], iterations: int = 10, warmup: int = 2) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        for batch_size in batch_sizes:
+            pixel_values = self._example_pixels(batch_size=batch_size)
+            for _ in range(warmup):
+                self(pixel_values)
+            timings = []
+            for _ in range(iterations):
+                started_at = time.perf_counter()
+                self(pixel_values)
+                timings.append((time.perf_counter() - started_at) * 1000.0)
+            median_ms = float(np.median(timings))
+            results[str(batch_size)] = {
+                "batch_ms_p50": round(median_ms, 3),
+                "per_image_ms": round(median_ms / batch_size, 3),
+                "images_per_second": round(batch_size * 1000.0 / median_ms, 2) if median_ms > 0 else None,
+            }
+        return results
+
+
+def build_image_encoder(model: Any, processor: Any, model_name: str, device: str) -> ImageEncoder:
+    return ImageEncoder(
+        model,
+        model_name,
+        device,
+        image_size=resolve_image_size(model, processor),
+    ).activate()
@@ -0,0 +1,56 @@
+import io
+import os
+import zipfile
+from typing import Any, Dict, List
+
+
+class BatchArchiveError(ValueError):
+    """Raised when a batch archive is unreadable or over its limits; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def read_batch_archive(
+    archive_bytes: bytes,
+    max_items: int,
+    max_image_bytes: int,
+    max_expanded_bytes: int,
+) -> List[Dict[str, Any]]:
+    """Unpack the images in a zip archive as ``{"filename", "image_bytes"}`` entries.
+
+    Limits are checked against the central directory before anything is decompressed. An image
+    over ``max_image_bytes`` becomes an ``{"filename", "error"}`` entry instead of failing the batch.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(archive_bytes))
+    except zipfile.BadZipFile as error:
+        raise BatchArchiveError(f"archive is not a valid zip file: {error}")
+
+    entries = []
+    with archive:
+        images = []
+        for info in archive.infolist():
+            name = info.filename
+            basename = os.path.basename(name)
+            if info.is_dir() or name.startswith("__MACOSX/") or not basename or basename.startswith("."):
+                continue
+            images.append(info)
+
+        if len(images) > max_items:
+            raise BatchArchiveError(f"archive has more than {max_items} images", status_code=413)
+        expanded_bytes = sum(info.file_size for info in images if info.file_size <= max_image_bytes)
+        if expanded_bytes > max_expanded_bytes:
+            raise BatchArchiveError(
+                f"archive expands to {expanded_bytes} bytes; the limit is {max_expanded_bytes}",
+                status_code=413,
+            )
+
+        for info in images:
+            if info.file_size > max_image_bytes:
+                entries.append({"filename": info.filename, "error": f"image exceeds {max_image_bytes} bytes"})
+                continue
+            # ZipExtFile stops at the declared file_size, so a lying header cannot expand past it.
+            entries.append({"filename": info.filename, "image_bytes": archive.read(info)})
+    return entries
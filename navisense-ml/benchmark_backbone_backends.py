@@ -0,0 +1,72 @@
+"""
+Compare image-tower latency and throughput across backbone inference backends.
+
+Loads the configured backbone once, then builds each backend (eager, TorchScript,
+torch.compile, ONNX Runtime), checks its parity against eager embeddings, and times
+forward passes at several batch sizes on the current machine. Backends that fail to
+build or diverge from eager are reported with their error instead of timings.
+
+    python benchmark_backbone_backends.py --batch-sizes 1,8,16 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from backbone import configure_torch_threads, load_backbone
+from backbone_backends import SUPPORTED_BACKENDS, ImageEncoder, resolve_image_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(SUPPORTED_BACKENDS))
+    parser.add_argument("--batch-sizes", default="1,8,16")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads (defaults to visible cores)")
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    if args.threads:
+        os.environ["NAVISENSE_TORCH_THREADS"] = str(args.threads)
+    threads = configure_torch_threads(1)
+
+    model, processor, device, backbone_info = load_backbone()
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",") if value.strip()]
+    report: Dict[str, Any] = {
+        "model": backbone_info["model_name"],
+        "device": device,
+        "torch_threads": threads,
+        "backends": {},
+    }
+
+    for backend in [value.strip() for value in args.backends.split(",") if value.strip()]:
+        encoder = ImageEncoder(
+            model,
+            backbone_info["model_name"],
+            device,
+            image_size=resolve_image_size(model, processor),
+            backend=backend,
+        ).activate()
+        entry: Dict[str, Any] = {"status": encoder.status}
+        if encoder.backend == backend:
+            entry["timings"] = encoder.benchmark(batch_sizes, iterations=args.iterations)
+            for batch_size, timing in entry["timings"].items():
+                print(
+                    f"{backend:>12}  batch={batch_size:>3}  "
+                    f"{timing['per_image_ms']:>8.2f} ms/img  {timing['images_per_second']:>8.2f} img/s"
+                )
+        else:
+            print(f"{backend:>12}  unavailable: {encoder.status.get('error')}")
+        report["backends"][backend] = entry
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
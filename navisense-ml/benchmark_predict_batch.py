@@ -0,0 +1,123 @@
+"""
+Measure per-image latency of /predict-batch against sequential /predict calls.
+
+Point it at a running NaviSense ML API and a directory of sample images. For each batch size
+(1, 8, 32 and 128 by default) it posts the first N images to /predict-batch, then sends the
+same N images one by one to /predict, and reports wall-clock per-image latency for both along
+with the server-side stage breakdown returned by the batch endpoint.
+
+Repeated images hit the server's embedding cache after the first run; start the server with
+NAVISENSE_EMBEDDING_CACHE_SIZE=0 to measure cold embedding cost and record that with --label.
+--verbosity is sent to both endpoints; ``minimal`` skips the per-image scene analysis.
+
+    python benchmark_predict_batch.py --base-url http://localhost:8000 --images ./samples
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def load_images(directory: Path, limit: int) -> List[Path]:
+    paths = sorted(path for path in directory.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    # Cycle through the available images so large batch sizes work with small sample sets.
+    return [paths[position % len(paths)] for position in range(limit)]
+
+
+def time_batch(base_url: str, paths: List[Path], timeout: float, form: Dict[str, str]) -> Dict[str, Any]:
+    files = [("files", (path.name, path.read_bytes(), "application/octet-stream")) for path in paths]
+    started_at = time.perf_counter()
+    response = requests.post(f"{base_url}/predict-batch", files=files, data=form, timeout=timeout)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+    response.raise_for_status()
+    payload = response.json()
+    return {
+        "wall_ms": elapsed_ms,
+        "per_image_ms": elapsed_ms / len(paths),
+        "server_timing": payload.get("timing"),
+        "succeeded": payload.get("succeeded"),
+        "failed": payload.get("failed"),
+    }
+
+
+def time_sequential(base_url: str, paths: List[Path], timeout: float, form: Dict[str, str]) -> Dict[str, Any]:
+    latencies = []
+    for path in paths:
+        started_at = time.perf_counter()
+        response = requests.post(
+            f"{base_url}/predict",
+            files={"file": (path.name, path.read_bytes(), "application/octet-stream")},
+            data=form,
+            timeout=timeout,
+        )
+        latencies.append((time.perf_counter() - started_at) * 1000.0)
+        response.raise_for_status()
+    return {
+        "wall_ms": sum(latencies),
+        "per_image_ms": statistics.mean(latencies),
+        "p95_ms": sorted(latencies)[max(0, int(round(0.95 * len(latencies))) - 1)],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--images", type=Path, required=True, help="Directory of sample images")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--verbosity", choices=("minimal", "standard", "debug"), help="Server default when omitted")
+    parser.add_argument("--skip-sequential", action="store_true", help="Only time /predict-batch")
+    parser.add_argument("--label", default="", help="Free-form label stored with the report")
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",") if value.strip()]
+    form = {"verbosity": args.verbosity} if args.verbosity else {}
+    report: Dict[str, Any] = {
+        "base_url": base_url,
+        "label": args.label,
+        "verbosity": args.verbosity,
+        "batch_sizes": {},
+    }
+
+    for batch_size in batch_sizes:
+        paths = load_images(args.images, batch_size)
+        batch_runs = [time_batch(base_url, paths, args.timeout, form) for _ in range(args.repeats)]
+        entry: Dict[str, Any] = {
+            "batch_per_image_ms": round(statistics.median(run["per_image_ms"] for run in batch_runs), 2),
+            "batch_wall_ms": round(statistics.median(run["wall_ms"] for run in batch_runs), 2),
+            "server_timing": batch_runs[-1]["server_timing"],
+            "failed_items": batch_runs[-1]["failed"],
+        }
+        if not args.skip_sequential:
+            sequential = time_sequential(base_url, paths, args.timeout, form)
+            entry["sequential_per_image_ms"] = round(sequential["per_image_ms"], 2)
+            entry["sequential_p95_ms"] = round(sequential["p95_ms"], 2)
+            entry["speedup"] = round(sequential["per_image_ms"] / max(entry["batch_per_image_ms"], 1e-6), 2)
+
+        report["batch_sizes"][str(batch_size)] = entry
+        summary = f"batch={batch_size:>4}  per-image {entry['batch_per_image_ms']:>9.2f} ms"
+        if "sequential_per_image_ms" in entry:
+            summary += f"  sequential {entry['sequential_per_image_ms']:>9.2f} ms  speedup x{entry['speedup']}"
+        print(summary)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
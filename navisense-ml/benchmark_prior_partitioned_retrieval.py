@@ -0,0 +1,191 @@
+"""
+Trace the recall/latency curve of prior-guided coarse-cell retrieval against flat search.
+
+Runs against a local vector store snapshot (NAVISENSE_VECTOR_STORE=local) whose vectors carry
+``coarse_cell`` tags; run POST /backfill-geo-tags first for older snapshots. Query vectors are
+sampled from the store and searched leave-one-out, so each query's own id is dropped from
+every result list.
+
+The baseline is an exact flat scan over every stored vector. For comparison the script also
+times the store's own unfiltered query, which is IVF-Flat once the store has trained. Then,
+for each probe width, the NaviSense V3 prior head ranks the coarse cells and
+``CellProbeRetriever`` searches only those cells, with the global fallback enabled. For each
+width it reports:
+
+- recall@k against the exact scan
+- p50/p95 latency
+- the mean fraction of the corpus the probed cells hold
+- how often the query's own cell was among those probed
+- how often the global fallback ran
+
+    python benchmark_prior_partitioned_retrieval.py --queries 200 --probe-cells 1,2,4,8,16 --top-k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from backbone import get_backbone_model_name, load_backbone, resolve_index_name
+from cell_probe_retriever import CellProbeRetriever
+from navisense_v3 import NaviSenseV3
+from vector_store import LocalVectorStore
+
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return round(float(np.percentile(values, fraction * 100.0)), 3)
+
+
+def recall(found: List[str], expected: List[str]) -> float:
+    return len(set(found) & set(expected)) / max(len(expected), 1)
+
+
+def without_self(ids: List[str], query_id: str, top_k: int) -> List[str]:
+    return [vector_id for vector_id in ids if vector_id != query_id][:top_k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--probe-cells", default="1,2,4,8,16")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-mass", type=float, default=0.0, help="Diffuse-prior cutoff; 0 always probes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    load_dotenv()
+    model, processor, device, backbone_info = load_backbone()
+    navisense_v3 = NaviSenseV3(
+        model,
+        processor,
+        device,
+        embedding_dim=int(backbone_info["embedding_dim"]),
+        model_name=str(backbone_info["model_name"]),
+    )
+    index_name = resolve_index_name(get_backbone_model_name())
+    store = LocalVectorStore(
+        os.path.join(os.getenv("NAVISENSE_LOCAL_INDEX_DIR", "local_vector_index"), index_name),
+        int(backbone_info["embedding_dim"]),
+    )
+    if not store.restore():
+        raise SystemExit("No local vector store snapshot found")
+
+    # Exact baseline over the whole corpus, plus per-cell sizes for the probed-fraction column.
+    all_ids = list(store.list_ids())
+    records: Dict[str, Any] = {}
+    for offset in range(0, len(all_ids), LOOKUP_CHUNK_SIZE):
+        records.update(store.lookup(all_ids[offset:offset + LOOKUP_CHUNK_SIZE]))
+    all_ids = list(records)
+    matrix = np.asarray([records[vector_id].values for vector_id in all_ids], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    cell_sizes: Dict[int, int] = {}
+    for match in records.values():
+        cell = (match.metadata or {}).get("coarse_cell")
+        if cell is not None:
+            cell_sizes[int(cell)] = cell_sizes.get(int(cell), 0) + 1
+    if not cell_sizes:
+        raise SystemExit("No vectors carry a coarse_cell tag; run POST /backfill-geo-tags first")
+
+    tagged_ids = [vector_id for vector_id in all_ids if (records[vector_id].metadata or {}).get("coarse_cell") is not None]
+    sample_ids = random.Random(args.seed).sample(tagged_ids, min(args.queries, len(tagged_ids)))
+    top_k = args.top_k
+    queries = []
+    for vector_id in sample_ids:
+        values = np.asarray(records[vector_id].values, dtype=np.float32)
+        queries.append({
+            "id": vector_id,
+            "values": values.tolist(),
+            "cell": int(records[vector_id].metadata["coarse_cell"]),
+            "probabilities": navisense_v3.predict_coarse_cell_probabilities(values),
+        })
+
+    exact_ms: List[float] = []
+    ivf_ms: List[float] = []
+    ivf_recall: List[float] = []
+    for query in queries:
+        vector = np.asarray(query["values"], dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        started_at = time.perf_counter()
+        scores = matrix @ vector
+        top = np.argpartition(-scores, top_k)[:top_k + 1] if scores.size > top_k + 1 else np.arange(scores.size)
+        top = top[np.argsort(-scores[top])]
+        exact_ms.append((time.perf_counter() - started_at) * 1000.0)
+        query["expected"] = without_self([all_ids[row] for row in top], query["id"], top_k)
+
+        started_at = time.perf_counter()
+        matches = store.query(query["values"], top_k=top_k + 1).matches
+        ivf_ms.append((time.perf_counter() - started_at) * 1000.0)
+        ivf_recall.append(recall(without_self([match.id for match in matches], query["id"], top_k), query["expected"]))
+
+    report: Dict[str, Any] = {
+        "index_name": index_name,
+        "vectors": len(all_ids),
+        "tagged_vectors": len(tagged_ids),
+        "occupied_cells": len(cell_sizes),
+        "queries": len(queries),
+        "top_k": top_k,
+        "exact_flat": {"ms_p50": percentile(exact_ms, 0.5), "ms_p95": percentile(exact_ms, 0.95), "recall": 1.0},
+        "store_unfiltered": {
+            "ms_p50": percentile(ivf_ms, 0.5),
+            "ms_p95": percentile(ivf_ms, 0.95),
+            "recall": round(float(np.mean(ivf_recall)), 4),
+        },
+        "probe_cells": {},
+    }
+    print(f"{len(all_ids)} vectors in {len(cell_sizes)} occupied cells, {len(queries)} queries, top_k={top_k}")
+    print(f"exact flat       recall 1.000  p50 {report['exact_flat']['ms_p50']:>8.3f} ms")
+    print(
+        f"store unfiltered recall {report['store_unfiltered']['recall']:.3f}  "
+        f"p50 {report['store_unfiltered']['ms_p50']:>8.3f} ms"
+    )
+
+    for max_cells in [int(value) for value in args.probe_cells.split(",") if value.strip()]:
+        # target_mass 1.0 so the width alone decides how many cells are probed.
+        retriever = CellProbeRetriever(max_cells=max_cells, target_mass=1.0, min_mass=args.min_mass)
+        timings: List[float] = []
+        recalls: List[float] = []
+        fractions: List[float] = []
+        cell_hits = 0
+        fallbacks = 0
+        for query in queries:
+            started_at = time.perf_counter()
+            result, probe = retriever.query(store, query["values"], query["probabilities"], top_k=top_k + 1)
+            timings.append((time.perf_counter() - started_at) * 1000.0)
+            recalls.append(recall(without_self([match.id for match in result.matches], query["id"], top_k), query["expected"]))
+            fractions.append(sum(cell_sizes.get(cell, 0) for cell in probe["cells"]) / len(tagged_ids))
+            cell_hits += query["cell"] in probe["cells"]
+            fallbacks += probe["fallback"] is not None
+
+        entry = {
+            "recall": round(float(np.mean(recalls)), 4),
+            "ms_p50": percentile(timings, 0.5),
+            "ms_p95": percentile(timings, 0.95),
+            "mean_probed_fraction": round(float(np.mean(fractions)), 4),
+            "own_cell_probed": round(cell_hits / len(queries), 4),
+            "fallback_rate": round(fallbacks / len(queries), 4),
+        }
+        report["probe_cells"][str(max_cells)] = entry
+        print(
+            f"probe {max_cells:>3} cells  recall {entry['recall']:.3f}  p50 {entry['ms_p50']:>8.3f} ms  "
+            f"scanned {entry['mean_probed_fraction'] * 100:5.1f}%  own cell {entry['own_cell_probed']:.3f}  "
+            f"fallback {entry['fallback_rate']:.3f}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare retrieval payload size and latency with and without the local vector mirror.
+
+Requires a Pinecone index and a mirror already synced through POST /sync-vector-mirror
+(NAVISENSE_VECTOR_MIRROR=true). Query vectors are sampled from the mirror. Each one is
+sent to Pinecone twice:
+
+- the current full form, with values and metadata in the response
+- the mirrored form, which fetches ids and scores only and hydrates values and
+  metadata from the local float16 mirror
+
+For each top_k the script reports p50/p95 latency and the mean JSON-encoded size of the
+returned matches. It also reports id agreement between the two forms and the largest
+value error introduced by float16 storage.
+
+    python benchmark_vector_mirror.py --queries 50 --top-k 10,20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+from pinecone import Pinecone
+
+from backbone import get_backbone_model_name, resolve_index_name
+from vector_store import LocalVectorStore, MirroredVectorStore, PineconeVectorStore
+
+
+def payload_bytes(matches: List[Any]) -> int:
+    return len(json.dumps([
+        {
+            "id": match.id,
+            "score": float(match.score),
+            "values": list(match.values) if match.values is not None else None,
+            "metadata": dict(match.metadata) if match.metadata is not None else None,
+        }
+        for match in matches
+    ]))
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return round(float(np.percentile(values, fraction * 100.0)), 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", default="10,20")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    load_dotenv()
+    index_name = resolve_index_name(get_backbone_model_name())
+    primary = PineconeVectorStore(Pinecone(api_key=os.getenv("PINECONE_API_KEY")), index_name)
+    dimension = primary.describe_index_stats().dimension
+    mirror = LocalVectorStore(
+        os.path.join(os.getenv("NAVISENSE_VECTOR_MIRROR_DIR", "vector_mirror"), index_name),
+        dimension,
+        dtype="float16",
+        min_train_size=2 ** 62,
+    )
+    if not mirror.restore():
+        raise SystemExit("No mirror snapshot found; run POST /sync-vector-mirror first")
+    mirrored = MirroredVectorStore(primary, mirror)
+
+    sample_ids = random.Random(args.seed).sample(list(mirror.list_ids()), min(args.queries, mirror.live_count()))
+    queries = [mirror.lookup([vector_id])[vector_id].values for vector_id in sample_ids]
+    report: Dict[str, Any] = {"index_name": index_name, "queries": len(queries), "top_k": {}}
+
+    for top_k in [int(value) for value in args.top_k.split(",") if value.strip()]:
+        timings: Dict[str, List[float]] = {"full": [], "mirrored": []}
+        sizes: Dict[str, List[int]] = {"full": [], "mirrored_wire": []}
+        agreement = []
+        max_value_error = 0.0
+
+        for query in queries:
+            started_at = time.perf_counter()
+            full = primary.query(query, top_k=top_k, include_values=True, include_metadata=True).matches
+            timings["full"].append((time.perf_counter() - started_at) * 1000.0)
+
+            started_at = time.perf_counter()
+            hydrated = mirrored.query(query, top_k=top_k, include_values=True, include_metadata=True).matches
+            timings["mirrored"].append((time.perf_counter() - started_at) * 1000.0)
+
+            # What actually crosses the network in the mirrored form: ids and scores.
+            ids_only = primary.query(query, top_k=top_k).matches
+            sizes["full"].append(payload_bytes(full))
+            sizes["mirrored_wire"].append(payload_bytes(ids_only))
+
+            full_ids = [match.id for match in full]
+            agreement.append(len(set(full_ids) & {match.id for match in hydrated}) / max(len(full_ids), 1))
+            full_by_id = {match.id: np.asarray(match.values, dtype=np.float32) for match in full}
+            for match in hydrated:
+                if match.id in full_by_id and match.values is not None:
+                    error = np.abs(np.asarray(match.values, dtype=np.float32) - full_by_id[match.id]).max()
+                    max_value_error = max(max_value_error, float(error))
+
+        entry = {
+            "full_ms_p50": percentile(timings["full"], 0.5),
+            "full_ms_p95": percentile(timings["full"], 0.95),
+            "mirrored_ms_p50": percentile(timings["mirrored"], 0.5),
+            "mirrored_ms_p95": percentile(timings["mirrored"], 0.95),
+            "full_payload_bytes": int(np.mean(sizes["full"])),
+            "mirrored_payload_bytes": int(np.mean(sizes["mirrored_wire"])),
+            "id_agreement": round(float(np.mean(agreement)), 4),
+            "max_float16_value_error": round(max_value_error, 6),
+        }
+        report["top_k"][str(top_k)] = entry
+        print(
+            f"top_k={top_k:>3}  full {entry['full_ms_p50']:>7.2f} ms / {entry['full_payload_bytes']:>7} B   "
+            f"mirrored {entry['mirrored_ms_p50']:>7.2f} ms / {entry['mirrored_payload_bytes']:>7} B   "
+            f"agreement {entry['id_agreement']:.3f}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from env_flags import env_flag
+from vector_store import QueryResult
+
+
+def prior_guided_retrieval_enabled() -> bool:
+    return env_flag("NAVISENSE_PRIOR_GUIDED_RETRIEVAL", False)
+
+
+class CellProbeRetriever:
+    """Query only the coarse cells the prior head ranks highest, falling back to a global search
+
+    Vectors carry a ``coarse_cell`` metadata tag (see ``geo_cells.geo_tags``), so each of the
+    18x36 cells is a partition the store can select with an ``$in`` filter: the local backend
+    scans only those partitions' rows and Pinecone prunes on the tag. Cells are taken in
+    probability order until they hold ``target_mass`` of the prior or ``max_cells`` is reached.
+
+    The global partition is the ordinary unfiltered query. It replaces the probe when the
+    chosen cells hold less than ``min_mass`` (the prior is too diffuse to trust), and is merged
+    in when the probed cells return fewer than ``top_k`` matches.
+    """
+
+    def __init__(
+        self,
+        max_cells: Optional[int] = None,
+        target_mass: Optional[float] = None,
+        min_mass: Optional[float] = None,
+    ):
+        self.max_cells = max(1, int(max_cells or os.getenv("NAVISENSE_PRIOR_PROBE_CELLS", "8")))
+        self.target_mass = float(
+            target_mass if target_mass is not None else os.getenv("NAVISENSE_PRIOR_PROBE_TARGET_MASS", "0.9")
+        )
+        self.min_mass = float(min_mass if min_mass is not None else os.getenv("NAVISENSE_PRIOR_PROBE_MIN_MASS", "0.5"))
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._probed_cells = 0
+        self._probed_mass = 0.0
+        self._fallbacks = {"diffuse_prior": 0, "sparse_cells": 0}
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def select_cells(self, coarse_cell_probabilities: Sequence[float]) -> Tuple[List[int], float]:
+        """Most probable cells up to ``target_mass`` or ``max_cells``, with the mass they cover."""
+        probabilities = np.asarray(coarse_cell_probabilities, dtype=np.float64)
+        cell_count = min(self.max_cells, probabilities.size)
+        top = np.argpartition(-probabilities, cell_count - 1)[:cell_count]
+        top = top[np.argsort(-probabilities[top])]
+
+        cells: List[int] = []
+        mass = 0.0
+        for cell in top:
+            cells.append(int(cell))
+            mass += float(probabilities[cell])
+            if mass >= self.target_mass:
+                break
+        return cells, mass
+
+    def query(
+        self,
+        store: Any,
+        vector: Sequence[float],
+        coarse_cell_probabilities: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+    ) -> Tuple[QueryResult, Dict[str, Any]]:
+        """Run the cell probe against ``store``; returns the matches and how they were found."""
+        cells, mass = self.select_cells(coarse_cell_probabilities)
+        report: Dict[str, Any] = {
+            "cells": cells,
+            "probability_mass": round(mass, 4),
+            "probed_matches": 0,
+            "fallback": None,
+        }
+
+        if mass < self.min_mass:
+            report["fallback"] = "diffuse_prior"
+            matches = store.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=include_metadata,
+                include_values=include_values,
+            ).matches
+        else:
+            matches = list(store.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=include_metadata,
+                include_values=include_values,
+                filter={"coarse_cell": {"$in": cells}},
+            ).matches)
+            report["probed_matches"] = len(matches)
+            if len(matches) < top_k:
+                report["fallback"] = "sparse_cells"
+                seen = {match.id for match in matches}
+                global_matches = store.query(
+                    vector=vector,
+                    top_k=top_k,
+                    include_metadata=include_metadata,
+                    include_values=include_values,
+                ).matches
+                matches.extend(match for match in global_matches if match.id not in seen)
+                matches = sorted(matches, key=lambda match: match.score, reverse=True)[:top_k]
+
+        with self._lock:
+            self._queries += 1
+            self._probed_cells += len(cells)
+            self._probed_mass += mass
+            if report["fallback"]:
+                self._fallbacks[report["fallback"]] += 1
+        return QueryResult(matches), report
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_cells": self.max_cells,
+                "target_mass": self.target_mass,
+                "min_mass": self.min_mass,
+                "queries": self._queries,
+                "mean_probed_cells": round(self._probed_cells / self._queries, 2) if self._queries else 0.0,
+                "mean_probed_mass": round(self._probed_mass / self._queries, 4) if self._queries else 0.0,
+                "fallbacks": dict(self._fallbacks),
+            }
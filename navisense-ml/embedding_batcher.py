@@ -0,0 +1,194 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+
+class _PendingEmbedding:
+    __slots__ = ("pixel_values", "future", "enqueued_at")
+
+    def __init__(self, pixel_values: torch.Tensor, future: Future, enqueued_at: float):
+        self.pixel_values = pixel_values
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent image embedding requests into batched backbone forward passes"""
+
+    def __init__(
+        self,
+        preprocess_fn: Callable[[Any], torch.Tensor],
+        encode_fn: Callable[[torch.Tensor], torch.Tensor],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        self.preprocess_fn = preprocess_fn
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(
+            1,
+            int(max_batch_size or os.getenv("NAVISENSE_EMBED_BATCH_MAX_SIZE", "16")),
+        )
+        self.max_wait_ms = max(
+            0.0,
+            float(max_wait_ms if max_wait_ms is not None else os.getenv("NAVISENSE_EMBED_BATCH_MAX_WAIT_MS", "5")),
+        )
+        self._queue: "queue.Queue[_PendingEmbedding]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._batches_run = 0
+        self._items_embedded = 0
+        self._failed_batches = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+        self._queue_delays_ms: deque = deque(maxlen=2048)
+        self._forward_times_ms: deque = deque(maxlen=512)
+        self._max_queue_delay_ms = 0.0
+
+    def reset_after_fork(self) -> None:
+        """Drop the parent's queue and worker thread; threads do not survive fork."""
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_forever,
+                name="navisense-embedding-batcher",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def submit(self, image: Any) -> Future:
+        """Preprocess on the calling thread and queue the image for the next batch."""
+        future: Future = Future()
+        try:
+            pixel_values = self.preprocess_fn(image)
+        except Exception as error:
+            future.set_exception(error)
+            return future
+
+        self._ensure_worker()
+        self._queue.put(_PendingEmbedding(pixel_values, future, time.perf_counter()))
+        return future
+
+    def embed(self, image: Any) -> List[float]:
+        return self.submit(image).result()
+
+    def embed_many(self, images: Sequence[Any]) -> List[List[float]]:
+        futures = [self.submit(image) for image in images]
+        return [future.result() for future in futures]
+
+    def _collect_batch(self) -> List[_PendingEmbedding]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + (self.max_wait_ms / 1000.0)
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run_forever(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as error:
+                print(f"Embedding batcher failed to run batch: {error}")
+
+    def _run_batch(self, batch: List[_PendingEmbedding]) -> None:
+        dequeued_at = time.perf_counter()
+        queue_delays = [(dequeued_at - item.enqueued_at) * 1000.0 for item in batch]
+
+        # Items with different preprocessed shapes cannot share one forward pass.
+        groups: Dict[tuple, List[_PendingEmbedding]] = {}
+        for item in batch:
+            groups.setdefault(tuple(item.pixel_values.shape[1:]), []).append(item)
+
+        for items in groups.values():
+            started_at = time.perf_counter()
+            try:
+                pixel_values = torch.cat([item.pixel_values for item in items], dim=0)
+                with torch.no_grad():
+                    features = self.encode_fn(pixel_values)
+                embeddings = features.detach().cpu().numpy().astype(np.float32)
+            except Exception as error:
+                with self._metrics_lock:
+                    self._failed_batches += 1
+                for item in items:
+                    if not item.future.done():
+                        item.future.set_exception(error)
+                continue
+
+            forward_ms = (time.perf_counter() - started_at) * 1000.0
+            for item, embedding in zip(items, embeddings):
+                if not item.future.done():
+                    item.future.set_result(embedding.tolist())
+
+            with self._metrics_lock:
+                self._batches_run += 1
+                self._items_embedded += len(items)
+                self._batch_size_histogram[len(items)] = self._batch_size_histogram.get(len(items), 0) + 1
+                self._forward_times_ms.append(forward_ms)
+
+        with self._metrics_lock:
+            self._queue_delays_ms.extend(queue_delays)
+            self._max_queue_delay_ms = max(self._max_queue_delay_ms, max(queue_delays))
+
+    @staticmethod
+    def _percentile(values: Sequence[float], percentile: float) -> Optional[float]:
+        if not values:
+            return None
+        return round(float(np.percentile(np.array(values, dtype=np.float64), percentile)), 3)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            queue_delays = list(self._queue_delays_ms)
+            forward_times = list(self._forward_times_ms)
+            batches_run = self._batches_run
+            items_embedded = self._items_embedded
+            histogram = dict(sorted(self._batch_size_histogram.items()))
+            failed_batches = self._failed_batches
+            max_queue_delay = self._max_queue_delay_ms
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize(),
+            "batches_run": batches_run,
+            "failed_batches": failed_batches,
+            "items_embedded": items_embedded,
+            "average_batch_size": round(items_embedded / batches_run, 3) if batches_run else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in histogram.items()},
+            "queue_delay_ms": {
+                "p50": self._percentile(queue_delays, 50),
+                "p95": self._percentile(queue_delays, 95),
+                "max": round(max_queue_delay, 3),
+                "window": len(queue_delays),
+            },
+            "forward_ms": {
+                "p50": self._percentile(forward_times, 50),
+                "p95": self._percentile(forward_times, 95),
+                "window": len(forward_times),
+            },
+        }
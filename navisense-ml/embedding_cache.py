@@ -0,0 +1,199 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backbone import get_backbone_slug
+
+
+class EmbeddingCache:
+    """Content-addressed LRU of backbone embeddings with an optional on-disk tier"""
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: Optional[int] = None,
+    ):
+        self.model_name = model_name
+        self.model_slug = get_backbone_slug(model_name)
+        self.max_entries = max(
+            0,
+            int(max_entries if max_entries is not None else os.getenv("NAVISENSE_EMBEDDING_CACHE_SIZE", "4096")),
+        )
+        configured_dir = disk_dir if disk_dir is not None else os.getenv("NAVISENSE_EMBEDDING_CACHE_DIR", "")
+        self.disk_dir = os.path.join(configured_dir, self.model_slug) if configured_dir else None
+        self.disk_max_entries = max(
+            1,
+            int(
+                disk_max_entries
+                if disk_max_entries is not None
+                else os.getenv("NAVISENSE_EMBEDDING_CACHE_DISK_MAX_ENTRIES", "100000")
+            ),
+        )
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_entry_count = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._disk_errors = 0
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                self._disk_entry_count = sum(1 for _ in self._iter_disk_files())
+                print(f"Embedding cache disk tier at {self.disk_dir} ({self._disk_entry_count} entries)")
+            except OSError as error:
+                print(f"Disabling embedding cache disk tier: {error}")
+                self.disk_dir = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.disk_dir is not None
+
+    def _disk_path(self, image_hash: str) -> str:
+        return os.path.join(self.disk_dir, image_hash[:2], f"{image_hash}.npy")
+
+    def _iter_disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".npy"):
+                    yield os.path.join(root, name)
+
+    def _remember(self, image_hash: str, embedding: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[image_hash] = embedding
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _read_disk(self, image_hash: str) -> Optional[np.ndarray]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(image_hash)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            embedding = np.load(path, allow_pickle=False)
+            os.utime(path, None)
+            return embedding.astype(np.float32, copy=False)
+        except Exception as error:
+            self._disk_errors += 1
+            print(f"Failed to read cached embedding {image_hash[:16]}: {error}")
+            return None
+
+    def _write_disk(self, image_hash: str, embedding: np.ndarray) -> None:
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(image_hash)
+        if os.path.exists(path):
+            return
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "wb") as cache_file:
+                np.save(cache_file, embedding, allow_pickle=False)
+            os.replace(temporary_path, path)
+        except Exception as error:
+            self._disk_errors += 1
+            print(f"Failed to persist cached embedding {image_hash[:16]}: {error}")
+            return
+
+        with self._disk_lock:
+            self._disk_entry_count += 1
+            should_prune = self._disk_entry_count > self.disk_max_entries
+        if should_prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Drop the least recently used tenth of the disk tier once it exceeds its bound."""
+        with self._disk_lock:
+            try:
+                files = sorted(self._iter_disk_files(), key=lambda path: os.path.getmtime(path))
+            except OSError as error:
+                print(f"Failed to scan embedding cache disk tier: {error}")
+                return
+
+            excess = len(files) - self.disk_max_entries
+            if excess <= 0:
+                self._disk_entry_count = len(files)
+                return
+
+            to_remove = files[: excess + max(1, self.disk_max_entries // 10)]
+            for path in to_remove:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_entry_count = len(files) - len(to_remove)
+
+    def get(self, image_hash: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(image_hash)
+            if embedding is not None:
+                self._entries.move_to_end(image_hash)
+                self._hits += 1
+                return embedding.tolist()
+
+        embedding = self._read_disk(image_hash)
+        if embedding is not None:
+            self._remember(image_hash, embedding)
+            with self._lock:
+                self._disk_hits += 1
+            return embedding.tolist()
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, image_hash: str, embedding: Sequence[float]) -> None:
+        if not self.enabled:
+            return
+
+        stored = np.asarray(embedding, dtype=np.float32)
+        self._remember(image_hash, stored)
+        self._write_disk(image_hash, stored)
+        with self._lock:
+            self._stores += 1
+
+    def get_or_compute(self, image_hash: str, compute_fn: Callable[[], Sequence[float]]) -> List[float]:
+        cached = self.get(image_hash)
+        if cached is not None:
+            return cached
+
+        embedding = list(compute_fn())
+        self.put(image_hash, embedding)
+        return embedding
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "model": self.model_name,
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "disk_tier": self.disk_dir,
+                "disk_entries": self._disk_entry_count if self.disk_dir else None,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "disk_errors": self._disk_errors,
+            }
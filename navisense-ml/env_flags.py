@@ -0,0 +1,16 @@
+import os
+
+TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+FALSE_VALUES = frozenset({"0", "false", "no", "off"})
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Boolean NAVISENSE_* switch; unset, empty or unrecognized values keep ``default``."""
+    value = os.getenv(name, "").strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    if value:
+        print(f"Ignoring unrecognized value {value!r} for {name}; using {default}")
+    return default
@@ -0,0 +1,111 @@
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from navisense_v3 import (
+    COARSE_CELL_LAT_STEP,
+    COARSE_CELL_LNG_STEP,
+    COARSE_LAT_BUCKET_COUNT,
+    COARSE_LNG_BUCKET_COUNT,
+)
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored as separate metadata fields because Pinecone filters match whole values, not prefixes.
+# Cell sizes: 2 ~ 1250x625 km, 3 ~ 156x156 km, 4 ~ 39x20 km, 5 ~ 4.9x4.9 km.
+GEOHASH_PRECISIONS = (2, 3, 4, 5)
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+def geohash_field(precision: int) -> str:
+    return f"geohash{precision}"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int) -> str:
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+    characters = []
+    bits = 0
+    bit_count = 0
+    even_bit = True
+    while len(characters) < precision:
+        value_range, value = (longitude_range, longitude) if even_bit else (latitude_range, latitude)
+        middle = (value_range[0] + value_range[1]) / 2.0
+        if value >= middle:
+            bits = (bits << 1) | 1
+            value_range[0] = middle
+        else:
+            bits <<= 1
+            value_range[1] = middle
+        even_bit = not even_bit
+        bit_count += 1
+        if bit_count == 5:
+            characters.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(characters)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) of a geohash cell in degrees."""
+    total_bits = 5 * precision
+    longitude_bits = (total_bits + 1) // 2
+    latitude_bits = total_bits // 2
+    return 180.0 / (2 ** latitude_bits), 360.0 / (2 ** longitude_bits)
+
+
+def coarse_cell_index(latitude: float, longitude: float) -> int:
+    """Same 10-degree cell index the NaviSense V3 prior heads predict."""
+    latitude_bucket = int(min(max(math.floor((latitude + 90.0) / COARSE_CELL_LAT_STEP), 0), COARSE_LAT_BUCKET_COUNT - 1))
+    longitude_bucket = int(
+        min(max(math.floor((longitude + 180.0) / COARSE_CELL_LNG_STEP), 0), COARSE_LNG_BUCKET_COUNT - 1)
+    )
+    return latitude_bucket * COARSE_LNG_BUCKET_COUNT + longitude_bucket
+
+
+def geo_tags(latitude: float, longitude: float) -> Dict[str, Any]:
+    """Metadata fields that let the vector index restrict a query to nearby cells."""
+    full_hash = encode_geohash(latitude, longitude, max(GEOHASH_PRECISIONS))
+    tags: Dict[str, Any] = {geohash_field(precision): full_hash[:precision] for precision in GEOHASH_PRECISIONS}
+    tags["coarse_cell"] = coarse_cell_index(latitude, longitude)
+    return tags
+
+
+def _wrap_longitude(longitude: float) -> float:
+    return ((longitude + 180.0) % 360.0) - 180.0
+
+
+def covering_geohashes(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    max_cells: Optional[int] = None,
+) -> Optional[Tuple[int, List[str]]]:
+    """Finest geohash precision whose cells cover the circle's bounding box in at most ``max_cells`` cells.
+
+    Returns None when even the coarsest precision needs more cells, or the circle reaches a
+    pole, in which case the caller should search unfiltered.
+    """
+    max_cells = max_cells or int(os.getenv("NAVISENSE_GEO_FILTER_MAX_CELLS", "24"))
+    latitude_delta = radius_km / KM_PER_DEGREE_LATITUDE
+    if abs(latitude) + latitude_delta >= 90.0:
+        return None
+    longitude_delta = radius_km / (KM_PER_DEGREE_LATITUDE * math.cos(math.radians(latitude)))
+    if longitude_delta >= 180.0:
+        return None
+
+    for precision in sorted(GEOHASH_PRECISIONS, reverse=True):
+        height, width = geohash_cell_size(precision)
+        latitude_steps = int(math.floor(2 * latitude_delta / height)) + 2
+        longitude_steps = int(math.floor(2 * longitude_delta / width)) + 2
+        if latitude_steps * longitude_steps > max_cells * 4:
+            continue
+
+        cells = set()
+        for latitude_step in range(latitude_steps):
+            sample_latitude = min(latitude - latitude_delta + latitude_step * height, latitude + latitude_delta)
+            for longitude_step in range(longitude_steps):
+                sample_longitude = min(longitude - longitude_delta + longitude_step * width, longitude + longitude_delta)
+                cells.add(encode_geohash(sample_latitude, _wrap_longitude(sample_longitude), precision))
+        if len(cells) <= max_cells:
+            return precision, sorted(cells)
+    return None
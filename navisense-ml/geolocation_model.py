@@ -6,7 +6,9 @@ import numpy as np
 import torch
 import torch.nn as nn
 from botocore.exceptions import ClientError
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from backbone import get_artifact_bucket
 
 class GeolocationEstimator(nn.Module):
     """Enhanced Lat/Long regression model for unknown buildings"""
@@ -74,7 +76,7 @@ class GeolocationPredictor:
         
         # Load pre-trained weights if available
         self.model_path = os.getenv("GEOLOCATION_MODEL_PATH", "geolocation_model.pth")
-        self.artifact_bucket = os.getenv("ML_ARTIFACTS_BUCKET") or os.getenv("AWS_S3_BUCKET_NAME")
+        self.artifact_bucket = get_artifact_bucket()
         self.artifact_key = os.getenv(
             "GEOLOCATION_MODEL_S3_KEY",
             "navisense-ml-artifacts/geolocation_model.pth"
@@ -115,6 +117,22 @@ class GeolocationPredictor:
             lat, lng, confidence = self.model(emb_tensor)
             return float(lat[0]), float(lng[0]), float(confidence[0])
 
+    def predict_batch(self, embeddings: np.ndarray) -> List[Tuple[float, float, float]]:
+        """Predict lat/lng/confidence for a stack of embeddings in one forward pass"""
+        if len(embeddings) == 0:
+            return []
+        with torch.no_grad():
+            emb_tensor = torch.FloatTensor(np.asarray(embeddings, dtype=np.float32)).to(self.device)
+            lat, lng, confidence = self.model(emb_tensor)
+            return [
+                (float(row_lat), float(row_lng), float(row_confidence))
+                for row_lat, row_lng, row_confidence in zip(
+                    lat.view(-1).tolist(),
+                    lng.view(-1).tolist(),
+                    confidence.view(-1).tolist(),
+                )
+            ]
+
     def _distance_km_tensor(
         self,
         pred_lat: torch.Tensor,
@@ -0,0 +1,47 @@
+"""Pre-fork serving profile for the NaviSense ML API.
+
+The parent process imports ``app`` once (backbone, NaviSense V3 heads, geolocation
+regressor and architectural features), then forks workers that share those weight
+pages copy-on-write. Run with ``gunicorn -c gunicorn.conf.py app:app``.
+"""
+import gc
+import os
+
+import torch
+
+from backbone import available_cpu_count
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = max(1, int(os.getenv("NAVISENSE_WORKERS", "1")))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("NAVISENSE_WORKER_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("NAVISENSE_WORKER_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# OpenMP thread pools are not fork-safe; keep the parent single-threaded while it
+# loads weights so each worker can build its own pool after the fork.
+torch.set_num_threads(1)
+
+
+def when_ready(server):
+    import app as service
+
+    service.load_cached_artifacts()
+    # Move everything loaded so far into the permanent generation so the cyclic GC
+    # never writes to (and un-shares) the parent's object pages in the workers.
+    gc.collect()
+    gc.freeze()
+    server.log.info(
+        "NaviSense pre-fork parent ready: %s workers sharing %s (%s cpus visible)",
+        workers,
+        service.BACKBONE_MODEL_NAME,
+        available_cpu_count(),
+    )
+
+
+def post_fork(server, worker):
+    import app as service
+
+    torch_threads = service.reinitialize_after_fork(workers)
+    server.log.info("NaviSense worker %s using %s torch threads", worker.pid, torch_threads)
@@ -0,0 +1,215 @@
+import io
+import math
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from env_flags import env_flag
+
+
+ImageSource = Union[bytes, bytearray, memoryview, Image.Image]
+
+
+def build_parity_probe_image(width: int = 1600, height: int = 1200, seed: int = 7) -> bytes:
+    """Deterministic phone-sized JPEG with gradients, edges and noise for preprocessing parity checks."""
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    cols = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+    red = 255.0 * rows * np.ones_like(cols)
+    green = 255.0 * cols * np.ones_like(rows)
+    blue = 127.5 * (1.0 + np.sin(18.0 * rows) * np.cos(24.0 * cols))
+    pixels = np.stack([red, green, blue], axis=-1)
+    pixels[(np.arange(height) // 40 % 2 == 0)[:, None] & (np.arange(width) // 40 % 2 == 0)[None, :]] *= 0.6
+    pixels += rng.normal(0.0, 12.0, size=pixels.shape)
+
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class FastImagePreprocessor:
+    """Reduced-resolution decode and tensor-native resize/crop/normalize matching a CLIP-style processor"""
+
+    def __init__(
+        self,
+        shortest_edge: int,
+        crop_size: Tuple[int, int],
+        image_mean: Tuple[float, float, float],
+        image_std: Tuple[float, float, float],
+        rescale_factor: float = 1.0 / 255.0,
+        draft_oversample: Optional[float] = None,
+    ):
+        self.shortest_edge = int(shortest_edge)
+        self.crop_height, self.crop_width = (int(crop_size[0]), int(crop_size[1]))
+        # Decode at least this much larger than the resize target so the bicubic downscale still
+        # sees enough source pixels to stay close to the full-resolution processor output.
+        self.draft_oversample = max(
+            1.0,
+            float(draft_oversample or os.getenv("NAVISENSE_FAST_PREPROCESS_OVERSAMPLE", "2.0")),
+        )
+        mean = torch.tensor(image_mean, dtype=torch.float32).view(1, 3, 1, 1)
+        std = torch.tensor(image_std, dtype=torch.float32).view(1, 3, 1, 1)
+        # normalize(rescale(x)) == x * (rescale / std) - mean / std, fused into a single addcmul.
+        self._scale = (rescale_factor / std).contiguous()
+        self._bias = (-mean / std).contiguous()
+
+    @classmethod
+    def from_processor(cls, processor: Any) -> Optional["FastImagePreprocessor"]:
+        """Mirror the processor's resize/crop/normalize settings; None when its pipeline differs."""
+        image_processor = getattr(processor, "image_processor", processor)
+        size = getattr(image_processor, "size", None) or {}
+        crop_size = getattr(image_processor, "crop_size", None) or {}
+        shortest_edge = size.get("shortest_edge") if isinstance(size, dict) else None
+
+        if not (
+            shortest_edge
+            and getattr(image_processor, "do_resize", True)
+            and getattr(image_processor, "do_center_crop", False)
+            and getattr(image_processor, "do_rescale", True)
+            and getattr(image_processor, "do_normalize", True)
+            and crop_size.get("height")
+            and crop_size.get("width")
+        ):
+            return None
+
+        resample = getattr(image_processor, "resample", Image.BICUBIC)
+        if int(resample) != int(Image.BICUBIC):
+            return None
+
+        return cls(
+            shortest_edge=shortest_edge,
+            crop_size=(crop_size["height"], crop_size["width"]),
+            image_mean=tuple(image_processor.image_mean),
+            image_std=tuple(image_processor.image_std),
+            rescale_factor=float(getattr(image_processor, "rescale_factor", 1.0 / 255.0)),
+        )
+
+    def _decode_floor(self, width: int, height: int) -> Tuple[int, int]:
+        scale = min(1.0, (self.shortest_edge * self.draft_oversample) / max(min(width, height), 1))
+        return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+    def decode(self, image_bytes: bytes) -> Image.Image:
+        """Decode straight to roughly the oversampled target size instead of full resolution."""
+        image = Image.open(io.BytesIO(image_bytes))
+        floor_width, floor_height = self._decode_floor(*image.size)
+        if image.format == "JPEG":
+            # libjpeg scales by 1/2, 1/4 or 1/8 during the IDCT, never below the requested size.
+            image.draft("RGB", (floor_width, floor_height))
+        image = image.convert("RGB")
+
+        factor = min(image.width // floor_width, image.height // floor_height)
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image
+
+    def _resized_shape(self, height: int, width: int) -> Tuple[int, int]:
+        # Same rounding as transformers' get_resize_output_image_size(default_to_square=False).
+        if height <= width:
+            return self.shortest_edge, int(self.shortest_edge * width / height)
+        return int(self.shortest_edge * height / width), self.shortest_edge
+
+    def preprocess(self, image: ImageSource) -> torch.Tensor:
+        """Return normalized ``pixel_values`` shaped ``[1, 3, crop_height, crop_width]``."""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            image = self.decode(bytes(image))
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        pixels = torch.from_numpy(np.array(image, dtype=np.uint8)).permute(2, 0, 1).unsqueeze(0)
+        height, width = pixels.shape[-2:]
+        target_height, target_width = self._resized_shape(height, width)
+
+        pixels = pixels.to(torch.float32)
+        if (target_height, target_width) != (height, width):
+            # antialias=True follows PIL's support-scaled bicubic filter used by the HF processor;
+            # round/clamp reproduces its uint8 intermediate.
+            pixels = F.interpolate(
+                pixels,
+                size=(target_height, target_width),
+                mode="bicubic",
+                align_corners=False,
+                antialias=True,
+            ).clamp_(0.0, 255.0).round_()
+
+        top = max(0, (target_height - self.crop_height) // 2)
+        left = max(0, (target_width - self.crop_width) // 2)
+        cropped = pixels[:, :, top:top + self.crop_height, left:left + self.crop_width]
+
+        pixel_values = torch.empty((1, 3, self.crop_height, self.crop_width), dtype=torch.float32)
+        torch.addcmul(self._bias, cropped, self._scale, out=pixel_values)
+        return pixel_values
+
+    __call__ = preprocess
+
+    def compare_with_processor(
+        self,
+        processor: Any,
+        image_bytes: bytes,
+        encode_fn: Optional[Callable[[torch.Tensor], torch.Tensor]] = None,
+    ) -> Dict[str, Any]:
+        reference = processor(
+            images=Image.open(io.BytesIO(image_bytes)).convert("RGB"),
+            return_tensors="pt",
+        )["pixel_values"]
+        fast = self.preprocess(image_bytes)
+        if fast.shape != reference.shape:
+            return {
+                "shape_match": False,
+                "fast_shape": list(fast.shape),
+                "reference_shape": list(reference.shape),
+            }
+
+        difference = (fast - reference).abs()
+        report: Dict[str, Any] = {
+            "shape_match": True,
+            "max_abs_diff": round(float(difference.max()), 5),
+            "mean_abs_diff": round(float(difference.mean()), 5),
+        }
+        if encode_fn is not None:
+            with torch.no_grad():
+                features = encode_fn(torch.cat([fast, reference], dim=0)).detach().cpu().float()
+            report["embedding_cosine"] = round(
+                float(F.cosine_similarity(features[0:1], features[1:2]).item()),
+                6,
+            )
+        return report
+
+
+def build_fast_preprocessor(
+    processor: Any,
+    encode_fn: Optional[Callable[[torch.Tensor], torch.Tensor]] = None,
+) -> Tuple[Optional[FastImagePreprocessor], Dict[str, Any]]:
+    """Enable the fast path only when it reproduces the processor's embeddings on a probe image."""
+    enabled = env_flag("NAVISENSE_FAST_PREPROCESS", True)
+    min_cosine = float(os.getenv("NAVISENSE_FAST_PREPROCESS_MIN_COSINE", "0.995"))
+    status: Dict[str, Any] = {"enabled": False, "requested": enabled, "min_cosine": min_cosine}
+    if not enabled:
+        status["reason"] = "disabled via NAVISENSE_FAST_PREPROCESS"
+        return None, status
+
+    preprocessor = FastImagePreprocessor.from_processor(processor)
+    if preprocessor is None:
+        status["reason"] = "processor pipeline is not shortest-edge resize + center crop + bicubic"
+        return None, status
+
+    try:
+        parity = preprocessor.compare_with_processor(processor, build_parity_probe_image(), encode_fn=encode_fn)
+    except Exception as error:
+        status["reason"] = f"parity check failed: {error}"
+        return None, status
+
+    status["parity"] = parity
+    if not parity.get("shape_match"):
+        status["reason"] = "fast path output shape differs from the processor"
+        return None, status
+    if parity.get("embedding_cosine") is not None and parity["embedding_cosine"] < min_cosine:
+        status["reason"] = "embedding cosine against the processor is below the configured minimum"
+        return None, status
+
+    status["enabled"] = True
+    status["draft_oversample"] = preprocessor.draft_oversample
+    return preprocessor, status
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference executor has no free worker or queue slot."""
+
+
+class InferenceExecutor:
+    """Bounded thread pool that keeps blocking inference work off the event loop"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max(
+            1,
+            int(max_workers or os.getenv("NAVISENSE_INFERENCE_WORKERS") or min(4, os.cpu_count() or 1)),
+        )
+        self.max_queue = max(
+            0,
+            int(max_queue if max_queue is not None else os.getenv("NAVISENSE_INFERENCE_MAX_QUEUE", "32")),
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._metrics_lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._queue_waits_ms: deque = deque(maxlen=2048)
+        self._run_times_ms: deque = deque(maxlen=2048)
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's thread pool so each forked worker lazily builds its own."""
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._metrics_lock = threading.Lock()
+        self._in_flight = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is not None:
+            return self._executor
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="navisense-inference",
+                )
+        return self._executor
+
+    def _invoke(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], submitted_at: float) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._metrics_lock:
+                self._failed += 1
+            raise
+        finally:
+            finished_at = time.perf_counter()
+            with self._metrics_lock:
+                self._completed += 1
+                self._queue_waits_ms.append((started_at - submitted_at) * 1000.0)
+                self._run_times_ms.append((finished_at - started_at) * 1000.0)
+
+    def _release_slot(self, _future: Any) -> None:
+        with self._metrics_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn`` on the inference pool, failing fast once every slot is taken."""
+        if not self._slots.acquire(blocking=False):
+            with self._metrics_lock:
+                self._rejected += 1
+            raise InferenceQueueFull(
+                f"Inference queue is full ({self.max_workers} running, {self.max_queue} queued); retry shortly"
+            )
+
+        with self._metrics_lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        try:
+            future = self._get_executor().submit(self._invoke, fn, args, kwargs, time.perf_counter())
+        except Exception:
+            self._release_slot(None)
+            raise
+
+        # The slot is held until the work actually finishes, even if the caller disconnects.
+        future.add_done_callback(self._release_slot)
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _percentile(values: list, percentile: float) -> Optional[float]:
+        if not values:
+            return None
+        return round(float(np.percentile(np.array(values, dtype=np.float64), percentile)), 3)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            queue_waits = list(self._queue_waits_ms)
+            run_times = list(self._run_times_ms)
+            in_flight = self._in_flight
+            submitted = self._submitted
+            completed = self._completed
+            failed = self._failed
+            rejected = self._rejected
+
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "queued": max(0, in_flight - self.max_workers),
+            "submitted": submitted,
+            "completed": completed,
+            "failed": failed,
+            "rejected": rejected,
+            "queue_wait_ms": {
+                "p50": self._percentile(queue_waits, 50),
+                "p95": self._percentile(queue_waits, 95),
+            },
+            "run_ms": {
+                "p50": self._percentile(run_times, 50),
+                "p95": self._percentile(run_times, 95),
+            },
+        }
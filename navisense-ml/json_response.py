@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+
+def _encode_fallback(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "tolist"):
+        # torch tensors and other array-likes
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize prediction payloads, including numpy arrays and scalars, without a jsonable_encoder pass."""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_encode_fallback,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        content,
+        default=_encode_fallback,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class ResponseStats:
+    """Rolling response size and serialization time per endpoint and verbosity label"""
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, deque] = {}
+        self._render_ms: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def record(self, label: str, size_bytes: int, render_ms: float) -> None:
+        with self._lock:
+            if label not in self._sizes:
+                self._sizes[label] = deque(maxlen=self.window)
+                self._render_ms[label] = deque(maxlen=self.window)
+            self._sizes[label].append(size_bytes)
+            self._render_ms[label].append(render_ms)
+            self._counts[label] = self._counts.get(label, 0) + 1
+
+    @staticmethod
+    def _percentile(values: list, percentile: float) -> Optional[float]:
+        if not values:
+            return None
+        return round(float(np.percentile(np.array(values, dtype=np.float64), percentile)), 3)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                label: (list(self._sizes[label]), list(self._render_ms[label]), self._counts[label])
+                for label in sorted(self._sizes)
+            }
+
+        return {
+            "encoder": "orjson" if orjson is not None else "json",
+            "endpoints": {
+                label: {
+                    "responses": count,
+                    "bytes": {
+                        "mean": round(float(np.mean(sizes)), 1) if sizes else None,
+                        "p50": self._percentile(sizes, 50),
+                        "p95": self._percentile(sizes, 95),
+                    },
+                    "serialize_ms": {
+                        "p50": self._percentile(render_times, 50),
+                        "p95": self._percentile(render_times, 95),
+                    },
+                }
+                for label, (sizes, render_times, count) in snapshot.items()
+            },
+        }
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps_json`` that reports its serialization time via Server-Timing"""
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        stats: Optional[ResponseStats] = None,
+        metrics_label: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        self.stats = stats
+        self.metrics_label = metrics_label
+        self.render_ms = 0.0
+        super().__init__(content, status_code=status_code, headers=headers, **kwargs)
+        self.headers.append("Server-Timing", f"serialize;dur={self.render_ms:.2f}")
+
+    def render(self, content: Any) -> bytes:
+        started_at = time.perf_counter()
+        body = dumps_json(content)
+        self.render_ms = (time.perf_counter() - started_at) * 1000.0
+        if self.stats is not None and self.metrics_label:
+            self.stats.record(self.metrics_label, len(body), self.render_ms)
+        return body
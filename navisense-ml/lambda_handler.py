@@ -1,4 +1,76 @@
-from mangum import Mangum
-from app import app
+"""
+AWS Lambda entry point with a cold-start oriented startup profile.
 
-handler = Mangum(app)
+Defaults applied before the app is imported (explicit environment settings win):
+
+- backbone weights load offline from the bundled safetensors snapshot in the layer,
+- model artifacts are read from the layer only (no S3 round trips),
+- Pinecone control-plane checks and the synthetic /predict warmup are skipped.
+
+Cold-start timings (module init and the first invocation) are logged as one JSON line
+and exposed through ``startup_phases_ms`` on /readyz and /model-info.
+"""
+
+import json
+import os
+import time
+
+_init_started_at = time.perf_counter()
+
+LAMBDA_LAYER_DIR = os.getenv("NAVISENSE_LAMBDA_LAYER_DIR", "/opt/navisense")
+
+LAMBDA_PROFILE_DEFAULTS = {
+    "NAVISENSE_STARTUP_PROFILE": "lambda",
+    "NAVISENSE_ARTIFACT_SOURCE": "local",
+    "NAVISENSE_WARMUP": "false",
+    "HF_HUB_OFFLINE": "1",
+    "TRANSFORMERS_OFFLINE": "1",
+}
+
+LAMBDA_LAYER_PATHS = {
+    "NAVISENSE_BACKBONE_LOCAL_DIR": "backbone",
+    "NAVISENSE_V3_ARTIFACT_PATH": "navisense_v3.pth",
+    "GEOLOCATION_MODEL_PATH": "geolocation_model.pth",
+    "ARCHITECTURAL_FEATURES_PATH": "architectural_features.json",
+    "PERCEPTUAL_HASH_INDEX_PATH": "perceptual_hash_index.json",
+    "NAVISENSE_PROMPT_BANK_DIR": "",
+}
+
+for name, value in LAMBDA_PROFILE_DEFAULTS.items():
+    os.environ.setdefault(name, value)
+
+if os.path.isdir(LAMBDA_LAYER_DIR):
+    for name, relative_path in LAMBDA_LAYER_PATHS.items():
+        path = os.path.join(LAMBDA_LAYER_DIR, relative_path) if relative_path else LAMBDA_LAYER_DIR
+        if os.path.exists(path):
+            os.environ.setdefault(name, path)
+
+from mangum import Mangum  # noqa: E402
+
+import app as service  # noqa: E402
+
+# Lifespan events are off below, so run the startup hook explicitly during init.
+service.load_cached_artifacts()
+service.startup_phases_ms["lambda_init"] = round((time.perf_counter() - _init_started_at) * 1000.0, 1)
+
+_asgi_handler = Mangum(service.app, lifespan="off")
+_cold_start_pending = True
+
+
+def handler(event, context):
+    global _cold_start_pending
+    if not _cold_start_pending:
+        return _asgi_handler(event, context)
+
+    _cold_start_pending = False
+    started_at = time.perf_counter()
+    try:
+        return _asgi_handler(event, context)
+    finally:
+        service.startup_phases_ms["first_invocation"] = round((time.perf_counter() - started_at) * 1000.0, 1)
+        print(json.dumps({
+            "event": "navisense_cold_start",
+            "startup_profile": service.STARTUP_PROFILE,
+            "weights_source": service.backbone_info["weights_source"],
+            "startup_phases_ms": service.startup_phases_ms,
+        }))
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+class StageLatencyTracker:
+    """Rolling per-stage latency samples used to predict whether a stage fits a request's budget"""
+
+    def __init__(self, window: int = 512, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._skips: Dict[str, int] = {}
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, duration_ms: float) -> None:
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+            self._samples[stage].append(duration_ms)
+
+    def record_skip(self, stage: str) -> None:
+        with self._lock:
+            self._skips[stage] = self._skips.get(stage, 0) + 1
+
+    def percentile(self, stage: str, percentile: float = 95) -> Optional[float]:
+        """Observed cost of ``stage``; None until enough samples exist to trust it."""
+        with self._lock:
+            samples = list(self._samples.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return float(np.percentile(np.array(samples, dtype=np.float64), percentile))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+            skips = dict(self._skips)
+
+        stages = {}
+        for stage in sorted(set(snapshot) | set(skips)):
+            samples = np.array(snapshot.get(stage, []), dtype=np.float64)
+            stages[stage] = {
+                "samples": int(samples.size),
+                "p50": round(float(np.percentile(samples, 50)), 3) if samples.size else None,
+                "p95": round(float(np.percentile(samples, 95)), 3) if samples.size else None,
+                "skipped": skips.get(stage, 0),
+            }
+        return stages
+
+
+class LatencyBudget:
+    """Request-scoped deadline that times each stage and decides whether optional stages still fit"""
+
+    def __init__(
+        self,
+        tracker: StageLatencyTracker,
+        deadline_ms: Optional[float] = None,
+        started_at: Optional[float] = None,
+    ):
+        self.tracker = tracker
+        self.deadline_ms = float(deadline_ms) if deadline_ms else None
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.stages_ms: Dict[str, float] = {}
+        self.skipped: List[str] = []
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000.0
+
+    def remaining_ms(self) -> Optional[float]:
+        if self.deadline_ms is None:
+            return None
+        return self.deadline_ms - self.elapsed_ms()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - started_at) * 1000.0
+            self.stages_ms[name] = round(self.stages_ms.get(name, 0.0) + duration_ms, 3)
+            self.tracker.record(name, duration_ms)
+
+    def allows(self, stage: str, reserve_for: Iterable[str] = ()) -> bool:
+        """Whether ``stage`` fits after reserving the p95 of the required stages still to run.
+
+        Stages without enough history are allowed so their cost can be learned. A stage that
+        does not fit is recorded as skipped.
+        """
+        remaining_ms = self.remaining_ms()
+        if remaining_ms is None:
+            return True
+
+        cost_ms = self.tracker.percentile(stage)
+        if cost_ms is None:
+            return True
+        reserve_ms = sum(self.tracker.percentile(name) or 0.0 for name in reserve_for)
+        if remaining_ms - reserve_ms >= cost_ms:
+            return True
+
+        self.skipped.append(stage)
+        self.tracker.record_skip(stage)
+        return False
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "deadline_ms": self.deadline_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 3),
+            "stages_ms": dict(self.stages_ms),
+            "skipped_stages": list(self.skipped),
+        }
@@ -1,4 +1,6 @@
+import hashlib
 import io
+import json
 import math
 import os
 import re
@@ -11,6 +13,8 @@ import torch.nn as nn
 import torch.nn.functional as F
 from botocore.exceptions import ClientError
 
+from backbone import get_artifact_bucket
+
 CLIMATE_BANDS = ["tropical", "subtropical", "temperate", "polar"]
 LATITUDE_HEMISPHERES = ["southern", "northern"]
 LONGITUDE_HEMISPHERES = ["western", "eastern"]
@@ -19,6 +23,7 @@ COARSE_CELL_LNG_STEP = 10.0
 COARSE_LAT_BUCKET_COUNT = int(180 / COARSE_CELL_LAT_STEP)
 COARSE_LNG_BUCKET_COUNT = int(360 / COARSE_CELL_LNG_STEP)
 COARSE_CELL_COUNT = COARSE_LAT_BUCKET_COUNT * COARSE_LNG_BUCKET_COUNT
+VERBOSITY_LEVELS = ("minimal", "standard", "debug")
 
 
 def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
@@ -418,12 +423,21 @@ class ZeroShotSceneAnalyzer:
         },
     }
 
-    def __init__(self, clip_model, processor, device: str):
+    def __init__(self, clip_model, processor, device: str, model_name: Optional[str] = None):
         self.clip_model = clip_model
         self.processor = processor
         self.device = device
+        self.model_name = model_name or "unknown"
         self.prompt_cache: Dict[str, Dict[str, torch.Tensor]] = {}
         self.dimension_cache: Dict[str, Dict[str, torch.Tensor]] = {}
+        self.prompt_bank_dir = os.getenv("NAVISENSE_PROMPT_BANK_DIR", ".")
+        self.prompt_bank_source: Optional[str] = None
+        self.artifact_bucket = get_artifact_bucket()
+        self.prompt_bank_s3_prefix = os.getenv(
+            "NAVISENSE_PROMPT_BANK_S3_PREFIX",
+            "navisense-ml-artifacts/prompt-banks",
+        ).rstrip("/")
+        self.s3_client = self._build_s3_client()
         self.max_text_clues = 12
         self.max_clue_length = 96
         self.max_text_fusion_weight = float(os.getenv("NAVISENSE_V3_TEXT_FUSION_WEIGHT", "0.28"))
@@ -462,6 +476,140 @@ class ZeroShotSceneAnalyzer:
         self.dimension_cache[dimension_name] = encoded
         return encoded
 
+    def _build_s3_client(self):
+        if not self.artifact_bucket:
+            return None
+
+        try:
+            return boto3.client(
+                "s3",
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                region_name=os.getenv("AWS_S3_REGION_NAME", "us-east-1"),
+            )
+        except Exception as error:
+            print(f"Failed to initialize prompt bank artifact client: {error}")
+            return None
+
+    @property
+    def text_tower_enabled(self) -> bool:
+        return bool(getattr(self.clip_model, "text_tower_enabled", True))
+
+    def prompt_set_hash(self) -> str:
+        payload = json.dumps(
+            {"groups": self.PROMPT_GROUPS, "dimensions": self.SCORE_DIMENSIONS},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def prompt_bank_path(self) -> str:
+        model_slug = re.sub(r"[^a-z0-9]+", "-", self.model_name.lower()).strip("-") or "default"
+        return os.path.join(self.prompt_bank_dir, f"navisense_prompt_bank_{model_slug}_{self.prompt_set_hash()}.pt")
+
+    def prompt_bank_s3_key(self) -> str:
+        return f"{self.prompt_bank_s3_prefix}/{os.path.basename(self.prompt_bank_path())}"
+
+    def build_prompt_bank(self) -> None:
+        for group_name in self.PROMPT_GROUPS:
+            self._get_prompt_group(group_name)
+        for dimension_name in self.SCORE_DIMENSIONS:
+            self._get_dimension_prompts(dimension_name)
+
+    def save_prompt_bank(self) -> None:
+        try:
+            bank = {
+                "model_name": self.model_name,
+                "prompt_set_hash": self.prompt_set_hash(),
+                "prompt_groups": {
+                    group: {label: vector.cpu() for label, vector in encoded.items()}
+                    for group, encoded in self.prompt_cache.items()
+                },
+                "score_dimensions": {
+                    dimension: {polarity: vector.cpu() for polarity, vector in encoded.items()}
+                    for dimension, encoded in self.dimension_cache.items()
+                },
+            }
+            buffer = io.BytesIO()
+            torch.save(bank, buffer)
+            self._write_local_prompt_bank(buffer.getvalue())
+
+            if self.s3_client and self.artifact_bucket:
+                self.s3_client.put_object(
+                    Bucket=self.artifact_bucket,
+                    Key=self.prompt_bank_s3_key(),
+                    Body=buffer.getvalue(),
+                    ContentType="application/octet-stream",
+                )
+        except Exception as error:
+            print(f"Failed to save zero-shot prompt bank: {error}")
+
+    def _write_local_prompt_bank(self, bank_bytes: bytes) -> None:
+        os.makedirs(self.prompt_bank_dir or ".", exist_ok=True)
+        path = self.prompt_bank_path()
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as bank_file:
+            bank_file.write(bank_bytes)
+        os.replace(temporary_path, path)
+
+    def _apply_prompt_bank(self, bank_bytes: bytes) -> bool:
+        bank = torch.load(io.BytesIO(bank_bytes), map_location=self.device)
+        if bank.get("model_name") != self.model_name or bank.get("prompt_set_hash") != self.prompt_set_hash():
+            return False
+        if set(bank.get("prompt_groups", {})) != set(self.PROMPT_GROUPS) or set(
+            bank.get("score_dimensions", {})
+        ) != set(self.SCORE_DIMENSIONS):
+            return False
+
+        self.prompt_cache = bank["prompt_groups"]
+        self.dimension_cache = bank["score_dimensions"]
+        return True
+
+    def load_prompt_bank(self) -> Optional[str]:
+        """Load the bank from the local cache or the S3 artifact; returns where it came from.
+
+        The file name carries the model and prompt-set hash, so a local copy can never be stale
+        and is checked before S3.
+        """
+        path = self.prompt_bank_path()
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as bank_file:
+                    if self._apply_prompt_bank(bank_file.read()):
+                        return "disk"
+            except Exception as error:
+                print(f"Failed to load zero-shot prompt bank: {error}")
+
+        if self.s3_client and self.artifact_bucket:
+            try:
+                bank_bytes = self.s3_client.get_object(
+                    Bucket=self.artifact_bucket,
+                    Key=self.prompt_bank_s3_key(),
+                )["Body"].read()
+                if self._apply_prompt_bank(bank_bytes):
+                    self._write_local_prompt_bank(bank_bytes)
+                    return "s3"
+            except ClientError as error:
+                error_code = error.response.get("Error", {}).get("Code")
+                if error_code not in {"NoSuchKey", "404"}:
+                    print(f"Failed to load zero-shot prompt bank from S3: {error}")
+            except Exception as error:
+                print(f"Failed to load zero-shot prompt bank from S3: {error}")
+        return None
+
+    def ensure_prompt_bank(self) -> str:
+        """Load the persisted prompt bank, or encode and persist it once when a text tower is available."""
+        source = self.load_prompt_bank()
+        if source:
+            self.prompt_bank_source = source
+        elif not self.text_tower_enabled:
+            self.prompt_bank_source = "unavailable"
+            print("Zero-shot prompt bank missing and the text tower is disabled; scene analysis is unavailable")
+        else:
+            self.build_prompt_bank()
+            self.save_prompt_bank()
+            self.prompt_bank_source = "encoded"
+        return self.prompt_bank_source
+
     @staticmethod
     def _normalize_image_embedding(image_embedding: np.ndarray) -> torch.Tensor:
         tensor = torch.FloatTensor(image_embedding).unsqueeze(0)
@@ -507,7 +655,7 @@ class ZeroShotSceneAnalyzer:
         context_clues: Optional[Sequence[str]] = None,
     ) -> Optional[Dict[str, Any]]:
         clues = self._normalize_text_clues(ocr_text=ocr_text, context_clues=context_clues)
-        if not clues:
+        if not clues or not self.text_tower_enabled:
             return None
 
         prompts = [f"a location clue that says {clue}" for clue in clues]
@@ -618,14 +766,43 @@ class ZeroShotSceneAnalyzer:
         }
 
 
+class QueryContext:
+    """Request-scoped memo of the fused query, prior-head outputs and memory alignment scores.
+
+    One context is shared by ``analyze_scene``, ``predict_geospatial_priors`` and ``predict``
+    so text clue encoding, the prior-head forward pass and memory scoring run once per request.
+    """
+
+    def __init__(
+        self,
+        image_embedding: np.ndarray,
+        ocr_text: Optional[str] = None,
+        context_clues: Optional[Sequence[str]] = None,
+    ):
+        self.image_embedding = image_embedding
+        self.ocr_text = ocr_text
+        self.context_clues = list(context_clues) if context_clues else None
+        self.query: Optional[Dict[str, Any]] = None
+        self.prior_outputs: Optional[Dict[str, Any]] = None
+        self.prior_diagnostics: Dict[int, Dict[str, Any]] = {}
+        self.alignment: Optional[Dict[str, Any]] = None
+
+
 class NaviSenseV3:
-    def __init__(self, clip_model, processor, device: str = "cpu", embedding_dim: int = 512):
+    def __init__(
+        self,
+        clip_model,
+        processor,
+        device: str = "cpu",
+        embedding_dim: int = 512,
+        model_name: Optional[str] = None,
+    ):
         self.device = device
         self.embedding_dim = int(embedding_dim)
         self.model = GeoAlignmentModel(embedding_dim=self.embedding_dim).to(device)
         self.model.eval()
         self.optimizer = torch.optim.AdamW(self.model.parameters(), lr=0.0005, weight_decay=0.01)
-        self.scene_analyzer = ZeroShotSceneAnalyzer(clip_model, processor, device)
+        self.scene_analyzer = ZeroShotSceneAnalyzer(clip_model, processor, device, model_name=model_name)
         self.training_examples: List[Dict[str, Any]] = []
         self.memory_records: List[Dict[str, Any]] = []
         self.memory_location_embeddings: Optional[torch.Tensor] = None
@@ -634,7 +811,7 @@ class NaviSenseV3:
         self.training_metrics: Dict[str, Any] = {}
 
         self.artifact_path = os.getenv("NAVISENSE_V3_ARTIFACT_PATH", "navisense_v3.pth")
-        self.artifact_bucket = os.getenv("ML_ARTIFACTS_BUCKET") or os.getenv("AWS_S3_BUCKET_NAME")
+        self.artifact_bucket = get_artifact_bucket()
         self.artifact_key = os.getenv(
             "NAVISENSE_V3_S3_KEY",
             "navisense-ml-artifacts/navisense_v3.pth",
@@ -745,13 +922,17 @@ class NaviSenseV3:
         raw_scores: torch.Tensor,
         ranking_scores: torch.Tensor,
         top_k: int,
+        records: Optional[List[Dict[str, Any]]] = None,
+        ranked_indices: Optional[List[int]] = None,
     ) -> List[Dict[str, Any]]:
-        ranked_indices = torch.argsort(ranking_scores, descending=True).tolist()
+        records = records if records is not None else self.memory_records
+        if ranked_indices is None:
+            ranked_indices = torch.argsort(ranking_scores, descending=True).tolist()
         matches: List[Dict[str, Any]] = []
         seen = set()
 
         for index in ranked_indices:
-            record = self.memory_records[index]
+            record = records[index]
             key = self._memory_key(record)
             if key in seen:
                 continue
@@ -899,30 +1080,46 @@ class NaviSenseV3:
             "multimodal_context": prepared["multimodal_context"],
         }
 
-    def _predict_prior_state(self, image_embedding: np.ndarray, top_k: int = 5) -> Dict[str, Any]:
-        image_tensor = torch.FloatTensor(image_embedding).unsqueeze(0).to(self.device)
+    def _predict_prior_outputs_batch(self, image_embeddings: np.ndarray) -> List[Dict[str, Any]]:
+        image_tensor = torch.FloatTensor(np.asarray(image_embeddings, dtype=np.float32)).to(self.device)
         with torch.no_grad():
             prior_outputs = self.model.predict_priors(image_tensor)
 
-        coarse_cell_probabilities = torch.softmax(
-            prior_outputs["coarse_cell_logits"],
-            dim=-1,
-        ).squeeze(0).cpu()
-        climate_probabilities = torch.softmax(prior_outputs["climate_logits"], dim=-1).squeeze(0).cpu()
+        coarse_cell_probabilities = torch.softmax(prior_outputs["coarse_cell_logits"], dim=-1).cpu().numpy()
+        climate_probabilities = torch.softmax(prior_outputs["climate_logits"], dim=-1).cpu().numpy()
         latitude_hemisphere_probabilities = torch.softmax(
             prior_outputs["latitude_hemisphere_logits"],
             dim=-1,
-        ).squeeze(0).cpu()
+        ).cpu().numpy()
         longitude_hemisphere_probabilities = torch.softmax(
             prior_outputs["longitude_hemisphere_logits"],
             dim=-1,
-        ).squeeze(0).cpu()
+        ).cpu().numpy()
+        normalized_coordinates = prior_outputs["coordinate_prediction"].cpu().numpy()
 
-        normalized_coordinates = prior_outputs["coordinate_prediction"].squeeze(0).cpu().numpy()
-        predicted_coordinate = {
-            "latitude": float(np.clip(normalized_coordinates[0] * 90.0, -90.0, 90.0)),
-            "longitude": float(np.clip(normalized_coordinates[1] * 180.0, -180.0, 180.0)),
-        }
+        return [
+            {
+                "coarse_cell_probabilities": coarse_cell_probabilities[row],
+                "climate_probabilities": climate_probabilities[row],
+                "latitude_hemisphere_probabilities": latitude_hemisphere_probabilities[row],
+                "longitude_hemisphere_probabilities": longitude_hemisphere_probabilities[row],
+                "predicted_coordinate": {
+                    "latitude": float(np.clip(normalized_coordinates[row][0] * 90.0, -90.0, 90.0)),
+                    "longitude": float(np.clip(normalized_coordinates[row][1] * 180.0, -180.0, 180.0)),
+                },
+            }
+            for row in range(normalized_coordinates.shape[0])
+        ]
+
+    def _predict_prior_outputs(self, image_embedding: np.ndarray) -> Dict[str, Any]:
+        return self._predict_prior_outputs_batch(np.expand_dims(image_embedding, 0))[0]
+
+    def _build_prior_diagnostics(self, prior_outputs: Dict[str, Any], top_k: int = 5) -> Dict[str, Any]:
+        coarse_cell_probabilities = torch.from_numpy(prior_outputs["coarse_cell_probabilities"])
+        climate_probabilities = torch.from_numpy(prior_outputs["climate_probabilities"])
+        latitude_hemisphere_probabilities = torch.from_numpy(prior_outputs["latitude_hemisphere_probabilities"])
+        longitude_hemisphere_probabilities = torch.from_numpy(prior_outputs["longitude_hemisphere_probabilities"])
+        predicted_coordinate = prior_outputs["predicted_coordinate"]
 
         top_cell_count = min(top_k, COARSE_CELL_COUNT)
         coarse_values, coarse_indices = torch.topk(coarse_cell_probabilities, k=top_cell_count)
@@ -954,7 +1151,6 @@ class NaviSenseV3:
 
         latitude_hemisphere_index = int(torch.argmax(latitude_hemisphere_probabilities).item())
         longitude_hemisphere_index = int(torch.argmax(longitude_hemisphere_probabilities).item())
-        climate_index = int(torch.argmax(climate_probabilities).item())
         coarse_entropy = -float(
             torch.sum(
                 coarse_cell_probabilities
@@ -967,46 +1163,174 @@ class NaviSenseV3:
         )
 
         return {
-            "coarse_cell_probabilities": coarse_cell_probabilities.numpy(),
-            "climate_probabilities": climate_probabilities.numpy(),
-            "latitude_hemisphere_probabilities": latitude_hemisphere_probabilities.numpy(),
-            "longitude_hemisphere_probabilities": longitude_hemisphere_probabilities.numpy(),
             "predicted_coordinate": predicted_coordinate,
-            "diagnostics": {
-                "predicted_coordinate": predicted_coordinate,
-                "coarse_cell": top_coarse_cells[0] if top_coarse_cells else None,
-                "top_coarse_cells": top_coarse_cells,
-                "climate_band": top_climate_bands[0] if top_climate_bands else None,
-                "top_climate_bands": top_climate_bands,
-                "latitude_hemisphere": {
-                    "label": LATITUDE_HEMISPHERES[latitude_hemisphere_index],
-                    "score": round(float(latitude_hemisphere_probabilities[latitude_hemisphere_index]), 4),
-                },
-                "longitude_hemisphere": {
-                    "label": LONGITUDE_HEMISPHERES[longitude_hemisphere_index],
-                    "score": round(float(longitude_hemisphere_probabilities[longitude_hemisphere_index]), 4),
-                },
-                "coarse_cell_concentration": round(float(coarse_concentration), 4),
+            "coarse_cell": top_coarse_cells[0] if top_coarse_cells else None,
+            "top_coarse_cells": top_coarse_cells,
+            "climate_band": top_climate_bands[0] if top_climate_bands else None,
+            "top_climate_bands": top_climate_bands,
+            "latitude_hemisphere": {
+                "label": LATITUDE_HEMISPHERES[latitude_hemisphere_index],
+                "score": round(float(latitude_hemisphere_probabilities[latitude_hemisphere_index]), 4),
             },
+            "longitude_hemisphere": {
+                "label": LONGITUDE_HEMISPHERES[longitude_hemisphere_index],
+                "score": round(float(longitude_hemisphere_probabilities[longitude_hemisphere_index]), 4),
+            },
+            "coarse_cell_concentration": round(float(coarse_concentration), 4),
         }
 
+    def _predict_prior_state(self, image_embedding: np.ndarray, top_k: int = 5) -> Dict[str, Any]:
+        prior_outputs = self._predict_prior_outputs(image_embedding)
+        return {
+            **prior_outputs,
+            "diagnostics": self._build_prior_diagnostics(prior_outputs, top_k=top_k),
+        }
+
+    def create_query_context(
+        self,
+        image_embedding: np.ndarray,
+        ocr_text: Optional[str] = None,
+        context_clues: Optional[Sequence[str]] = None,
+    ) -> QueryContext:
+        return QueryContext(image_embedding, ocr_text=ocr_text, context_clues=context_clues)
+
+    def _resolve_query_context(
+        self,
+        image_embedding: np.ndarray,
+        ocr_text: Optional[str],
+        context_clues: Optional[Sequence[str]],
+        context: Optional[QueryContext],
+    ) -> QueryContext:
+        if context is not None:
+            return context
+        return self.create_query_context(image_embedding, ocr_text=ocr_text, context_clues=context_clues)
+
+    def _context_query(self, context: QueryContext) -> Dict[str, Any]:
+        if context.query is None:
+            context.query = self._prepare_query_embedding(
+                context.image_embedding,
+                ocr_text=context.ocr_text,
+                context_clues=context.context_clues,
+            )
+        return context.query
+
+    def describe_multimodal_context(self, context: QueryContext) -> Dict[str, Any]:
+        return self._context_query(context)["multimodal_context"]
+
+    def _context_prior_outputs(self, context: QueryContext) -> Dict[str, Any]:
+        if context.prior_outputs is None:
+            context.prior_outputs = self._predict_prior_outputs(self._context_query(context)["embedding"])
+        return context.prior_outputs
+
+    def _context_prior_diagnostics(self, context: QueryContext, top_k: int) -> Dict[str, Any]:
+        if top_k not in context.prior_diagnostics:
+            context.prior_diagnostics[top_k] = self._build_prior_diagnostics(
+                self._context_prior_outputs(context),
+                top_k=top_k,
+            )
+        return context.prior_diagnostics[top_k]
+
+    def _context_alignment(self, context: QueryContext) -> Optional[Dict[str, Any]]:
+        """Score the query against location memory once; ``predict`` only re-slices the ranking."""
+        if context.alignment is None:
+            self._score_memory_batch([context])
+        return context.alignment
+
+    def _score_memory_batch(self, contexts: Sequence[QueryContext]) -> None:
+        # Snapshot memory so a concurrent /train refresh cannot change it mid-request.
+        records = self.memory_records
+        location_embeddings = self.memory_location_embeddings
+        if location_embeddings is None or not records or location_embeddings.shape[0] != len(records):
+            return
+
+        pending = [context for context in contexts if context.alignment is None]
+        if not pending:
+            return
+
+        self._prime_prior_outputs(pending)
+        prepared_embeddings = np.stack([self._context_query(context)["embedding"] for context in pending])
+        with torch.no_grad():
+            image_tensor = torch.FloatTensor(prepared_embeddings).to(self.device)
+            projected_images = self.model.encode_image(image_tensor)
+            raw_score_rows = (projected_images @ location_embeddings.T).cpu()
+
+        for context, raw_scores in zip(pending, raw_score_rows):
+            # Only the bonus feeds the ranking; the per-record breakdown is built for returned matches.
+            prior_bonuses = torch.tensor(
+                [
+                    round(self._prior_alignment_components(record, context.prior_outputs)["total_bonus"], 4)
+                    for record in records
+                ],
+                dtype=raw_scores.dtype,
+            )
+            fused_scores = raw_scores + prior_bonuses
+
+            context.alignment = {
+                "records": records,
+                "raw_scores": raw_scores,
+                "fused_scores": fused_scores,
+                "ranked_indices": torch.argsort(fused_scores, descending=True).tolist(),
+            }
+
     def predict_geospatial_priors(
         self,
         image_embedding: np.ndarray,
         top_k: int = 5,
         ocr_text: Optional[str] = None,
         context_clues: Optional[Sequence[str]] = None,
+        context: Optional[QueryContext] = None,
     ) -> Dict[str, Any]:
-        query = self._prepare_query_embedding(
-            image_embedding,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
-        )
-        diagnostics = self._predict_prior_state(query["embedding"], top_k=top_k)["diagnostics"]
-        diagnostics["multimodal_context"] = query["multimodal_context"]
+        context = self._resolve_query_context(image_embedding, ocr_text, context_clues, context)
+        diagnostics = dict(self._context_prior_diagnostics(context, top_k))
+        diagnostics["multimodal_context"] = self._context_query(context)["multimodal_context"]
         return diagnostics
 
-    def _prior_alignment_for_record(
+    def predict_coarse_cell_probabilities(
+        self,
+        image_embedding: np.ndarray,
+        ocr_text: Optional[str] = None,
+        context_clues: Optional[Sequence[str]] = None,
+        context: Optional[QueryContext] = None,
+    ) -> np.ndarray:
+        """Prior-head distribution over the ``COARSE_CELL_COUNT`` cells, shared with ``predict`` via the context."""
+        context = self._resolve_query_context(image_embedding, ocr_text, context_clues, context)
+        return self._context_prior_outputs(context)["coarse_cell_probabilities"]
+
+    def _prime_prior_outputs(self, contexts: Sequence[QueryContext]) -> None:
+        pending = [context for context in contexts if context.prior_outputs is None]
+        if not pending:
+            return
+
+        prepared_embeddings = np.stack([self._context_query(context)["embedding"] for context in pending])
+        for context, prior_outputs in zip(pending, self._predict_prior_outputs_batch(prepared_embeddings)):
+            context.prior_outputs = prior_outputs
+
+    def prime_query_contexts(self, contexts: Sequence[QueryContext]) -> None:
+        """Run the prior heads and memory scoring for many contexts in single batched passes."""
+        if not contexts:
+            return
+        self._prime_prior_outputs(contexts)
+        self._score_memory_batch(contexts)
+
+    def predict_batch(
+        self,
+        contexts: Sequence[QueryContext],
+        top_k: int = 5,
+        verbosity: str = "debug",
+    ) -> List[Optional[Dict[str, Any]]]:
+        self.prime_query_contexts(contexts)
+        return [
+            self.predict(
+                context.image_embedding,
+                top_k=top_k,
+                context=context,
+                verbosity=verbosity,
+                include_prior_diagnostics=verbosity != "minimal",
+            )
+            for context in contexts
+        ]
+
+    def _prior_alignment_components(
         self,
         record: Dict[str, Any],
         prior_state: Dict[str, Any],
@@ -1044,14 +1368,31 @@ class NaviSenseV3:
         )
 
         return {
-            "coarse_cell": self._decode_coarse_cell_index(coarse_cell_index)["cell_label"],
-            "coarse_cell_probability": round(coarse_cell_probability, 4),
-            "climate_band_probability": round(climate_probability, 4),
-            "latitude_hemisphere_probability": round(latitude_hemisphere_probability, 4),
-            "longitude_hemisphere_probability": round(longitude_hemisphere_probability, 4),
-            "coordinate_distance_km": round(float(coordinate_distance_km), 2),
-            "coordinate_bonus": round(float(coordinate_bonus), 4),
-            "total_bonus": round(float(total_bonus), 4),
+            "coarse_cell_index": coarse_cell_index,
+            "coarse_cell_probability": coarse_cell_probability,
+            "climate_band_probability": climate_probability,
+            "latitude_hemisphere_probability": latitude_hemisphere_probability,
+            "longitude_hemisphere_probability": longitude_hemisphere_probability,
+            "coordinate_distance_km": float(coordinate_distance_km),
+            "coordinate_bonus": float(coordinate_bonus),
+            "total_bonus": float(total_bonus),
+        }
+
+    def _prior_alignment_for_record(
+        self,
+        record: Dict[str, Any],
+        prior_state: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        components = self._prior_alignment_components(record, prior_state)
+        return {
+            "coarse_cell": self._decode_coarse_cell_index(components["coarse_cell_index"])["cell_label"],
+            "coarse_cell_probability": round(components["coarse_cell_probability"], 4),
+            "climate_band_probability": round(components["climate_band_probability"], 4),
+            "latitude_hemisphere_probability": round(components["latitude_hemisphere_probability"], 4),
+            "longitude_hemisphere_probability": round(components["longitude_hemisphere_probability"], 4),
+            "coordinate_distance_km": round(components["coordinate_distance_km"], 2),
+            "coordinate_bonus": round(components["coordinate_bonus"], 4),
+            "total_bonus": round(components["total_bonus"], 4),
         }
 
     def _confidence_from_scores(self, raw_scores: np.ndarray, weights: np.ndarray) -> float:
@@ -1200,33 +1541,31 @@ class NaviSenseV3:
         top_k: int = 5,
         ocr_text: Optional[str] = None,
         context_clues: Optional[Sequence[str]] = None,
+        context: Optional[QueryContext] = None,
+        verbosity: str = "debug",
+        include_prior_diagnostics: bool = True,
     ) -> Optional[Dict[str, Any]]:
+        """Align the query with location memory.
+
+        ``verbosity`` controls which diagnostics are built: ``minimal`` returns the location and
+        ranked matches only, ``standard`` adds the prior diagnostics and geospatial prior, and
+        ``debug`` adds the per-match prior alignment breakdown and geospatial prior.
+        ``include_prior_diagnostics=False`` leaves the prior diagnostics out at any level.
+        """
         if self.memory_location_embeddings is None or not self.memory_records:
             return None
 
-        query = self._prepare_query_embedding(
-            image_embedding,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
-        )
-        prepared_embedding = query["embedding"]
-        prior_state = self._predict_prior_state(prepared_embedding, top_k=max(top_k, 3))
-        with torch.no_grad():
-            image_tensor = torch.FloatTensor(prepared_embedding).unsqueeze(0).to(self.device)
-            projected_image = self.model.encode_image(image_tensor)
-            raw_scores = (projected_image @ self.memory_location_embeddings.T).squeeze(0)
-
-        fused_scores = raw_scores.clone()
-        prior_alignment_by_index: Dict[int, Dict[str, Any]] = {}
-        for index, record in enumerate(self.memory_records):
-            prior_alignment = self._prior_alignment_for_record(record, prior_state)
-            prior_alignment_by_index[index] = prior_alignment
-            fused_scores[index] = raw_scores[index] + prior_alignment["total_bonus"]
+        context = self._resolve_query_context(image_embedding, ocr_text, context_clues, context)
+        alignment = self._context_alignment(context)
+        if alignment is None:
+            return None
 
         ranked_matches = self._rank_matches(
-            raw_scores,
-            fused_scores,
+            alignment["raw_scores"],
+            alignment["fused_scores"],
             top_k=max(top_k, 1),
+            records=alignment["records"],
+            ranked_indices=alignment["ranked_indices"],
         )
         if not ranked_matches:
             return None
@@ -1243,25 +1582,26 @@ class NaviSenseV3:
         top_matches = []
         for match, weight in zip(ranked_matches, weights):
             record = match["record"]
-            top_matches.append(
-                {
-                    "latitude": record["latitude"],
-                    "longitude": record["longitude"],
-                    "address": record.get("address"),
-                    "businessName": record.get("businessName"),
-                    "source": record.get("source"),
-                    "raw_score": round(float(match["raw_score"]), 4),
-                    "fused_score": round(float(match["fused_score"]), 4),
-                    "weight": round(float(weight), 4),
-                    "prior_alignment": prior_alignment_by_index.get(match["index"]),
-                    "geospatial_prior": self.describe_geospatial_prior(
-                        float(record["latitude"]),
-                        float(record["longitude"]),
-                    ),
-                }
-            )
+            top_match = {
+                "latitude": record["latitude"],
+                "longitude": record["longitude"],
+                "address": record.get("address"),
+                "businessName": record.get("businessName"),
+                "fused_score": round(float(match["fused_score"]), 4),
+                "weight": round(float(weight), 4),
+            }
+            if verbosity != "minimal":
+                top_match["source"] = record.get("source")
+                top_match["raw_score"] = round(float(match["raw_score"]), 4)
+            if verbosity == "debug":
+                top_match["prior_alignment"] = self._prior_alignment_for_record(record, context.prior_outputs)
+                top_match["geospatial_prior"] = self.describe_geospatial_prior(
+                    float(record["latitude"]),
+                    float(record["longitude"]),
+                )
+            top_matches.append(top_match)
 
-        return {
+        prediction = {
             "location": {
                 "latitude": latitude,
                 "longitude": longitude,
@@ -1273,35 +1613,36 @@ class NaviSenseV3:
             "fused_score": round(float(ranked_matches[0]["fused_score"]), 4),
             "score_gate": self.score_gate,
             "top_matches": top_matches,
-            "geospatial_prior": self.describe_geospatial_prior(latitude, longitude),
-            "prior_diagnostics": prior_state["diagnostics"],
-            "multimodal_context": query["multimodal_context"],
         }
+        if verbosity != "minimal":
+            prediction["geospatial_prior"] = self.describe_geospatial_prior(latitude, longitude)
+            if include_prior_diagnostics:
+                prediction["prior_diagnostics"] = self._context_prior_diagnostics(context, max(top_k, 3))
+            prediction["multimodal_context"] = self._context_query(context)["multimodal_context"]
+        return prediction
 
     def analyze_scene(
         self,
         image_embedding: np.ndarray,
         ocr_text: Optional[str] = None,
         context_clues: Optional[Sequence[str]] = None,
+        context: Optional[QueryContext] = None,
+        verbosity: str = "debug",
     ) -> Dict[str, Any]:
-        query = self._prepare_query_embedding(
-            image_embedding,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
-        )
+        context = self._resolve_query_context(image_embedding, ocr_text, context_clues, context)
+        query = self._context_query(context)
         scene_analysis = self.scene_analyzer.analyze_embedding(query["embedding"])
         scene_analysis["multimodal_context"] = query["multimodal_context"]
         scene_analysis["geospatial_priors"] = self.predict_geospatial_priors(
             image_embedding,
             top_k=3,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
+            context=context,
         )
         alignment = self.predict(
             image_embedding,
             top_k=3,
-            ocr_text=ocr_text,
-            context_clues=context_clues,
+            context=context,
+            verbosity="standard" if verbosity == "minimal" else verbosity,
         )
         if alignment:
             scene_analysis["geospatial_alignment"] = {
@@ -1333,9 +1674,10 @@ class NaviSenseV3:
             if len(example.get("embedding", [])) != self.embedding_dim:
                 continue
             embedding = np.array(example["embedding"])
-            prediction = self.predict(embedding, top_k=3)
+            context = self.create_query_context(embedding)
+            prediction = self.predict(embedding, top_k=3, context=context)
             if not prediction:
-                prior_prediction = self.predict_geospatial_priors(embedding, top_k=5)
+                prior_prediction = self.predict_geospatial_priors(embedding, top_k=5, context=context)
             else:
                 error_km = haversine_km(
                     prediction["location"]["latitude"],
@@ -1348,6 +1690,7 @@ class NaviSenseV3:
                 prior_prediction = prediction.get("prior_diagnostics") or self.predict_geospatial_priors(
                     embedding,
                     top_k=5,
+                    context=context,
                 )
 
             if prior_prediction:
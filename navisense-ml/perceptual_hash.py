@@ -0,0 +1,450 @@
+import io
+import json
+import os
+import secrets
+import threading
+import time
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+import numpy as np
+from botocore.exceptions import ClientError
+from PIL import Image
+
+from backbone import get_artifact_bucket
+from env_flags import env_flag
+
+HASH_BITS = 64
+PHASH_SIZE = 32
+PHASH_LOW_FREQUENCY = 8
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    positions = np.arange(size)
+    matrix = np.cos(np.pi * (2 * positions[None, :] + 1) * positions[:, None] / (2 * size))
+    matrix[0, :] *= 1.0 / np.sqrt(2.0)
+    return matrix * np.sqrt(2.0 / size)
+
+
+_PHASH_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def load_hash_image(image_bytes: bytes) -> Image.Image:
+    """Decode only as much resolution as the hashes need (JPEG draft mode)."""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == "JPEG":
+        image.draft("L", (PHASH_SIZE * 4, PHASH_SIZE * 4))
+    return image.convert("L")
+
+
+def compute_phash(image: Image.Image) -> int:
+    pixels = np.asarray(image.resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64)
+    coefficients = _PHASH_DCT @ pixels @ _PHASH_DCT.T
+    low_frequency = coefficients[:PHASH_LOW_FREQUENCY, :PHASH_LOW_FREQUENCY].flatten()
+    # The DC term only tracks overall brightness; leave it out of the median.
+    return _bits_to_int(low_frequency > np.median(low_frequency[1:]))
+
+
+def compute_dhash(image: Image.Image) -> int:
+    pixels = np.asarray(image.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def compute_image_hashes(image_bytes: bytes) -> Tuple[int, int]:
+    image = load_hash_image(image_bytes)
+    return compute_phash(image), compute_dhash(image)
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+class PerceptualHashIndex:
+    """pHash/dHash near-duplicate index over training photos with multi-index Hamming lookup
+
+    Serving workers each hold the index in memory, so additions are persisted as small
+    append-only delta files next to the base snapshot rather than by rewriting the whole
+    index. Every worker applies the deltas it has not seen on a background interval and
+    folds deltas older than ``compact_grace_seconds`` into the base snapshot. Any compaction
+    refreshes first, so a delta is only deleted once every base written afterwards holds it.
+    """
+
+    def __init__(
+        self,
+        max_distance: Optional[int] = None,
+        max_dhash_distance: Optional[int] = None,
+        chunk_count: int = 4,
+        refresh_seconds: Optional[float] = None,
+        compact_after_deltas: Optional[int] = None,
+        compact_grace_seconds: float = 3600.0,
+    ):
+        self.max_distance = int(
+            max_distance if max_distance is not None else os.getenv("NAVISENSE_PHASH_MAX_DISTANCE", "6")
+        )
+        self.max_dhash_distance = int(
+            max_dhash_distance
+            if max_dhash_distance is not None
+            else os.getenv("NAVISENSE_DHASH_MAX_DISTANCE", "10")
+        )
+        self.enabled = env_flag("NAVISENSE_NEAR_DUPLICATE_ENABLED", True)
+        self.refresh_seconds = max(
+            1.0,
+            float(refresh_seconds if refresh_seconds is not None else os.getenv("NAVISENSE_PHASH_REFRESH_SECONDS", "60")),
+        )
+        self.compact_after_deltas = max(
+            1,
+            int(compact_after_deltas or os.getenv("NAVISENSE_PHASH_COMPACT_AFTER_DELTAS", "100")),
+        )
+        self.compact_grace_seconds = compact_grace_seconds
+        self.chunk_count = chunk_count
+        self.chunk_bits = HASH_BITS // chunk_count
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.tables: List[Dict[int, set]] = [{} for _ in range(chunk_count)]
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+        self._applied_deltas: set = set()
+        self._lock = threading.RLock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._deltas_written = 0
+        self._compactions = 0
+        self.artifact_path = os.getenv("PERCEPTUAL_HASH_INDEX_PATH", "perceptual_hash_index.json")
+        self.delta_dir = f"{self.artifact_path}.deltas"
+        self.artifact_bucket = get_artifact_bucket()
+        self.artifact_key = os.getenv(
+            "PERCEPTUAL_HASH_INDEX_S3_KEY",
+            "navisense-ml-artifacts/perceptual_hash_index.json",
+        )
+        self.delta_prefix = f"{self.artifact_key}.deltas/"
+        self.s3_client = self._build_s3_client()
+
+    def _build_s3_client(self):
+        if not self.artifact_bucket:
+            return None
+
+        try:
+            return boto3.client(
+                "s3",
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                region_name=os.getenv("AWS_S3_REGION_NAME", "us-east-1"),
+            )
+        except Exception as error:
+            print(f"Failed to initialize perceptual hash artifact client: {error}")
+            return None
+
+    def reset_after_fork(self) -> None:
+        """Rebuild the S3 client, locks and refresh thread; none of them survive fork."""
+        self.s3_client = self._build_s3_client()
+        self._lock = threading.RLock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_forever,
+                name="navisense-phash-refresh",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_forever(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+                self.maybe_compact()
+            except Exception as error:
+                print(f"Perceptual hash index refresh failed: {error}")
+
+    def _chunks(self, value: int) -> List[int]:
+        mask = (1 << self.chunk_bits) - 1
+        return [(value >> (index * self.chunk_bits)) & mask for index in range(self.chunk_count)]
+
+    def _chunk_neighbours(self, chunk: int, radius: int) -> Iterable[int]:
+        yield chunk
+        for distance in range(1, radius + 1):
+            for positions in combinations(range(self.chunk_bits), distance):
+                flipped = chunk
+                for position in positions:
+                    flipped ^= 1 << position
+                yield flipped
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _index_entry(self, image_hash: str, phash: int, dhash: int, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            if image_hash in self.entries:
+                self._unindex(image_hash, self.entries[image_hash]["phash"])
+            self.entries[image_hash] = {"phash": phash, "dhash": dhash, "metadata": metadata}
+            for table, chunk in zip(self.tables, self._chunks(phash)):
+                table.setdefault(chunk, set()).add(image_hash)
+
+    def add(self, image_hash: str, phash: int, dhash: int, metadata: Dict[str, Any]) -> None:
+        """Index an image; it is persisted by the next ``save_index``."""
+        with self._lock:
+            self._index_entry(image_hash, phash, dhash, metadata)
+            self._unsaved[image_hash] = self.entries[image_hash]
+        self._ensure_worker()
+
+    def _unindex(self, image_hash: str, phash: int) -> None:
+        for table, chunk in zip(self.tables, self._chunks(phash)):
+            bucket = table.get(chunk)
+            if bucket:
+                bucket.discard(image_hash)
+                if not bucket:
+                    del table[chunk]
+
+    def add_image(self, image_hash: str, image_bytes: bytes, metadata: Dict[str, Any]) -> None:
+        phash, dhash = compute_image_hashes(image_bytes)
+        self.add(image_hash, phash, dhash, metadata)
+
+    def lookup(self, phash: int, dhash: int) -> Optional[Dict[str, Any]]:
+        """Closest indexed image within the pHash radius that also agrees on dHash."""
+        # Pigeonhole: a match within max_distance differs by at most
+        # max_distance // chunk_count bits in at least one chunk.
+        chunk_radius = self.max_distance // self.chunk_count
+        with self._lock:
+            candidates = set()
+            for table, chunk in zip(self.tables, self._chunks(phash)):
+                for neighbour in self._chunk_neighbours(chunk, chunk_radius):
+                    candidates.update(table.get(neighbour, ()))
+
+            best: Optional[Dict[str, Any]] = None
+            for image_hash in candidates:
+                entry = self.entries[image_hash]
+                distance = hamming_distance(phash, entry["phash"])
+                if distance > self.max_distance:
+                    continue
+                dhash_distance = hamming_distance(dhash, entry["dhash"])
+                if dhash_distance > self.max_dhash_distance:
+                    continue
+                if best is None or (distance, dhash_distance) < (best["distance"], best["dhash_distance"]):
+                    best = {
+                        "image_hash": image_hash,
+                        "distance": distance,
+                        "dhash_distance": dhash_distance,
+                        "metadata": entry["metadata"],
+                    }
+
+            self._lookups += 1
+            if best is not None:
+                self._hits += 1
+            return best
+
+    def lookup_image(self, image_bytes: bytes) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        self._ensure_worker()
+        if not self.entries:
+            return None
+        return self.lookup(*compute_image_hashes(image_bytes))
+
+    @staticmethod
+    def _encode_entries(entries: Dict[str, Dict[str, Any]]) -> str:
+        return json.dumps({
+            "version": 1,
+            "entries": {
+                image_hash: {
+                    "phash": format(entry["phash"], "016x"),
+                    "dhash": format(entry["dhash"], "016x"),
+                    "metadata": entry["metadata"],
+                }
+                for image_hash, entry in entries.items()
+            },
+        })
+
+    def _apply_payload(self, payload: Dict[str, Any]) -> int:
+        entries = payload.get("entries", {})
+        with self._lock:
+            for image_hash, entry in entries.items():
+                self._index_entry(image_hash, int(entry["phash"], 16), int(entry["dhash"], 16), entry.get("metadata") or {})
+        return len(entries)
+
+    @staticmethod
+    def _delta_age_seconds(name: str) -> float:
+        # Delta names start with their creation time in nanoseconds.
+        try:
+            return time.time() - int(name.split("-", 1)[0]) / 1e9
+        except ValueError:
+            return 0.0
+
+    def _list_deltas(self) -> List[str]:
+        if self.s3_client and self.artifact_bucket:
+            names = []
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.artifact_bucket, Prefix=self.delta_prefix):
+                names.extend(item["Key"][len(self.delta_prefix):] for item in page.get("Contents", []))
+            return sorted(name for name in names if name.endswith(".json"))
+        if not os.path.isdir(self.delta_dir):
+            return []
+        return sorted(name for name in os.listdir(self.delta_dir) if name.endswith(".json"))
+
+    def _read_delta(self, name: str) -> Dict[str, Any]:
+        if self.s3_client and self.artifact_bucket:
+            body = self.s3_client.get_object(Bucket=self.artifact_bucket, Key=self.delta_prefix + name)["Body"]
+            return json.loads(body.read().decode("utf-8"))
+        with open(os.path.join(self.delta_dir, name), "r") as delta_file:
+            return json.load(delta_file)
+
+    def _write_local(self, path: str, payload: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as artifact_file:
+            artifact_file.write(payload)
+        os.replace(temporary_path, path)
+
+    def save_index(self) -> None:
+        """Persist images added since the last save as one new delta; never rewrites other workers' data."""
+        with self._lock:
+            pending = self._unsaved
+            self._unsaved = {}
+        if not pending:
+            return
+
+        name = f"{time.time_ns():020d}-{os.getpid()}-{secrets.token_hex(4)}.json"
+        try:
+            payload = self._encode_entries(pending)
+            if self.s3_client and self.artifact_bucket:
+                self.s3_client.put_object(
+                    Bucket=self.artifact_bucket,
+                    Key=self.delta_prefix + name,
+                    Body=payload.encode("utf-8"),
+                    ContentType="application/json",
+                )
+            else:
+                self._write_local(os.path.join(self.delta_dir, name), payload)
+            with self._lock:
+                self._applied_deltas.add(name)
+                self._deltas_written += 1
+        except Exception as error:
+            with self._lock:
+                # Keep newer in-memory additions for the same hash.
+                self._unsaved = {**pending, **self._unsaved}
+            print(f"Failed to save perceptual hash index delta: {error}")
+
+    def refresh(self) -> int:
+        """Apply deltas written by other workers since the last refresh; returns how many were applied."""
+        applied = 0
+        for name in self._list_deltas():
+            if name in self._applied_deltas:
+                continue
+            try:
+                self._apply_payload(self._read_delta(name))
+            except Exception as error:
+                # Compacted away by another worker; its entries are in the base snapshot.
+                print(f"Skipping perceptual hash delta {name}: {error}")
+            with self._lock:
+                self._applied_deltas.add(name)
+            applied += 1
+        return applied
+
+    def maybe_compact(self) -> bool:
+        """Fold deltas older than the grace period into the base snapshot once enough have piled up.
+
+        Call right after ``refresh``: every delta past the grace period was applied by it, so the
+        base written here holds all of them.
+        """
+        names = [
+            name
+            for name in self._list_deltas()
+            if self._delta_age_seconds(name) >= self.compact_grace_seconds and name in self._applied_deltas
+        ]
+        if len(names) < self.compact_after_deltas:
+            return False
+
+        with self._lock:
+            payload = self._encode_entries(self.entries)
+        if self.s3_client and self.artifact_bucket:
+            self.s3_client.put_object(
+                Bucket=self.artifact_bucket,
+                Key=self.artifact_key,
+                Body=payload.encode("utf-8"),
+                ContentType="application/json",
+            )
+            for offset in range(0, len(names), 1000):
+                self.s3_client.delete_objects(
+                    Bucket=self.artifact_bucket,
+                    Delete={"Objects": [{"Key": self.delta_prefix + name} for name in names[offset:offset + 1000]]},
+                )
+        else:
+            self._write_local(self.artifact_path, payload)
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.delta_dir, name))
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._compactions += 1
+        print(f"Compacted {len(names)} perceptual hash deltas into the base index")
+        return True
+
+    def load_index(self) -> None:
+        try:
+            payload = None
+
+            if self.s3_client and self.artifact_bucket:
+                try:
+                    payload = json.loads(
+                        self.s3_client.get_object(
+                            Bucket=self.artifact_bucket,
+                            Key=self.artifact_key,
+                        )["Body"].read().decode("utf-8")
+                    )
+                    print("Loaded perceptual hash index from S3 artifact")
+                except ClientError as error:
+                    error_code = error.response.get("Error", {}).get("Code")
+                    if error_code not in {"NoSuchKey", "404"}:
+                        print(f"Failed to load perceptual hash index from S3: {error}")
+                except Exception as error:
+                    print(f"Failed to load perceptual hash index from S3: {error}")
+
+            if payload is None and os.path.exists(self.artifact_path):
+                with open(self.artifact_path, "r") as artifact_file:
+                    payload = json.load(artifact_file)
+                print("Loaded perceptual hash index from local artifact")
+
+            with self._lock:
+                self.entries = {}
+                self.tables = [{} for _ in range(self.chunk_count)]
+                self._applied_deltas = set()
+                if payload:
+                    self._apply_payload(payload)
+            deltas = self.refresh()
+            print(f"Loaded perceptual hashes for {len(self.entries)} training images ({deltas} deltas)")
+        except Exception as error:
+            print(f"Failed to load perceptual hash index: {error}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self.entries),
+                "max_distance": self.max_distance,
+                "max_dhash_distance": self.max_dhash_distance,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "hit_rate": round(self._hits / self._lookups, 4) if self._lookups else 0.0,
+                "unsaved_entries": len(self._unsaved),
+                "deltas_applied": len(self._applied_deltas),
+                "deltas_written": self._deltas_written,
+                "compactions": self._compactions,
+            }
@@ -9,6 +9,8 @@ from dotenv import load_dotenv
 import boto3
 
 from backbone import load_backbone
+from geo_cells import geo_tags
+from vector_store import build_vector_store, get_vector_store_backend
 
 load_dotenv()
 
@@ -17,18 +19,21 @@ s3_client = boto3.client('s3',
     aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
     region_name=os.getenv('AWS_S3_REGION_NAME', 'us-east-1'))
 
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+vector_store_backend = get_vector_store_backend()
 model, processor, device, backbone_info = load_backbone()
 index_name = backbone_info["index_name"]
 embedding_dim = int(backbone_info["embedding_dim"])
-if index_name not in pc.list_indexes().names():
-    pc.create_index(
-        name=index_name,
-        dimension=embedding_dim,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-    )
-index = pc.Index(index_name)
+pc = None
+if vector_store_backend == "pinecone":
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    if index_name not in pc.list_indexes().names():
+        pc.create_index(
+            name=index_name,
+            dimension=embedding_dim,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+index = build_vector_store(vector_store_backend, index_name, embedding_dim, pinecone_client=pc)
 
 def generate_embedding(image: Image.Image):
     inputs = processor(images=image, return_tensors="pt").to(device)
@@ -36,7 +41,7 @@ def generate_embedding(image: Image.Image):
         embeddings = model.get_image_features(**inputs)
     return embeddings[0].cpu().numpy().tolist()
 
-print("🔄 Seeding Pinecone with verified locations...")
+print(f"🔄 Seeding {index.provider} index '{index_name}' with verified locations...")
 
 conn = psycopg2.connect(
     host=os.getenv('POSTGRES_HOST'),
@@ -81,12 +86,13 @@ for lat, lng, address, business, image_url in rows:
         img_hash = hashlib.sha256(image_bytes).hexdigest()
         vector_id = f"loc_{img_hash[:16]}"
         
-        # Store in Pinecone
+        # Store in the vector index
         metadata = {"latitude": float(lat), "longitude": float(lng)}
         if address:
             metadata["address"] = address
         if business:
             metadata["businessName"] = business
+        metadata.update(geo_tags(float(lat), float(lng)))
         
         index.upsert(vectors=[(vector_id, embedding, metadata)])
         synced += 1
@@ -98,6 +104,7 @@ for lat, lng, address, business, image_url in rows:
 
 cur.close()
 conn.close()
+index.flush()
 
 print(f"\n✅ Seeding complete: {synced} synced, {failed} failed")
-print(f"📊 Total vectors in Pinecone: {index.describe_index_stats().total_vector_count}")
+print(f"📊 Total vectors in {index.provider}: {index.describe_index_stats().total_vector_count}")
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async computations onto one shared in-flight task"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._metrics_lock = threading.Lock()
+        self._leaders: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+
+    def reset_after_fork(self) -> None:
+        self._in_flight = {}
+        self._metrics_lock = threading.Lock()
+
+    @staticmethod
+    def _consume_result(task: "asyncio.Future[Any]") -> None:
+        # Mark failures as retrieved even when every waiter disconnected before completion.
+        if not task.cancelled():
+            task.exception()
+
+    async def run(self, scope: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` once per ``(scope, key)``; concurrent callers share the same result or error.
+
+        The shared work runs as its own task, so a caller that disconnects does not cancel it
+        for the others still waiting.
+        """
+        flight_key = f"{scope}:{key}"
+        task = self._in_flight.get(flight_key)
+        if task is not None:
+            with self._metrics_lock:
+                self._coalesced[scope] = self._coalesced.get(scope, 0) + 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._in_flight[flight_key] = task
+        with self._metrics_lock:
+            self._leaders[scope] = self._leaders.get(scope, 0) + 1
+
+        def release(finished: "asyncio.Future[Any]") -> None:
+            if self._in_flight.get(flight_key) is finished:
+                del self._in_flight[flight_key]
+            self._consume_result(finished)
+
+        task.add_done_callback(release)
+        return await asyncio.shield(task)
+
+    def metrics(self, scope: Optional[str] = None) -> Dict[str, Any]:
+        with self._metrics_lock:
+            scopes = [scope] if scope else sorted(set(self._leaders) | set(self._coalesced))
+            per_scope = {}
+            for name in scopes:
+                leaders = self._leaders.get(name, 0)
+                coalesced = self._coalesced.get(name, 0)
+                total = leaders + coalesced
+                per_scope[name] = {
+                    "executed": leaders,
+                    "coalesced": coalesced,
+                    "coalesced_ratio": round(coalesced / total, 4) if total else 0.0,
+                }
+
+        return {
+            "in_flight": len(self._in_flight),
+            "scopes": per_scope,
+        }
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+
+class StatsRefresher:
+    """Keep slow backing-store counters in memory, refreshed on an interval by a background thread"""
+
+    def __init__(self, interval_seconds: Optional[float] = None):
+        self.interval_seconds = max(
+            1.0,
+            float(
+                interval_seconds
+                if interval_seconds is not None
+                else os.getenv("NAVISENSE_STATS_REFRESH_SECONDS", "60")
+            ),
+        )
+        self._sources: Dict[str, Callable[[], Any]] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def register(self, name: str, fn: Callable[[], Any]) -> None:
+        self._sources[name] = fn
+        self._refresh_locks[name] = threading.Lock()
+
+    def reset_after_fork(self) -> None:
+        """Keep the parent's snapshots but drop its locks and refresher thread; threads do not survive fork."""
+        self._lock = threading.Lock()
+        self._refresh_locks = {name: threading.Lock() for name in self._sources}
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_forever,
+                name="navisense-stats-refresher",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_forever(self) -> None:
+        while True:
+            time.sleep(self.interval_seconds)
+            for name in list(self._sources):
+                self.refresh(name)
+
+    def refresh(self, name: str) -> None:
+        """Recompute one source; on failure the last good value is kept and the error recorded."""
+        with self._refresh_locks[name]:
+            started_at = time.perf_counter()
+            try:
+                value = self._sources[name]()
+                error = None
+            except Exception as refresh_error:
+                value = None
+                error = f"{type(refresh_error).__name__}: {refresh_error}"
+                print(f"Stats refresh for {name} failed: {error}")
+            duration_ms = round((time.perf_counter() - started_at) * 1000.0, 1)
+
+            with self._lock:
+                snapshot = self._snapshots.setdefault(name, {"value": None, "refreshed_at": None, "refreshes": 0})
+                snapshot["attempted_at"] = time.time()
+                snapshot["refresh_ms"] = duration_ms
+                snapshot["error"] = error
+                if error is None:
+                    snapshot["value"] = value
+                    snapshot["refreshed_at"] = snapshot["attempted_at"]
+                    snapshot["refreshes"] += 1
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Latest value with its staleness; only the very first read of a source waits on the backing store."""
+        self._ensure_worker()
+        with self._lock:
+            seeded = name in self._snapshots
+        if not seeded:
+            self.refresh(name)
+
+        with self._lock:
+            snapshot = dict(self._snapshots[name])
+
+        refreshed_at = snapshot["refreshed_at"]
+        age_seconds = round(time.time() - refreshed_at, 1) if refreshed_at is not None else None
+        return {
+            "value": snapshot["value"],
+            "refreshed_at": (
+                datetime.fromtimestamp(refreshed_at, tz=timezone.utc).isoformat() if refreshed_at is not None else None
+            ),
+            "age_seconds": age_seconds,
+            "stale": age_seconds is None or age_seconds > 2 * self.interval_seconds,
+            "error": snapshot["error"],
+        }
+
+    def value(self, name: str, default: Any = None) -> Any:
+        value = self.get(name)["value"]
+        return default if value is None else value
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshots = {name: dict(snapshot) for name, snapshot in self._snapshots.items()}
+
+        now = time.time()
+        return {
+            "interval_seconds": self.interval_seconds,
+            "sources": {
+                name: {
+                    "age_seconds": round(now - snapshot["refreshed_at"], 1) if snapshot["refreshed_at"] else None,
+                    "refreshes": snapshot["refreshes"],
+                    "last_refresh_ms": snapshot["refresh_ms"],
+                    "error": snapshot["error"],
+                }
+                for name, snapshot in snapshots.items()
+            },
+        }
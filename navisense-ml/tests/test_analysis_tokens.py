@@ -0,0 +1,73 @@
+import base64
+import time
+import zlib
+
+import numpy as np
+import pytest
+
+import analysis_tokens
+from analysis_tokens import AnalysisTokenCodec
+
+
+@pytest.fixture
+def codec():
+    return AnalysisTokenCodec("secret", ttl_seconds=300)
+
+
+def issue(codec):
+    embedding = np.linspace(-1.0, 1.0, 8, dtype=np.float32)
+    return embedding, codec.encode(embedding, "Allen Avenue", ["market", "danfo"], "standard")
+
+
+def test_round_trip(codec):
+    embedding, token = issue(codec)
+    decoded = codec.decode(token)
+
+    assert decoded["ocr_text"] == "Allen Avenue"
+    assert decoded["context_clues"] == ["market", "danfo"]
+    assert decoded["verbosity"] == "standard"
+    assert decoded["embedding"].dtype == np.float32
+    np.testing.assert_allclose(decoded["embedding"], embedding, atol=1e-3)
+
+
+def test_forged_signature_is_rejected(codec):
+    _, token = issue(codec)
+    payload, _, _ = token.partition(".")
+    forged = base64.urlsafe_b64encode(b"\0" * 16).decode("ascii").rstrip("=")
+    assert codec.decode(f"{payload}.{forged}") is None
+    assert codec.decode(payload) is None
+
+
+def test_tampered_payload_is_rejected(codec):
+    _, token = issue(codec)
+    payload, _, signature = token.partition(".")
+    body = zlib.decompress(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    tampered = base64.urlsafe_b64encode(zlib.compress(body.replace(b"Allen", b"Adeola"))).decode("ascii").rstrip("=")
+    assert codec.decode(f"{tampered}.{signature}") is None
+
+
+def test_token_from_another_secret_is_rejected(codec):
+    _, token = issue(AnalysisTokenCodec(b"other secret", ttl_seconds=300))
+    assert codec.decode(token) is None
+
+
+def test_expired_token_is_rejected(codec, monkeypatch):
+    _, token = issue(codec)
+    issued_at = time.time()
+    monkeypatch.setattr(analysis_tokens.time, "time", lambda: issued_at + 299)
+    assert codec.decode(token) is not None
+    monkeypatch.setattr(analysis_tokens.time, "time", lambda: issued_at + 301)
+    assert codec.decode(token) is None
+
+
+@pytest.mark.parametrize("token", ["", ".", "not-a-token", "abc.def", "é.é", "a" * 64 + "." + "b" * 22])
+def test_malformed_tokens_are_rejected(codec, token):
+    assert codec.decode(token) is None
+
+
+def test_signed_garbage_is_rejected(codec):
+    # A valid signature over a payload that is not a token body must not raise.
+    for body in (b"not zlib", zlib.compress(b"\xff\xff\xff\xff"), zlib.compress(b"\x02\0\0\0{}")):
+        payload = base64.urlsafe_b64encode(body).decode("ascii").rstrip("=")
+        signature = base64.urlsafe_b64encode(codec._sign(payload)).decode("ascii").rstrip("=")
+        assert codec.decode(f"{payload}.{signature}") is None
@@ -0,0 +1,62 @@
+import io
+import zipfile
+
+import pytest
+
+from batch_archive import BatchArchiveError, read_batch_archive
+
+LIMITS = {"max_items": 4, "max_image_bytes": 1000, "max_expanded_bytes": 2500}
+
+
+def build_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_reads_images_and_skips_directories_and_hidden_files():
+    archive = build_zip({
+        "a.jpg": b"a" * 10,
+        "nested/b.jpg": b"b" * 20,
+        "nested/": b"",
+        "__MACOSX/._a.jpg": b"x",
+        ".DS_Store": b"x",
+    })
+    entries = read_batch_archive(archive, **LIMITS)
+    assert entries == [
+        {"filename": "a.jpg", "image_bytes": b"a" * 10},
+        {"filename": "nested/b.jpg", "image_bytes": b"b" * 20},
+    ]
+
+
+def test_too_many_images_is_rejected():
+    archive = build_zip({f"{number}.jpg": b"x" for number in range(5)})
+    with pytest.raises(BatchArchiveError, match="more than 4 images") as error:
+        read_batch_archive(archive, **LIMITS)
+    assert error.value.status_code == 413
+
+
+def test_highly_compressible_archive_is_rejected_before_decompressing():
+    # Three 900-byte images of zeros compress to almost nothing but expand past the 2500-byte limit.
+    archive = build_zip({f"{number}.jpg": bytes(900) for number in range(3)})
+    assert len(archive) < 1000
+    with pytest.raises(BatchArchiveError, match="expands to 2700 bytes") as error:
+        read_batch_archive(archive, **LIMITS)
+    assert error.value.status_code == 413
+
+
+def test_oversized_image_becomes_an_item_error():
+    archive = build_zip({"big.jpg": bytes(5000), "small.jpg": b"ok"})
+    entries = read_batch_archive(archive, **LIMITS)
+    assert entries == [
+        {"filename": "big.jpg", "error": "image exceeds 1000 bytes"},
+        {"filename": "small.jpg", "image_bytes": b"ok"},
+    ]
+
+
+def test_invalid_zip_is_a_bad_request():
+    with pytest.raises(BatchArchiveError, match="not a valid zip file") as error:
+        read_batch_archive(b"not a zip", **LIMITS)
+    assert error.value.status_code == 400
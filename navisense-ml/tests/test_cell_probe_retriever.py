@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from cell_probe_retriever import CellProbeRetriever
+from vector_store import LocalVectorStore
+
+
+def probabilities(**cells):
+    values = np.zeros(648)
+    for cell, probability in cells.items():
+        values[int(cell.lstrip("c"))] = probability
+    return values
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4, snapshot_interval_seconds=0)
+    store.upsert([
+        ("a1", [1.0, 0.0, 0.0, 0.0], {"coarse_cell": 1}),
+        ("a2", [0.9, 0.1, 0.0, 0.0], {"coarse_cell": 1}),
+        ("b1", [0.8, 0.2, 0.0, 0.0], {"coarse_cell": 2}),
+        ("c1", [0.99, 0.01, 0.0, 0.0], {"coarse_cell": 3}),
+    ])
+    return store
+
+
+def test_select_cells_stops_at_target_mass_or_max_cells():
+    retriever = CellProbeRetriever(max_cells=3, target_mass=0.8, min_mass=0.5)
+    cells, mass = retriever.select_cells(probabilities(c5=0.6, c7=0.3, c9=0.1))
+    assert (cells, mass) == ([5, 7], pytest.approx(0.9))
+
+    retriever = CellProbeRetriever(max_cells=3, target_mass=0.95, min_mass=0.5)
+    cells, mass = retriever.select_cells(probabilities(c1=0.4, c2=0.3, c3=0.2, c4=0.1))
+    assert (cells, mass) == ([1, 2, 3], pytest.approx(0.9))
+
+
+def test_probes_only_the_selected_cells(store):
+    retriever = CellProbeRetriever(max_cells=1, target_mass=0.9, min_mass=0.5)
+    result, report = retriever.query(store, [1.0, 0.0, 0.0, 0.0], probabilities(c1=0.95, c3=0.05), top_k=2)
+
+    assert [match.id for match in result.matches] == ["a1", "a2"]
+    assert report == {"cells": [1], "probability_mass": 0.95, "probed_matches": 2, "fallback": None}
+
+
+def test_diffuse_prior_searches_the_whole_index(store):
+    retriever = CellProbeRetriever(max_cells=2, target_mass=0.9, min_mass=0.5)
+    result, report = retriever.query(store, [1.0, 0.0, 0.0, 0.0], probabilities(c1=0.2, c2=0.2), top_k=2)
+
+    assert report["fallback"] == "diffuse_prior"
+    assert [match.id for match in result.matches] == ["a1", "c1"]
+
+
+def test_sparse_cells_merge_global_matches(store):
+    retriever = CellProbeRetriever(max_cells=1, target_mass=0.9, min_mass=0.5)
+    result, report = retriever.query(store, [1.0, 0.0, 0.0, 0.0], probabilities(c2=0.9), top_k=3)
+
+    assert report["fallback"] == "sparse_cells"
+    assert report["probed_matches"] == 1
+    # Merged by score, without duplicating the probed match.
+    assert [match.id for match in result.matches] == ["a1", "c1", "a2"]
+
+    metrics = retriever.metrics()
+    assert metrics["queries"] == 1
+    assert metrics["fallbacks"] == {"diffuse_prior": 0, "sparse_cells": 1}
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+import torch
+
+from embedding_batcher import EmbeddingBatcher
+
+
+def preprocess(value):
+    # A list becomes one row; its length stands in for the preprocessed image shape.
+    return torch.tensor([value], dtype=torch.float32)
+
+
+class RecordingEncoder:
+    """Doubles each row and records the batch size of every forward pass"""
+
+    def __init__(self, fail=False):
+        self.batch_sizes = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, pixel_values):
+        with self.lock:
+            self.batch_sizes.append(pixel_values.shape[0])
+        if self.fail:
+            raise RuntimeError("backbone failed")
+        return pixel_values * 2
+
+
+def test_concurrent_submits_share_a_forward_pass():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(preprocess, encoder, max_batch_size=8, max_wait_ms=200)
+
+    embeddings = batcher.embed_many([[float(value), 1.0] for value in range(5)])
+
+    assert embeddings == [[2.0 * value, 2.0] for value in range(5)]
+    assert encoder.batch_sizes == [5]
+    metrics = batcher.metrics()
+    assert metrics["batches_run"] == 1
+    assert metrics["items_embedded"] == 5
+    assert metrics["batch_size_histogram"] == {"5": 1}
+
+
+def test_batches_are_capped_at_max_batch_size():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(preprocess, encoder, max_batch_size=2, max_wait_ms=200)
+
+    embeddings = batcher.embed_many([[float(value)] for value in range(5)])
+
+    assert embeddings == [[2.0 * value] for value in range(5)]
+    assert max(encoder.batch_sizes) <= 2
+    assert sum(encoder.batch_sizes) == 5
+
+
+def test_differently_shaped_inputs_run_as_separate_groups():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(preprocess, encoder, max_batch_size=8, max_wait_ms=200)
+
+    embeddings = batcher.embed_many([[1.0], [2.0, 3.0], [4.0]])
+
+    assert embeddings == [[2.0], [4.0, 6.0], [8.0]]
+    assert sorted(encoder.batch_sizes) == [1, 2]
+
+
+def test_forward_errors_fail_every_future_in_the_batch():
+    batcher = EmbeddingBatcher(preprocess, RecordingEncoder(fail=True), max_batch_size=8, max_wait_ms=200)
+
+    futures = [batcher.submit([float(value)]) for value in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="backbone failed"):
+            future.result(timeout=5)
+    assert batcher.metrics()["failed_batches"] == 1
+
+
+def test_preprocess_errors_fail_only_that_request():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(preprocess, encoder, max_batch_size=8, max_wait_ms=0)
+
+    future = batcher.submit("not an image")
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    assert batcher.embed([1.0]) == [2.0]
+    assert encoder.batch_sizes == [1]
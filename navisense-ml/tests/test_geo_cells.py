@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+from geo_cells import KM_PER_DEGREE_LATITUDE, coarse_cell_index, covering_geohashes, encode_geohash, geo_tags
+
+
+def test_encode_geohash_matches_reference_values():
+    assert encode_geohash(57.64911, 10.40744, 5) == "u4pru"
+    assert encode_geohash(0.0, 0.0, 2) == "s0"
+    assert encode_geohash(-90.0, -180.0, 3) == "000"
+
+
+def test_geo_tags_are_prefixes_of_one_geohash():
+    tags = geo_tags(6.5244, 3.3792)
+    assert tags["geohash5"].startswith(tags["geohash4"])
+    assert tags["geohash4"].startswith(tags["geohash3"])
+    assert tags["geohash3"].startswith(tags["geohash2"])
+    assert tags["coarse_cell"] == coarse_cell_index(6.5244, 3.3792)
+
+
+def points_within(latitude, longitude, radius_km, steps=12):
+    """Centre plus points on the circle, where a cover is most likely to miss."""
+    yield latitude, longitude
+    for step in range(steps):
+        angle = 2 * math.pi * step / steps
+        offset_latitude = radius_km * 0.999 * math.sin(angle) / KM_PER_DEGREE_LATITUDE
+        offset_longitude = radius_km * 0.999 * math.cos(angle) / (
+            KM_PER_DEGREE_LATITUDE * math.cos(math.radians(latitude))
+        )
+        yield latitude + offset_latitude, ((longitude + offset_longitude + 180.0) % 360.0) - 180.0
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius_km",
+    [(6.5244, 3.3792, 2), (6.5244, 3.3792, 25), (51.5, -0.12, 80), (-33.9, 18.4, 300), (10.0, 179.95, 20)],
+)
+def test_covering_geohashes_covers_the_circle(latitude, longitude, radius_km):
+    precision, cells = covering_geohashes(latitude, longitude, radius_km, max_cells=24)
+    assert 1 <= len(cells) <= 24
+    assert all(len(cell) == precision for cell in cells)
+    for point_latitude, point_longitude in points_within(latitude, longitude, radius_km):
+        assert encode_geohash(point_latitude, point_longitude, precision) in cells
+
+
+def test_covering_geohashes_prefers_the_finest_precision_that_fits():
+    fine_precision, _ = covering_geohashes(6.5244, 3.3792, 2, max_cells=24)
+    coarse_precision, _ = covering_geohashes(6.5244, 3.3792, 300, max_cells=24)
+    assert fine_precision == 5
+    assert coarse_precision < fine_precision
+
+
+def test_covering_geohashes_gives_up_near_poles_and_for_huge_radii():
+    assert covering_geohashes(89.9, 0.0, 50) is None
+    assert covering_geohashes(0.0, 0.0, 5000, max_cells=4) is None
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from latency_budget import LatencyBudget, StageLatencyTracker
+
+
+def trained_tracker(**stages):
+    tracker = StageLatencyTracker(window=8, min_samples=3)
+    for stage, duration_ms in stages.items():
+        for _ in range(3):
+            tracker.record(stage, duration_ms)
+    return tracker
+
+
+def budget_with(tracker, deadline_ms, elapsed_ms=0.0):
+    return LatencyBudget(tracker, deadline_ms=deadline_ms, started_at=time.perf_counter() - elapsed_ms / 1000.0)
+
+
+def test_percentile_waits_for_min_samples_and_keeps_a_rolling_window():
+    tracker = StageLatencyTracker(window=4, min_samples=3)
+    tracker.record("scene", 10.0)
+    tracker.record("scene", 20.0)
+    assert tracker.percentile("scene") is None
+    assert tracker.percentile("never_seen") is None
+
+    tracker.record("scene", 30.0)
+    assert tracker.percentile("scene", 50) == pytest.approx(20.0)
+
+    for _ in range(4):
+        tracker.record("scene", 100.0)
+    assert tracker.percentile("scene", 50) == pytest.approx(100.0)
+
+
+def test_without_a_deadline_every_stage_runs():
+    budget = LatencyBudget(trained_tracker(scene=10_000.0))
+    assert budget.remaining_ms() is None
+    assert budget.allows("scene")
+    assert budget.skipped == []
+
+
+def test_unlearned_stages_are_allowed_so_their_cost_can_be_measured():
+    budget = budget_with(StageLatencyTracker(min_samples=3), deadline_ms=100, elapsed_ms=99)
+    assert budget.allows("scene")
+
+
+def test_optional_stage_is_skipped_when_it_would_eat_the_reserve():
+    tracker = trained_tracker(scene=40.0, matching=50.0)
+
+    assert budget_with(tracker, deadline_ms=1000, elapsed_ms=100).allows("scene", reserve_for=["matching"])
+
+    # 80ms left: scene (40) fits alone but not alongside the 50ms matching that must still run.
+    budget = budget_with(tracker, deadline_ms=1000, elapsed_ms=920)
+    assert budget.allows("scene")
+    assert not budget.allows("scene", reserve_for=["matching"])
+    assert budget.skipped == ["scene"]
+    assert tracker.metrics()["scene"]["skipped"] == 1
+
+
+def test_stage_timing_accumulates_into_the_report_and_tracker():
+    tracker = StageLatencyTracker(min_samples=1)
+    budget = LatencyBudget(tracker, deadline_ms=5000)
+    for _ in range(2):
+        with budget.stage("fetch"):
+            time.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        with budget.stage("match"):
+            raise RuntimeError("index unavailable")
+
+    report = budget.report()
+    assert report["deadline_ms"] == 5000.0
+    assert report["stages_ms"]["fetch"] >= 20.0
+    assert "match" in report["stages_ms"]
+    assert report["elapsed_ms"] >= report["stages_ms"]["fetch"]
+    assert report["skipped_stages"] == []
+
+    metrics = tracker.metrics()
+    assert metrics["fetch"]["samples"] == 2
+    assert metrics["match"]["samples"] == 1
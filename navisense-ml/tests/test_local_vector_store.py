@@ -0,0 +1,199 @@
+import time
+
+import numpy as np
+import pytest
+
+from vector_store import LocalVectorStore
+
+
+def make_store(directory, dimension=4, **kwargs):
+    kwargs.setdefault("snapshot_interval_seconds", 0)
+    return LocalVectorStore(str(directory), dimension, **kwargs)
+
+
+def test_upsert_query_and_fetch(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([
+        ("a", [1.0, 0.0, 0.0, 0.0], {"city": "Lagos"}),
+        {"id": "b", "values": [0.0, 2.0, 0.0, 0.0], "metadata": {"city": "Abuja"}},
+    ])
+
+    matches = store.query([0.9, 0.1, 0.0, 0.0], top_k=2, include_metadata=True).matches
+    assert [match.id for match in matches] == ["a", "b"]
+    assert matches[0].metadata == {"city": "Lagos"}
+    assert matches[0].values is None
+
+    fetched = store.fetch(["b", "missing"]).vectors
+    assert list(fetched) == ["b"]
+    assert fetched["b"].values == pytest.approx([0.0, 2.0, 0.0, 0.0])
+
+
+def test_upsert_replaces_existing_id(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {"version": 1})])
+    store.upsert([("a", [0.0, 1.0, 0.0, 0.0], {"version": 2})])
+
+    assert store.describe_index_stats().total_vector_count == 1
+    fetched = store.fetch(["a"]).vectors["a"]
+    assert fetched.metadata == {"version": 2}
+    assert fetched.values == pytest.approx([0.0, 1.0, 0.0, 0.0])
+
+
+def test_rejects_wrong_dimension(tmp_path):
+    store = make_store(tmp_path)
+    with pytest.raises(ValueError):
+        store.upsert([("a", [1.0, 0.0], {})])
+
+
+def test_delete_and_update_metadata(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {"city": "Lagos"}), ("b", [0.0, 1.0, 0.0, 0.0], {})])
+
+    assert store.delete(["a", "missing"]) == {"deleted_count": 1}
+    assert [match.id for match in store.query([1.0, 0.0, 0.0, 0.0], top_k=5).matches] == ["b"]
+    assert store.update_metadata("a", {"city": "Kano"}) == {"updated_count": 0}
+    assert store.update_metadata("b", {"city": "Kano"}) == {"updated_count": 1}
+    assert store.fetch(["b"]).vectors["b"].metadata == {"city": "Kano"}
+    assert store.metrics()["tombstones"] == 1
+
+
+def test_snapshot_restore_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([
+        ("a", [1.0, 0.0, 0.0, 0.0], {"city": "Lagos"}),
+        ("b", [0.0, 3.0, 0.0, 0.0], {"city": "Abuja"}),
+        ("c", [0.0, 0.0, 1.0, 0.0], {}),
+    ])
+    store.delete(["c"])
+    store.manifest_extra = {"owner": "test"}
+    assert store.dirty()
+    store.flush()
+    assert not store.dirty()
+
+    restored = make_store(tmp_path)
+    assert restored.restore()
+    assert sorted(restored.list_ids()) == ["a", "b"]
+    assert restored.fetch(["b"]).vectors["b"].values == pytest.approx([0.0, 3.0, 0.0, 0.0])
+    assert restored.fetch(["a"]).vectors["a"].metadata == {"city": "Lagos"}
+    assert restored.manifest["owner"] == "test"
+    assert not restored.dirty()
+
+    # The restored matrix is memory-mapped read-only; the first write must copy it.
+    restored.upsert([("d", [0.0, 0.0, 0.0, 1.0], {})])
+    assert restored.describe_index_stats().total_vector_count == 3
+
+
+def test_restore_without_snapshot(tmp_path):
+    assert not make_store(tmp_path).restore()
+
+
+def test_restore_rejects_dimension_mismatch(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {})])
+    store.flush()
+
+    with pytest.raises(ValueError):
+        make_store(tmp_path, dimension=8).restore()
+
+
+def test_restore_rejects_inconsistent_snapshot(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {}), ("b", [0.0, 1.0, 0.0, 0.0], {})])
+    store.flush()
+    snapshot_dir = tmp_path / store.manifest["snapshot"]
+    (snapshot_dir / "ids.json").write_text('["a"]')
+
+    with pytest.raises(ValueError):
+        make_store(tmp_path).restore()
+
+
+def test_write_during_snapshot_keeps_store_dirty(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {})])
+    prune_snapshots = store._prune_snapshots
+
+    def write_then_prune(keep):
+        # Runs after the live rows were copied, like a concurrent request's write would.
+        store.upsert([("b", [0.0, 1.0, 0.0, 0.0], {})])
+        prune_snapshots(keep)
+
+    store._prune_snapshots = write_then_prune
+    store.flush()
+    assert store.dirty()
+
+    store._prune_snapshots = prune_snapshots
+    store.flush()
+    restored = make_store(tmp_path)
+    restored.restore()
+    assert sorted(restored.list_ids()) == ["a", "b"]
+
+
+def test_background_snapshot_persists_writes(tmp_path):
+    store = make_store(tmp_path, snapshot_interval_seconds=0.05)
+    store.upsert([("a", [1.0, 0.0, 0.0, 0.0], {})])
+
+    deadline = time.monotonic() + 5.0
+    while store.dirty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not store.dirty()
+    restored = make_store(tmp_path)
+    assert restored.restore()
+    assert list(restored.list_ids()) == ["a"]
+
+
+def test_metadata_filters(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([
+        ("a", [1.0, 0.0, 0.0, 0.0], {"coarse_cell": 1, "geohash3": "s0d"}),
+        ("b", [0.9, 0.1, 0.0, 0.0], {"coarse_cell": 2, "geohash3": "s0d"}),
+        ("c", [0.8, 0.2, 0.0, 0.0], {"coarse_cell": 3, "geohash3": "s0e"}),
+        ("d", [0.7, 0.3, 0.0, 0.0], {}),
+    ])
+    query = [1.0, 0.0, 0.0, 0.0]
+
+    def ids(metadata_filter):
+        return [match.id for match in store.query(query, top_k=10, filter=metadata_filter).matches]
+
+    assert ids({"coarse_cell": {"$in": [2, 3]}}) == ["b", "c"]
+    assert ids({"coarse_cell": {"$eq": 1}}) == ["a"]
+    assert ids({"geohash3": "s0d"}) == ["a", "b"]
+    assert ids({"geohash3": "s0d", "coarse_cell": {"$in": [2, 3]}}) == ["b"]
+    assert ids({"coarse_cell": {"$in": [9]}}) == []
+
+    # Partitions are rebuilt after writes.
+    store.update_metadata("d", {"coarse_cell": 3})
+    store.delete(["c"])
+    assert ids({"coarse_cell": {"$in": [3]}}) == ["d"]
+
+    with pytest.raises(ValueError):
+        store.query(query, filter={"coarse_cell": {"$gt": 1}})
+
+
+def clustered_vectors(count, dimension, clusters, seed):
+    generator = np.random.default_rng(seed)
+    centers = generator.normal(size=(clusters, dimension))
+    labels = generator.integers(0, clusters, size=count)
+    return centers[labels] + 0.2 * generator.normal(size=(count, dimension))
+
+
+def test_ivf_recall_against_exact_search(tmp_path):
+    dimension = 16
+    vectors = clustered_vectors(2000, dimension, clusters=20, seed=0)
+    records = [(f"v{row}", vector.tolist(), {}) for row, vector in enumerate(vectors)]
+
+    exact = make_store(tmp_path / "exact", dimension, min_train_size=10 ** 9)
+    exact.upsert(records)
+    ivf = make_store(tmp_path / "ivf", dimension, nlist=20, nprobe=4, min_train_size=1000)
+    ivf.upsert(records)
+    assert ivf.metrics()["nlist"] == 20
+
+    queries = vectors[:50] + 0.05 * np.random.default_rng(1).normal(size=(50, dimension))
+    recalls = []
+    for query in queries:
+        expected = {match.id for match in exact.query(query, top_k=10).matches}
+        found = {match.id for match in ivf.query(query, top_k=10).matches}
+        recalls.append(len(expected & found) / 10)
+
+    assert np.mean(recalls) >= 0.9
+    # nprobe=4 of 20 lists should scan well under the whole corpus.
+    assert ivf.metrics()["mean_probed_rows"] < 0.5 * len(records)
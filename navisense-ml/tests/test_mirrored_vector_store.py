@@ -0,0 +1,100 @@
+from vector_store import LocalVectorStore, MirroredVectorStore
+
+
+class RemoteStore(LocalVectorStore):
+    """Stands in for the remote index and counts the fetches that reach it"""
+
+    def __init__(self, directory):
+        super().__init__(str(directory), 4, snapshot_interval_seconds=0)
+        self.fetched_ids = []
+
+    def fetch(self, ids):
+        self.fetched_ids.extend(ids)
+        return super().fetch(ids)
+
+
+def make_mirror(directory):
+    return LocalVectorStore(str(directory), 4, dtype="float16", min_train_size=2 ** 62, snapshot_interval_seconds=0)
+
+
+def make_stores(tmp_path, verify_interval_seconds=0.0):
+    remote = RemoteStore(tmp_path / "remote")
+    remote.upsert([
+        ("a", [1.0, 0.0, 0.0, 0.0], {"city": "Lagos"}),
+        ("b", [0.0, 1.0, 0.0, 0.0], {"city": "Abuja"}),
+    ])
+    mirror = make_mirror(tmp_path / "mirror")
+    return remote, mirror, MirroredVectorStore(remote, mirror, verify_interval_seconds=verify_interval_seconds)
+
+
+def test_query_backfills_mirror_misses(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+
+    matches = store.query([1.0, 0.0, 0.0, 0.0], top_k=2, include_metadata=True, include_values=True).matches
+    assert [match.id for match in matches] == ["a", "b"]
+    assert matches[0].metadata == {"city": "Lagos"}
+    assert matches[0].values == [1.0, 0.0, 0.0, 0.0]
+    assert sorted(remote.fetched_ids) == ["a", "b"]
+    assert sorted(mirror.list_ids()) == ["a", "b"]
+
+    # Hydrated from the mirror from now on.
+    remote.fetched_ids.clear()
+    store.query([1.0, 0.0, 0.0, 0.0], top_k=2, include_metadata=True)
+    assert remote.fetched_ids == []
+
+
+def test_writes_go_to_both_stores(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+    store.upsert([("c", [0.0, 0.0, 1.0, 0.0], {"city": "Kano"})])
+    store.update_metadata("c", {"verified": True})
+    store.delete(["a"])
+
+    for backend in (remote, mirror):
+        assert "a" not in set(backend.list_ids())
+        assert backend.fetch(["c"]).vectors["c"].metadata == {"city": "Kano", "verified": True}
+
+
+def test_incomplete_mirror_falls_back_to_remote_on_fetch(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+    assert not store.mirror_authoritative()
+
+    assert list(store.fetch(["a"]).vectors) == ["a"]
+    assert remote.fetched_ids == ["a"]
+
+
+def test_synced_mirror_is_authoritative_until_counts_diverge(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+    assert store.sync_mirror() == {"copied": 2, "removed": 0, "mirrored": 2}
+    assert store.mirror_authoritative()
+
+    remote.fetched_ids.clear()
+    assert store.fetch(["missing"]).vectors == {}
+    assert remote.fetched_ids == []
+
+    # A write the mirror never saw (e.g. from another worker) makes misses untrustworthy again.
+    remote.upsert([("c", [0.0, 0.0, 1.0, 0.0], {})])
+    assert not store.mirror_authoritative()
+    assert list(store.fetch(["c"]).vectors) == ["c"]
+    assert remote.fetched_ids == ["c"]
+
+
+def test_sync_removes_stale_ids_and_records_completeness_in_the_snapshot(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+    mirror.upsert([("stale", [0.0, 0.0, 0.0, 1.0], {})])
+    assert store.sync_mirror()["removed"] == 1
+
+    restored_mirror = make_mirror(tmp_path / "mirror")
+    assert restored_mirror.restore()
+    restored = MirroredVectorStore(remote, restored_mirror, verify_interval_seconds=0.0)
+    assert restored.state["complete"]
+    assert sorted(restored_mirror.list_ids()) == ["a", "b"]
+    assert restored.mirror_authoritative()
+
+
+def test_flush_does_not_rewrite_the_mirror(tmp_path):
+    remote, mirror, store = make_stores(tmp_path)
+    store.upsert([("c", [0.0, 0.0, 1.0, 0.0], {})])
+    store.flush()
+
+    assert mirror.dirty()
+    assert not make_mirror(tmp_path / "mirror").restore()
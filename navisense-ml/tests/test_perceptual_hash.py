@@ -0,0 +1,113 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from perceptual_hash import PerceptualHashIndex, compute_image_hashes
+
+
+@pytest.fixture
+def artifact_path(tmp_path, monkeypatch):
+    path = tmp_path / "perceptual_hash_index.json"
+    monkeypatch.setenv("NAVISENSE_ARTIFACT_SOURCE", "local")
+    monkeypatch.setenv("PERCEPTUAL_HASH_INDEX_PATH", str(path))
+    return path
+
+
+def make_index(**kwargs):
+    # A long refresh interval keeps the background thread out of the way; tests refresh explicitly.
+    kwargs.setdefault("refresh_seconds", 3600)
+    return PerceptualHashIndex(max_distance=6, max_dhash_distance=10, **kwargs)
+
+
+def flip_bits(value, *positions):
+    for position in positions:
+        value ^= 1 << position
+    return value
+
+
+def encode_image(pixels, format="PNG", quality=95):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).convert("RGB").save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+def scene(seed):
+    generator = np.random.default_rng(seed)
+    coarse = generator.integers(0, 256, size=(8, 8))
+    return np.kron(coarse, np.ones((32, 32)))
+
+
+def test_lookup_respects_phash_and_dhash_radii(artifact_path):
+    index = make_index()
+    phash, dhash = 0x0123456789ABCDEF, 0xFEDCBA9876543210
+    index.add("original", phash, dhash, {"city": "Lagos"})
+
+    match = index.lookup(flip_bits(phash, 0, 17, 40), dhash)
+    assert match["image_hash"] == "original"
+    assert match["distance"] == 3
+    assert match["metadata"] == {"city": "Lagos"}
+
+    assert index.lookup(flip_bits(phash, *range(0, 56, 8)), dhash) is None
+    assert index.lookup(phash, flip_bits(dhash, *range(11))) is None
+
+
+def test_lookup_prefers_the_closest_entry(artifact_path):
+    index = make_index()
+    phash, dhash = 0x0F0F0F0F0F0F0F0F, 0x1234
+    index.add("far", flip_bits(phash, 1, 2, 3), dhash, {})
+    index.add("near", flip_bits(phash, 1), dhash, {})
+    assert index.lookup(phash, dhash)["image_hash"] == "near"
+
+
+def test_recompressed_image_is_a_near_duplicate(artifact_path):
+    index = make_index()
+    index.add_image("original", encode_image(scene(0)), {"city": "Lagos"})
+
+    match = index.lookup_image(encode_image(scene(0), format="JPEG", quality=60))
+    assert match is not None and match["image_hash"] == "original"
+    assert index.lookup_image(encode_image(scene(1))) is None
+    assert index.metrics()["hits"] == 1
+
+
+def test_hashes_are_stable_across_encodings():
+    png_hashes = compute_image_hashes(encode_image(scene(2)))
+    jpeg_hashes = compute_image_hashes(encode_image(scene(2), format="JPEG", quality=90))
+    assert bin(png_hashes[0] ^ jpeg_hashes[0]).count("1") <= 6
+
+
+def test_deltas_round_trip_between_workers_and_compact(artifact_path):
+    first = make_index(compact_after_deltas=2, compact_grace_seconds=0)
+    first.load_index()
+    first.add("a", 0x1, 0x1, {"source": "first"})
+    first.save_index()
+    first.save_index()  # Nothing new: no empty delta.
+    assert len(os.listdir(f"{artifact_path}.deltas")) == 1
+
+    second = make_index(compact_after_deltas=2, compact_grace_seconds=0)
+    second.load_index()
+    assert second.lookup(0x1, 0x1)["metadata"] == {"source": "first"}
+    second.add("b", 0xFFFF0000FFFF0000, 0x2, {"source": "second"})
+    second.save_index()
+
+    # Each worker only applies what it has not seen yet.
+    assert first.refresh() == 1
+    assert first.refresh() == 0
+    assert first.lookup(0xFFFF0000FFFF0000, 0x2)["image_hash"] == "b"
+
+    assert first.maybe_compact()
+    assert os.listdir(f"{artifact_path}.deltas") == []
+    restarted = make_index()
+    restarted.load_index()
+    assert sorted(restarted.entries) == ["a", "b"]
+
+
+def test_compaction_waits_for_enough_old_deltas(artifact_path):
+    index = make_index(compact_after_deltas=1, compact_grace_seconds=3600)
+    index.load_index()
+    index.add("a", 0x1, 0x1, {})
+    index.save_index()
+    assert not index.maybe_compact()
+    assert len(os.listdir(f"{artifact_path}.deltas")) == 1
@@ -0,0 +1,128 @@
+import time
+
+from vector_write_buffer import VectorWriteBuffer
+
+
+class RecordingStore:
+    """Index double that records calls and fails the first ``failures`` of them"""
+
+    def __init__(self, failures=0, fail_ids=()):
+        self.calls = []
+        self.failures = failures
+        self.fail_ids = set(fail_ids)
+
+    def _call(self, operation, ids):
+        self.calls.append((operation, ids))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("index unavailable")
+        if self.fail_ids & set(ids):
+            raise RuntimeError("rejected")
+
+    def upsert(self, vectors):
+        self._call("upsert", [record[0] for record in vectors])
+
+    def delete(self, ids):
+        self._call("delete", list(ids))
+
+
+def make_buffer(store, **kwargs):
+    kwargs.setdefault("chunk_size", 10)
+    kwargs.setdefault("max_age_seconds", 60)
+    kwargs.setdefault("retry_backoff_seconds", 0)
+    return VectorWriteBuffer(store, **kwargs)
+
+
+def test_coalesces_writes_per_id():
+    store = RecordingStore()
+    buffer = make_buffer(store)
+    buffer.upsert("a", [1.0], {"version": 1})
+    buffer.upsert("a", [2.0], {"version": 2})
+    buffer.upsert("b", [1.0], {})
+    buffer.delete(["b", "c"])
+    assert buffer.pending() == 3
+
+    report = buffer.flush()
+    assert report == {"upserted": 1, "deleted": 2, "failed_ids": []}
+    assert store.calls == [("upsert", ["a"]), ("delete", ["b", "c"])]
+    assert buffer.pending() == 0
+
+
+def test_flushes_full_chunks_on_enqueue():
+    store = RecordingStore()
+    buffer = make_buffer(store, chunk_size=2)
+    buffer.upsert("a", [1.0], {})
+    assert store.calls == []
+    buffer.upsert("b", [1.0], {})
+    assert store.calls == [("upsert", ["a", "b"])]
+
+
+def test_retries_transient_failures():
+    store = RecordingStore(failures=2)
+    buffer = make_buffer(store, max_retries=3)
+    buffer.upsert("a", [1.0], {})
+
+    assert buffer.flush() == {"upserted": 1, "deleted": 0, "failed_ids": []}
+    assert len(store.calls) == 3
+    assert buffer.metrics()["retries"] == 2
+
+
+def test_reports_failed_ids_after_retries():
+    store = RecordingStore(fail_ids={"bad"})
+    buffer = make_buffer(store, max_retries=2)
+    for vector_id in ("ok1", "ok2", "bad", "ok3"):
+        buffer.upsert(vector_id, [1.0], {})
+    # Two chunks: the one holding "bad" fails as a whole.
+    buffer.chunk_size = 2
+
+    report = buffer.flush()
+    assert report["upserted"] == 2
+    assert sorted(report["failed_ids"]) == ["bad", "ok3"]
+    assert sorted(buffer.metrics()["recent_failed_ids"]) == ["bad", "ok3"]
+
+
+def test_scoped_buffers_report_only_their_writes():
+    store = RecordingStore(fail_ids={"theirs"})
+    shared = make_buffer(store, max_retries=1)
+    mine = shared.scoped()
+    theirs = shared.scoped()
+    mine.upsert("mine", [1.0], {})
+    theirs.upsert("theirs", [1.0], {})
+
+    assert theirs.flush()["failed_ids"] == ["theirs"]
+    assert mine.flush() == {"upserted": 1, "deleted": 0, "failed_ids": []}
+    # Counts roll up into the shared buffer's metrics.
+    metrics = shared.metrics()
+    assert metrics["upserted"] == 1
+    assert metrics["recent_failed_ids"] == ["theirs"]
+
+
+def test_age_thread_flushes_scoped_buffers_and_owner_sees_the_report():
+    store = RecordingStore()
+    shared = make_buffer(store, max_age_seconds=0.1)
+    scoped = shared.scoped()
+    scoped.upsert("a", [1.0], {})
+    assert shared.pending() == 1
+
+    deadline = time.monotonic() + 5.0
+    while shared.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The owner's flush waits for the age thread's send and reports it.
+    assert scoped.flush() == {"upserted": 1, "deleted": 0, "failed_ids": []}
+    assert store.calls == [("upsert", ["a"])]
+    assert scoped.flush() == {"upserted": 0, "deleted": 0, "failed_ids": []}
+
+
+def test_flush_all_covers_live_scoped_buffers():
+    store = RecordingStore()
+    shared = make_buffer(store)
+    first = shared.scoped()
+    second = shared.scoped()
+    first.upsert("a", [1.0], {})
+    second.delete(["b"])
+
+    assert shared.flush_all() == {"upserted": 1, "deleted": 1, "failed_ids": []}
+    assert shared.pending() == 0
+    # Their owners still learn what was sent for them.
+    assert first.flush()["upserted"] == 1
+    assert second.flush()["deleted"] == 1
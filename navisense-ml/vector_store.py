@@ -0,0 +1,919 @@
+import json
+import os
+import secrets
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from env_flags import env_flag
+
+
+SUPPORTED_VECTOR_STORES = ("pinecone", "local")
+LOCAL_STORE_VERSION = 2
+SNAPSHOTS_DIR = "snapshots"
+SNAPSHOT_PRUNE_MIN_AGE_SECONDS = 600
+
+
+def get_vector_store_backend() -> str:
+    return os.getenv("NAVISENSE_VECTOR_STORE", "pinecone").strip().lower()
+
+
+class VectorMatch:
+    """One stored vector in the Pinecone response shape (``id``, ``score``, ``values``, ``metadata``)"""
+
+    __slots__ = ("id", "score", "values", "metadata")
+
+    def __init__(
+        self,
+        id: str,
+        score: float = 0.0,
+        values: Optional[List[float]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.id = id
+        self.score = score
+        self.values = values
+        self.metadata = metadata
+
+
+class QueryResult:
+    """Similarity query response with Pinecone-compatible ``matches``"""
+
+    def __init__(self, matches: List[VectorMatch]):
+        self.matches = matches
+
+
+class FetchResult:
+    """Fetch response with Pinecone-compatible ``vectors`` keyed by id"""
+
+    def __init__(self, vectors: Dict[str, VectorMatch]):
+        self.vectors = vectors
+
+
+class IndexStats:
+    """Index statistics with Pinecone-compatible ``total_vector_count``"""
+
+    def __init__(self, total_vector_count: int, dimension: Optional[int] = None):
+        self.total_vector_count = total_vector_count
+        self.dimension = dimension
+
+
+class VectorStore:
+    """Similarity index interface shared by the Pinecone and local in-process backends
+
+    Methods mirror the Pinecone ``Index`` calls the service already makes, so callers can
+    swap backends without touching the response handling.
+    """
+
+    backend = "base"
+    provider = "unknown"
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        raise NotImplementedError
+
+    def fetch(self, ids: List[str]) -> Any:
+        raise NotImplementedError
+
+    def upsert(self, vectors: Iterable[Any]) -> Any:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> Any:
+        raise NotImplementedError
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> Any:
+        """Merge ``metadata`` into one stored vector's metadata without rewriting its values."""
+        raise NotImplementedError
+
+    def describe_index_stats(self) -> Any:
+        raise NotImplementedError
+
+    def list_ids(self, prefix: str = "") -> Iterator[str]:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist pending local state; remote backends are durable per call."""
+
+    def reset_after_fork(self) -> None:
+        """Rebuild per-process clients and locks in a freshly forked worker."""
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+
+class PineconeVectorStore(VectorStore):
+    """Pinecone serverless index behind the VectorStore interface"""
+
+    backend = "pinecone"
+    provider = "Pinecone"
+
+    def __init__(self, client: Any, index_name: str):
+        self.client = client
+        self.index_name = index_name
+        self.index = client.Index(index_name)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self.index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=include_metadata,
+            include_values=include_values,
+            filter=filter,
+        )
+
+    def fetch(self, ids: List[str]) -> Any:
+        return self.index.fetch(ids=ids)
+
+    def upsert(self, vectors: Iterable[Any]) -> Any:
+        return self.index.upsert(vectors=list(vectors))
+
+    def delete(self, ids: List[str]) -> Any:
+        return self.index.delete(ids=ids)
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> Any:
+        return self.index.update(id=vector_id, set_metadata=metadata)
+
+    def describe_index_stats(self) -> Any:
+        return self.index.describe_index_stats()
+
+    def list_ids(self, prefix: str = "") -> Iterator[str]:
+        # Serverless indexes page through ids by prefix.
+        for page in self.index.list(prefix=prefix):
+            yield from page
+
+    def reset_after_fork(self) -> None:
+        # The Pinecone client's HTTP connection pool is not fork-safe.
+        self.index = self.client.Index(self.index_name)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "index_name": self.index_name}
+
+
+def _normalize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+    return matrix / np.clip(norms, 1e-12, None)[:, None], norms
+
+
+def _parse_vector_record(record: Any) -> Tuple[str, List[float], Dict[str, Any]]:
+    if isinstance(record, dict):
+        return str(record["id"]), record["values"], dict(record.get("metadata") or {})
+    vector_id, values = record[0], record[1]
+    metadata = record[2] if len(record) > 2 else None
+    return str(vector_id), values, dict(metadata or {})
+
+
+class LocalVectorStore(VectorStore):
+    """In-process IVF-Flat cosine index over a memory-mapped vector matrix with a persistent metadata table
+
+    Rows are stored L2-normalized (float32 or float16) next to their float32 norms, so
+    scoring is one matrix-vector product and stored values are reconstructed as
+    ``row * norm``. Below ``min_train_size`` live vectors, or before the coarse quantizer
+    is trained, queries scan every row exactly. Deletes tombstone rows until the next
+    snapshot compacts them away.
+
+    A snapshot rewrites the whole corpus, so writes only mark the store dirty: a background
+    thread snapshots at most once per ``snapshot_interval_seconds`` (0 disables it), and
+    ``flush`` persists immediately for shutdown and bulk jobs.
+    """
+
+    backend = "local"
+    provider = "Local IVF-Flat"
+
+    def __init__(
+        self,
+        directory: str,
+        dimension: int,
+        dtype: Optional[str] = None,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        min_train_size: Optional[int] = None,
+        snapshot_interval_seconds: Optional[float] = None,
+    ):
+        self.directory = directory
+        self.dimension = int(dimension)
+        self.dtype = np.dtype((dtype or os.getenv("NAVISENSE_LOCAL_INDEX_DTYPE", "float32")).strip().lower())
+        if self.dtype not in (np.dtype(np.float32), np.dtype(np.float16)):
+            raise ValueError(f"Local vector index dtype must be float32 or float16, got {self.dtype}")
+        # 0 sizes the coarse quantizer at roughly sqrt(n) lists when it is trained.
+        self.nlist = max(0, int(nlist if nlist is not None else os.getenv("NAVISENSE_LOCAL_INDEX_NLIST", "0")))
+        self.nprobe = max(1, int(nprobe if nprobe is not None else os.getenv("NAVISENSE_LOCAL_INDEX_NPROBE", "8")))
+        self.min_train_size = max(
+            1,
+            int(min_train_size if min_train_size is not None else os.getenv("NAVISENSE_LOCAL_INDEX_MIN_TRAIN", "4096")),
+        )
+        self.snapshot_interval_seconds = max(
+            0.0,
+            float(
+                snapshot_interval_seconds
+                if snapshot_interval_seconds is not None
+                else os.getenv("NAVISENSE_LOCAL_INDEX_SNAPSHOT_SECONDS", "30")
+            ),
+        )
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._matrix = np.zeros((0, self.dimension), dtype=self.dtype)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._count = 0
+        self._ids: List[Optional[str]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._list_rows: Optional[List[np.ndarray]] = None
+        self._field_rows: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._trained_at_count = 0
+        # Bumped under ``_lock`` by every write; the store is dirty until a snapshot of this generation lands.
+        self._generation = 0
+        self._snapshot_generation = 0
+        self._queries = 0
+        self._probed_rows = 0
+        self._last_snapshot: Optional[float] = None
+        self._manifest: Dict[str, Any] = {}
+        # Caller-owned fields stored in every manifest this store writes, e.g. the mirror's sync state.
+        self.manifest_extra: Dict[str, Any] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def restore(self) -> bool:
+        """Load the snapshot the manifest points to; the vector matrix stays memory-mapped until the first write."""
+        manifest_path = self._path("manifest.json")
+        if not os.path.exists(manifest_path):
+            return False
+
+        with open(manifest_path, "r") as manifest_file:
+            manifest = json.load(manifest_file)
+        if int(manifest.get("dimension", 0)) != self.dimension:
+            raise ValueError(
+                f"Local vector index at {self.directory} has dimension {manifest.get('dimension')}, "
+                f"expected {self.dimension}"
+            )
+        # Version 1 snapshots wrote their files next to the manifest.
+        snapshot_dir = self._path(manifest["snapshot"]) if manifest.get("snapshot") else self.directory
+
+        def snapshot_path(name: str) -> str:
+            return os.path.join(snapshot_dir, name)
+
+        matrix = np.load(snapshot_path("vectors.npy"), mmap_mode="r")
+        norms = np.load(snapshot_path("norms.npy"))
+        with open(snapshot_path("ids.json"), "r") as ids_file:
+            ids = json.load(ids_file)
+        with open(snapshot_path("metadata.json"), "r") as metadata_file:
+            metadata = json.load(metadata_file)
+
+        centroids = None
+        assignments = np.full(len(ids), -1, dtype=np.int32)
+        if int(manifest.get("nlist", 0)) and os.path.exists(snapshot_path("centroids.npy")):
+            centroids = np.load(snapshot_path("centroids.npy"))
+            assignments = np.load(snapshot_path("assignments.npy")).astype(np.int32)
+
+        # Rows are matched to ids by position; any disagreement would silently mislabel matches.
+        count = int(manifest.get("count", len(ids)))
+        if (
+            matrix.shape != (count, self.dimension)
+            or norms.shape != (count,)
+            or len(ids) != count
+            or assignments.shape != (count,)
+            or (centroids is not None and centroids.shape != (int(manifest["nlist"]), self.dimension))
+        ):
+            raise ValueError(
+                f"Local vector index snapshot at {snapshot_dir} is inconsistent: manifest count {count}, "
+                f"vectors {matrix.shape}, norms {norms.shape}, ids {len(ids)}, assignments {assignments.shape}"
+            )
+
+        with self._lock:
+            if matrix.dtype != self.dtype:
+                matrix = matrix.astype(self.dtype)
+            self._matrix = matrix
+            self._norms = norms.astype(np.float32)
+            self._live = np.ones(len(ids), dtype=bool)
+            self._assignments = assignments
+            self._count = len(ids)
+            self._ids = list(ids)
+            self._row_by_id = {vector_id: row for row, vector_id in enumerate(ids)}
+            self._metadata = metadata
+            self._centroids = centroids
+            self._list_rows = None
+            self._field_rows = {}
+            self._trained_at_count = int(manifest.get("trained_at_count", 0))
+            self._manifest = manifest
+            self._snapshot_generation = self._generation
+        print(f"Restored local vector index with {len(ids)} vectors from {snapshot_dir}")
+        return True
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """Manifest of the snapshot last restored or written by this store."""
+        return dict(self._manifest)
+
+    def _write_atomic(self, name: str, writer) -> None:
+        path = self._path(name)
+        # Unique per call: the mirror sync and a background snapshot may race in one process.
+        temporary_path = f"{path}.{os.getpid()}-{secrets.token_hex(4)}.tmp"
+        writer(temporary_path)
+        os.replace(temporary_path, path)
+
+    def _prune_snapshots(self, keep: str) -> None:
+        # The previous snapshot may still be memory-mapped by a reader that restored it; keep one spare.
+        # Recent directories are left alone too: another process (a mirror in a sibling worker) may
+        # still be writing one.
+        snapshots_dir = self._path(SNAPSHOTS_DIR)
+        versions = sorted(name for name in os.listdir(snapshots_dir) if os.path.join(SNAPSHOTS_DIR, name) != keep)
+        for name in versions[:-1]:
+            try:
+                age_seconds = time.time() - int(name.split("-", 1)[0]) / 1e9
+            except ValueError:
+                continue
+            if age_seconds >= SNAPSHOT_PRUNE_MIN_AGE_SECONDS:
+                shutil.rmtree(os.path.join(snapshots_dir, name), ignore_errors=True)
+
+    def snapshot(self) -> None:
+        """Write a snapshot now even if nothing changed, e.g. to record new ``manifest_extra`` fields."""
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Write a compacted copy of the live rows into a new versioned directory, then point the manifest at it.
+
+        The manifest swap is the only in-place write, so a crash leaves either the old or the new
+        snapshot fully intact. ``manifest_extra`` fields are recorded with this snapshot.
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._live[:self._count])
+            matrix = np.ascontiguousarray(self._matrix[rows])
+            norms = self._norms[rows].copy()
+            ids = [self._ids[row] for row in rows]
+            metadata = {vector_id: self._metadata.get(vector_id, {}) for vector_id in ids}
+            centroids = None if self._centroids is None else self._centroids.copy()
+            assignments = self._assignments[rows].copy()
+            trained_at_count = self._trained_at_count
+            generation = self._generation
+
+        snapshot_name = os.path.join(SNAPSHOTS_DIR, f"{time.time_ns():020d}-{os.getpid()}")
+        snapshot_dir = self._path(snapshot_name)
+        os.makedirs(snapshot_dir)
+
+        def save_array(name: str, array: np.ndarray) -> None:
+            with open(os.path.join(snapshot_dir, name), "wb") as array_file:
+                np.save(array_file, array)
+
+        def save_json(name: str, payload: Any) -> None:
+            with open(os.path.join(snapshot_dir, name), "w") as json_file:
+                json.dump(payload, json_file, separators=(",", ":"))
+
+        save_array("vectors.npy", matrix)
+        save_array("norms.npy", norms)
+        save_json("ids.json", ids)
+        save_json("metadata.json", metadata)
+        if centroids is not None:
+            save_array("centroids.npy", centroids)
+            save_array("assignments.npy", assignments)
+
+        manifest = {
+            **self.manifest_extra,
+            "version": LOCAL_STORE_VERSION,
+            "snapshot": snapshot_name,
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "count": len(ids),
+            "nlist": 0 if centroids is None else int(centroids.shape[0]),
+            "trained_at_count": trained_at_count,
+        }
+
+        def write_manifest(path: str) -> None:
+            with open(path, "w") as manifest_file:
+                json.dump(manifest, manifest_file, separators=(",", ":"))
+
+        self._write_atomic("manifest.json", write_manifest)
+        self._prune_snapshots(keep=snapshot_name)
+        self._manifest = manifest
+        self._last_snapshot = time.time()
+        with self._lock:
+            # Writes that landed after the copy above are not in this snapshot and keep the store dirty.
+            self._snapshot_generation = max(self._snapshot_generation, generation)
+
+    def dirty(self) -> bool:
+        with self._lock:
+            return self._generation != self._snapshot_generation
+
+    def flush(self) -> None:
+        with self._snapshot_lock:
+            if self.dirty():
+                self._write_snapshot()
+
+    def _ensure_worker(self) -> None:
+        if not self.snapshot_interval_seconds:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_forever,
+                name="navisense-vector-snapshots",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_forever(self) -> None:
+        while True:
+            time.sleep(self.snapshot_interval_seconds)
+            try:
+                self.flush()
+            except Exception as error:
+                # Still dirty: the next interval (or the shutdown flush) tries again.
+                print(f"Local vector index snapshot failed: {error}")
+
+    def _reserve(self, extra_rows: int) -> None:
+        required = self._count + extra_rows
+        capacity = self._matrix.shape[0]
+        if required <= capacity and self._matrix.flags.writeable:
+            return
+
+        new_capacity = max(required, capacity * 2, 64)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=self.dtype)
+        matrix[:self._count] = self._matrix[:self._count]
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        norms[:self._count] = self._norms[:self._count]
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:self._count] = self._live[:self._count]
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:self._count] = self._assignments[:self._count]
+        self._matrix, self._norms, self._live, self._assignments = matrix, norms, live, assignments
+
+    def upsert(self, vectors: Iterable[Any]) -> Dict[str, int]:
+        records = [_parse_vector_record(record) for record in vectors]
+        if not records:
+            return {"upserted_count": 0}
+
+        values = np.asarray([record[1] for record in records], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got shape {values.shape}")
+        normalized, norms = _normalize_rows(values)
+
+        with self._lock:
+            self._reserve(len(records))
+            for (vector_id, _, metadata), row_values, norm in zip(records, normalized, norms):
+                row = self._row_by_id.get(vector_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._ids.append(vector_id)
+                    self._row_by_id[vector_id] = row
+                self._matrix[row] = row_values
+                self._norms[row] = norm
+                self._live[row] = True
+                self._assignments[row] = self._assign(row_values[None, :])[0] if self._centroids is not None else -1
+                self._metadata[vector_id] = metadata
+            self._list_rows = None
+            self._field_rows = {}
+            self._generation += 1
+        self.maybe_train()
+        self._ensure_worker()
+        return {"upserted_count": len(records)}
+
+    def delete(self, ids: List[str]) -> Dict[str, int]:
+        deleted = 0
+        with self._lock:
+            for vector_id in ids:
+                row = self._row_by_id.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._live[row] = False
+                self._ids[row] = None
+                self._metadata.pop(vector_id, None)
+                deleted += 1
+            if deleted:
+                self._list_rows = None
+                self._field_rows = {}
+                self._generation += 1
+        if deleted:
+            self._ensure_worker()
+        return {"deleted_count": deleted}
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> Dict[str, int]:
+        with self._lock:
+            if vector_id not in self._row_by_id:
+                return {"updated_count": 0}
+            self._metadata[vector_id] = {**self._metadata.get(vector_id, {}), **metadata}
+            self._field_rows = {}
+            self._generation += 1
+        self._ensure_worker()
+        return {"updated_count": 1}
+
+    def _assign(self, rows: np.ndarray) -> np.ndarray:
+        return np.argmax(rows.astype(np.float32) @ self._centroids.T, axis=1).astype(np.int32)
+
+    def live_count(self) -> int:
+        return int(np.count_nonzero(self._live[:self._count]))
+
+    def maybe_train(self) -> None:
+        """(Re)train the coarse quantizer once the corpus reaches the training size or doubles since the last run."""
+        live_count = self.live_count()
+        if live_count < self.min_train_size:
+            return
+        if self._centroids is not None and live_count < 2 * self._trained_at_count:
+            return
+        self.train()
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Spherical k-means over a sample of the live rows, then reassign every row to its nearest list."""
+        with self._lock:
+            rows = np.flatnonzero(self._live[:self._count])
+            if rows.size == 0:
+                return
+            nlist = self.nlist or int(np.clip(np.sqrt(rows.size), 1, 4096))
+            nlist = min(nlist, rows.size)
+            generator = np.random.default_rng(seed)
+            sample_rows = generator.choice(rows, size=min(rows.size, nlist * 256), replace=False)
+            sample = self._matrix[np.sort(sample_rows)].astype(np.float32)
+
+        centroids = sample[generator.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(nlist):
+                members = sample[labels == list_id]
+                if members.size:
+                    centroid = members.sum(axis=0)
+                    centroids[list_id] = centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+
+        with self._lock:
+            self._centroids = centroids
+            for start in range(0, self._count, 65536):
+                stop = min(start + 65536, self._count)
+                self._assignments[start:stop] = self._assign(self._matrix[start:stop])
+            self._trained_at_count = self.live_count()
+            self._list_rows = None
+            self._field_rows = {}
+            self._generation += 1
+        print(f"Trained local vector index coarse quantizer: {nlist} lists over {rows.size} vectors")
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        with self._lock:
+            if self._list_rows is None:
+                live_rows = np.flatnonzero(self._live[:self._count])
+                labels = self._assignments[live_rows]
+                order = np.argsort(labels, kind="stable")
+                boundaries = np.searchsorted(labels[order], np.arange(self._centroids.shape[0] + 1))
+                self._list_rows = [
+                    live_rows[order[boundaries[list_id]:boundaries[list_id + 1]]]
+                    for list_id in range(self._centroids.shape[0])
+                ]
+            return self._list_rows
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.flatnonzero(self._live[:self._count])
+
+        lists = self._inverted_lists()
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        return np.concatenate([lists[list_id] for list_id in probes]) if len(probes) else np.zeros(0, dtype=np.int64)
+
+    @staticmethod
+    def _filter_values(condition: Any) -> List[Any]:
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                return [condition["$eq"]]
+            if "$in" in condition:
+                return list(condition["$in"])
+            raise ValueError(f"Unsupported metadata filter operators: {sorted(condition)}")
+        return [condition]
+
+    def _rows_for_field(self, field: str) -> Dict[Any, np.ndarray]:
+        # Rebuilt lazily after writes, like the inverted lists.
+        if field not in self._field_rows:
+            grouped: Dict[Any, List[int]] = {}
+            for row in np.flatnonzero(self._live[:self._count]):
+                value = self._metadata.get(self._ids[row], {}).get(field)
+                if value is not None:
+                    grouped.setdefault(value, []).append(int(row))
+            self._field_rows[field] = {value: np.asarray(rows, dtype=np.int64) for value, rows in grouped.items()}
+        return self._field_rows[field]
+
+    def _filtered_rows(self, metadata_filter: Dict[str, Any]) -> np.ndarray:
+        """Rows matching every field condition: ``value``, ``{"$eq": value}`` or ``{"$in": [...]}``."""
+        rows: Optional[np.ndarray] = None
+        for field, condition in metadata_filter.items():
+            partitions = self._rows_for_field(field)
+            parts = [partitions[value] for value in self._filter_values(condition) if value in partitions]
+            matched = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows if rows is not None else np.flatnonzero(self._live[:self._count])
+
+    def _build_match(self, row: int, score: float, include_values: bool, include_metadata: bool) -> Optional[VectorMatch]:
+        vector_id = self._ids[row]
+        if vector_id is None:
+            return None
+        return VectorMatch(
+            id=vector_id,
+            score=score,
+            values=(self._matrix[row].astype(np.float32) * self._norms[row]).tolist() if include_values else None,
+            metadata=self._metadata.get(vector_id, {}) if include_metadata else None,
+        )
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> QueryResult:
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        # Appends may swap in a larger matrix; rows below the captured count stay valid in this one.
+        with self._lock:
+            matrix = self._matrix
+            # A metadata filter selects its partitions directly and scans them exactly.
+            rows = self._filtered_rows(filter) if filter else self._candidate_rows(query)
+
+        top_k = max(1, int(top_k))
+        if rows.size == 0:
+            return QueryResult([])
+        scores = matrix[rows].astype(np.float32) @ query
+        top = np.argpartition(-scores, top_k - 1)[:top_k] if scores.size > top_k else np.arange(scores.size)
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for position in top:
+            match = self._build_match(int(rows[position]), float(scores[position]), include_values, include_metadata)
+            if match is not None:
+                matches.append(match)
+        self._queries += 1
+        self._probed_rows += int(rows.size)
+        return QueryResult(matches)
+
+    def lookup(
+        self,
+        ids: Iterable[str],
+        include_values: bool = True,
+        include_metadata: bool = True,
+    ) -> Dict[str, VectorMatch]:
+        found = {}
+        for vector_id in ids:
+            row = self._row_by_id.get(vector_id)
+            if row is not None:
+                match = self._build_match(row, 0.0, include_values, include_metadata)
+                if match is not None:
+                    found[vector_id] = match
+        return found
+
+    def fetch(self, ids: List[str]) -> FetchResult:
+        return FetchResult(self.lookup(ids))
+
+    def describe_index_stats(self) -> IndexStats:
+        return IndexStats(self.live_count(), self.dimension)
+
+    def list_ids(self, prefix: str = "") -> Iterator[str]:
+        return iter([vector_id for vector_id in list(self._row_by_id) if vector_id.startswith(prefix)])
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "directory": self.directory,
+            "dtype": self.dtype.name,
+            "vectors": self.live_count(),
+            "tombstones": self._count - self.live_count(),
+            "nlist": 0 if self._centroids is None else int(self._centroids.shape[0]),
+            "nprobe": self.nprobe,
+            "queries": self._queries,
+            "mean_probed_rows": round(self._probed_rows / self._queries, 1) if self._queries else 0.0,
+            "snapshot_interval_seconds": self.snapshot_interval_seconds,
+            "last_snapshot": self._last_snapshot,
+            "unsaved_writes": self.dirty(),
+        }
+
+
+class MirroredVectorStore(VectorStore):
+    """Remote index for ranking with a local float16 mirror serving vector values and metadata
+
+    Queries ask the remote index for ids and scores only, then hydrate values and metadata
+    from the mirror. Writes go to both. Ids the mirror is missing are fetched from the remote
+    index and backfilled, so the mirror is only snapshotted by ``sync_mirror`` and its own
+    long background interval, never by a training flush. ``fetch`` only trusts a miss once this process's mirror comes from a
+    completed ``sync_mirror`` (recorded in the mirror snapshot's own manifest) and its vector
+    count matches the remote index.
+    """
+
+    def __init__(self, primary: VectorStore, mirror: "LocalVectorStore", verify_interval_seconds: float = 60.0):
+        self.primary = primary
+        self.mirror = mirror
+        self.backend = f"{primary.backend}+mirror"
+        self.provider = primary.provider
+        # The flag travels with the snapshot it describes: a partial mirror that a sibling worker
+        # snapshotted later carries complete=False.
+        restored = mirror.manifest
+        self.state: Dict[str, Any] = {
+            "complete": bool(restored.get("mirror_complete")),
+            "synced_at": restored.get("mirror_synced_at"),
+        }
+        self._sync_manifest_extra()
+        self.verify_interval_seconds = verify_interval_seconds
+        self._authoritative = False
+        self._verified_at = 0.0
+        self._hydrated = 0
+        self._remote_backfills = 0
+
+    def _sync_manifest_extra(self) -> None:
+        self.mirror.manifest_extra = {
+            "mirror_complete": self.state["complete"],
+            "mirror_synced_at": self.state["synced_at"],
+        }
+
+    def mirror_authoritative(self) -> bool:
+        """Whether a mirror miss means the id does not exist; re-checked against the remote count periodically."""
+        if not self.state["complete"]:
+            return False
+        now = time.monotonic()
+        if now - self._verified_at >= self.verify_interval_seconds:
+            self._verified_at = now
+            try:
+                remote_count = int(self.primary.describe_index_stats().total_vector_count)
+                self._authoritative = self.mirror.live_count() == remote_count
+            except Exception as error:
+                print(f"Unable to verify vector mirror against the remote index: {error}")
+                self._authoritative = False
+        return self._authoritative
+
+    def _backfill(self, ids: List[str]) -> Dict[str, Any]:
+        if not ids:
+            return {}
+        vectors = self.primary.fetch(ids).vectors or {}
+        if vectors:
+            self.mirror.upsert([
+                (vector_id, list(vector.values), dict(vector.metadata or {}))
+                for vector_id, vector in vectors.items()
+            ])
+            self._remote_backfills += len(vectors)
+        return vectors
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> QueryResult:
+        remote_matches = self.primary.query(vector, top_k=top_k, filter=filter).matches
+        ids = [match.id for match in remote_matches]
+        local = self.mirror.lookup(ids, include_values=include_values, include_metadata=include_metadata)
+        missing = [vector_id for vector_id in ids if vector_id not in local]
+        if missing and (include_values or include_metadata):
+            for vector_id, vector in self._backfill(missing).items():
+                local[vector_id] = VectorMatch(
+                    vector_id,
+                    values=list(vector.values) if include_values else None,
+                    metadata=dict(vector.metadata or {}) if include_metadata else None,
+                )
+
+        matches = []
+        for match in remote_matches:
+            hydrated = local.get(match.id)
+            matches.append(VectorMatch(
+                match.id,
+                score=float(match.score),
+                values=hydrated.values if hydrated is not None else None,
+                metadata=hydrated.metadata if hydrated is not None else None,
+            ))
+        self._hydrated += len(local)
+        return QueryResult(matches)
+
+    def fetch(self, ids: List[str]) -> FetchResult:
+        found = self.mirror.lookup(ids)
+        if len(found) < len(ids) and not self.mirror_authoritative():
+            missing = [vector_id for vector_id in ids if vector_id not in found]
+            for vector_id, vector in self._backfill(missing).items():
+                found[vector_id] = VectorMatch(vector_id, values=list(vector.values), metadata=dict(vector.metadata or {}))
+        return FetchResult(found)
+
+    def upsert(self, vectors: Iterable[Any]) -> Any:
+        records = [_parse_vector_record(record) for record in vectors]
+        response = self.primary.upsert(vectors=records)
+        self.mirror.upsert(records)
+        return response
+
+    def delete(self, ids: List[str]) -> Any:
+        response = self.primary.delete(ids=ids)
+        self.mirror.delete(ids)
+        return response
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> Any:
+        response = self.primary.update_metadata(vector_id, metadata)
+        self.mirror.update_metadata(vector_id, metadata)
+        return response
+
+    def describe_index_stats(self) -> Any:
+        return self.primary.describe_index_stats()
+
+    def list_ids(self, prefix: str = "") -> Iterator[str]:
+        return self.primary.list_ids(prefix=prefix)
+
+    def sync_mirror(self, chunk_size: int = 100) -> Dict[str, Any]:
+        """Copy every remote vector into the mirror and drop mirrored ids the remote no longer has."""
+        remote_ids = set()
+        pending: List[str] = []
+        copied = 0
+        for vector_id in self.primary.list_ids():
+            remote_ids.add(vector_id)
+            pending.append(vector_id)
+            if len(pending) >= chunk_size:
+                copied += len(self._backfill(pending))
+                pending = []
+        copied += len(self._backfill(pending))
+
+        stale_ids = [vector_id for vector_id in self.mirror.list_ids() if vector_id not in remote_ids]
+        self.mirror.delete(stale_ids)
+        self.state = {"complete": True, "synced_at": time.time()}
+        self._sync_manifest_extra()
+        self._verified_at = 0.0
+        self.mirror.snapshot()
+        return {"copied": copied, "removed": len(stale_ids), "mirrored": self.mirror.live_count()}
+
+    def flush(self) -> None:
+        # The remote index is the source of truth; rewriting the whole mirror here would cost a
+        # full float16 copy of the corpus per call.
+        self.primary.flush()
+
+    def reset_after_fork(self) -> None:
+        self.primary.reset_after_fork()
+        self.mirror.reset_after_fork()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.primary.metrics(),
+            "backend": self.backend,
+            "mirror": {
+                "complete": self.state["complete"],
+                "authoritative": self._authoritative,
+                "synced_at": self.state["synced_at"],
+                "vectors": self.mirror.live_count(),
+                "dtype": self.mirror.dtype.name,
+                "hydrated_matches": self._hydrated,
+                "remote_backfills": self._remote_backfills,
+            },
+        }
+
+
+def vector_mirror_enabled() -> bool:
+    return env_flag("NAVISENSE_VECTOR_MIRROR", False)
+
+
+def build_vector_store(
+    backend: str,
+    index_name: str,
+    dimension: int,
+    pinecone_client: Any = None,
+) -> VectorStore:
+    if backend == "pinecone":
+        store = PineconeVectorStore(pinecone_client, index_name)
+        if not vector_mirror_enabled():
+            return store
+        # Id lookups only: the mirror never needs a coarse quantizer.
+        mirror = LocalVectorStore(
+            os.path.join(os.getenv("NAVISENSE_VECTOR_MIRROR_DIR", "vector_mirror"), index_name),
+            dimension,
+            dtype="float16",
+            min_train_size=2 ** 62,
+            snapshot_interval_seconds=float(os.getenv("NAVISENSE_VECTOR_MIRROR_SNAPSHOT_SECONDS", "3600")),
+        )
+        mirror.restore()
+        return MirroredVectorStore(store, mirror)
+    if backend == "local":
+        store = LocalVectorStore(
+            os.path.join(os.getenv("NAVISENSE_LOCAL_INDEX_DIR", "local_vector_index"), index_name),
+            dimension,
+        )
+        store.restore()
+        return store
+    raise ValueError(
+        f"Unknown vector store '{backend}'; expected one of {', '.join(SUPPORTED_VECTOR_STORES)}"
+    )
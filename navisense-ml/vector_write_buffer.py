@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class VectorWriteBuffer:
+    """Coalesce vector upserts and deletes into chunked index calls, flushed on size, age or shutdown
+
+    Pending writes are keyed by vector id, so only the last upsert or delete queued for an id
+    is sent. A chunk that keeps failing after ``max_retries`` attempts is dropped and its ids
+    are reported by ``flush`` and ``metrics`` instead of blocking later writes.
+
+    Requests that need to know whether *their* writes landed use a ``scoped`` child buffer, so
+    a concurrent request's flush can neither send their writes nor report its failures to them.
+    Live scoped buffers stay registered with their parent, whose age thread and ``flush_all``
+    (the shutdown hook) flush them too; whatever the age thread sends is reported by the
+    owner's next ``flush``.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        chunk_size: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff_seconds: float = 0.5,
+        parent: Optional["VectorWriteBuffer"] = None,
+    ):
+        self.store = store
+        self._parent = parent
+        self.chunk_size = max(1, int(chunk_size or os.getenv("NAVISENSE_VECTOR_WRITE_CHUNK_SIZE", "100")))
+        self.max_age_seconds = max(
+            0.1,
+            float(
+                max_age_seconds
+                if max_age_seconds is not None
+                else os.getenv("NAVISENSE_VECTOR_WRITE_MAX_AGE_SECONDS", "5")
+            ),
+        )
+        self.max_retries = max(
+            1,
+            int(max_retries if max_retries is not None else os.getenv("NAVISENSE_VECTOR_WRITE_MAX_RETRIES", "3")),
+        )
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._pending: Dict[str, Optional[Tuple[str, Sequence[float], Dict[str, Any]]]] = {}
+        self._oldest_pending_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._upserted = 0
+        self._deleted = 0
+        self._calls = 0
+        self._retries = 0
+        self._failed_ids: List[str] = []
+        self._children: "weakref.WeakSet[VectorWriteBuffer]" = weakref.WeakSet()
+        # Scoped buffers only: what the age thread sent since the owner last flushed.
+        self._carried: Optional[Dict[str, Any]] = None
+
+    def scoped(self) -> "VectorWriteBuffer":
+        """Private buffer for one request or run; its counts roll up into this one, which also ages it out."""
+        child = VectorWriteBuffer(
+            self.store,
+            chunk_size=self.chunk_size,
+            max_age_seconds=self.max_age_seconds,
+            max_retries=self.max_retries,
+            retry_backoff_seconds=self.retry_backoff_seconds,
+            parent=self,
+        )
+        with self._lock:
+            self._children.add(child)
+        return child
+
+    def _buffers(self) -> List["VectorWriteBuffer"]:
+        with self._lock:
+            return [self, *self._children]
+
+    def reset_after_fork(self) -> None:
+        """Drop the parent's flush thread and locks; threads do not survive fork."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_forever,
+                name="navisense-vector-writes",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_forever(self) -> None:
+        while True:
+            time.sleep(self.max_age_seconds / 2)
+            for buffer in self._buffers():
+                with buffer._lock:
+                    oldest = buffer._oldest_pending_at
+                if oldest is not None and time.monotonic() - oldest >= self.max_age_seconds:
+                    buffer._flush_aged()
+
+    def _enqueue(self, vector_id: str, record: Optional[Tuple[str, Sequence[float], Dict[str, Any]]]) -> bool:
+        with self._lock:
+            self._pending[vector_id] = record
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.monotonic()
+            full = len(self._pending) >= self.chunk_size
+        (self._parent or self)._ensure_worker()
+        return full
+
+    def upsert(self, vector_id: str, values: Sequence[float], metadata: Dict[str, Any]) -> None:
+        if self._enqueue(vector_id, (vector_id, values, metadata)):
+            self.flush()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        full = False
+        for vector_id in ids:
+            full = self._enqueue(vector_id, None) or full
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        """Writes not yet sent, including those in this buffer's live scoped buffers."""
+        total = 0
+        for buffer in self._buffers():
+            with buffer._lock:
+                total += len(buffer._pending)
+        return total
+
+    def _record(self, calls: int = 0, retries: int = 0, report: Optional[Dict[str, Any]] = None) -> None:
+        if self._parent is not None:
+            self._parent._record(calls, retries, report)
+            return
+        with self._lock:
+            self._calls += calls
+            self._retries += retries
+            if report is not None:
+                self._upserted += report["upserted"]
+                self._deleted += report["deleted"]
+                self._failed_ids = (self._failed_ids + report["failed_ids"])[-100:]
+
+    def _send(self, operation: str, chunk: List[Any]) -> bool:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if operation == "upsert":
+                    self.store.upsert(vectors=chunk)
+                else:
+                    self.store.delete(ids=chunk)
+                self._record(calls=1)
+                return True
+            except Exception as error:
+                print(f"Vector {operation} of {len(chunk)} ids failed (attempt {attempt}/{self.max_retries}): {error}")
+                if attempt < self.max_retries:
+                    self._record(retries=1)
+                    time.sleep(self.retry_backoff_seconds * (2 ** (attempt - 1)))
+        return False
+
+    @staticmethod
+    def _merge_reports(first: Optional[Dict[str, Any]], second: Dict[str, Any]) -> Dict[str, Any]:
+        if first is None:
+            return second
+        return {
+            "upserted": first["upserted"] + second["upserted"],
+            "deleted": first["deleted"] + second["deleted"],
+            "failed_ids": first["failed_ids"] + second["failed_ids"],
+        }
+
+    def _flush_aged(self) -> Dict[str, Any]:
+        # Flushed on the owner's behalf: keep the outcome for the owner's own flush to report.
+        # Stored under the flush lock so an owner flush waiting on it cannot miss the outcome.
+        with self._flush_lock:
+            report = self._send_pending()
+            if self._parent is not None:
+                with self._lock:
+                    self._carried = self._merge_reports(self._carried, report)
+        return report
+
+    def flush(self) -> Dict[str, Any]:
+        """Send everything pending in ``chunk_size`` calls; returns counts and any ids that could not be written.
+
+        A scoped buffer's report also covers what the age thread sent for it since the last call.
+        """
+        with self._flush_lock:
+            report = self._send_pending()
+            with self._lock:
+                carried, self._carried = self._carried, None
+        return self._merge_reports(carried, report)
+
+    def flush_all(self) -> Dict[str, Any]:
+        """Flush this buffer and every live scoped buffer, e.g. on shutdown."""
+        report: Optional[Dict[str, Any]] = None
+        for buffer in self._buffers():
+            report = self._merge_reports(report, buffer._flush_aged())
+        return report
+
+    def _send_pending(self) -> Dict[str, Any]:
+        # Callers hold ``_flush_lock``.
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._oldest_pending_at = None
+
+        upserts = [record for record in pending.values() if record is not None]
+        deletes = [vector_id for vector_id, record in pending.items() if record is None]
+        report: Dict[str, Any] = {"upserted": 0, "deleted": 0, "failed_ids": []}
+
+        for operation, items in (("upsert", upserts), ("delete", deletes)):
+            for offset in range(0, len(items), self.chunk_size):
+                chunk = items[offset:offset + self.chunk_size]
+                if self._send(operation, chunk):
+                    report["upserted" if operation == "upsert" else "deleted"] += len(chunk)
+                else:
+                    report["failed_ids"].extend(item[0] if operation == "upsert" else item for item in chunk)
+
+        self._record(report=report)
+        return report
+
+    def metrics(self) -> Dict[str, Any]:
+        pending = self.pending()
+        with self._lock:
+            return {
+                "chunk_size": self.chunk_size,
+                "max_age_seconds": self.max_age_seconds,
+                "pending": pending,
+                "upserted": self._upserted,
+                "deleted": self._deleted,
+                "index_calls": self._calls,
+                "retries": self._retries,
+                "recent_failed_ids": list(self._failed_ids),
+            }